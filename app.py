@@ -2,41 +2,45 @@ import os
 from flask import Flask, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from datetime import timedelta
-from dotenv import load_dotenv
+from config import config
 from flask_restx import Api
 from sqlalchemy import text
 from database import init_db, db
+from cache import init_cache
+from commands import init_commands
+from leaderboard import init_leaderboards
+from game_sessions import init_game_sessions
+from progress import init_progress
+from hashing import init_hashing
+from serialization import init_serialization
+from instrumentation import init_instrumentation
+from compression import init_compression
+from metrics import init_metrics
 from routes.user.user_route import user_bp
+from routes.ping import ping_bp
+from routes.metrics import metrics_bp
 from routes.courses.course_route import api as course_namespace
 from routes.games.jeopardy_route import api as jeopardy_namespace
+from routes.games.jeopardy_session_route import api as jeopardy_session_namespace
 from routes.courses.course_enrollment_route import api as course_enrollment_namespace
 from routes.user.user_xp_route import api as xp_namespace
 from flasgger import Swagger
 
-load_dotenv()
 
-def create_app():
+def create_app(test_config=None):
     app = Flask(__name__)
     CORS(app, supports_credentials=True) 
 
     env = os.getenv("FLASK_ENV", "development")
     print("ENV:" + env)
 
-    if env == "development":
-        app.config["DEBUG"] = True
-        app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DEV_DATABASE_URL")
-        print("Running in Development Environment")
-    elif env == "production":
-        app.config["DEBUG"] = False 
-        app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("PROD_DATABASE_URL")
-        print("Running in Production Environment")
-    else:
-        raise ValueError("Invalid FLASK_ENV. Please set it to 'development' or 'production'.")
+    if env not in config:
+        raise ValueError("Invalid FLASK_ENV. Please set it to 'development', 'production' or 'testing'.")
 
-    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-    app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY")
-    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(minutes=60) 
+    app.config.from_object(config[env])
+    if test_config:
+        app.config.update(test_config)
+    print(f"Running in {env.capitalize()} Environment")
 
     jwt = JWTManager(app)
     swagger = Swagger(app, template={
@@ -51,8 +55,21 @@ def create_app():
 })
 
     init_db(app)
+    init_cache(app)
+    init_commands(app)
+    init_leaderboards(app)
+    init_game_sessions(app)
+    init_progress(app)
+    init_hashing(app)
+    # Before compression, so its after_request runs after it and times the whole response
+    init_instrumentation(app)
+    init_compression(app)
+    init_metrics(app)
 
     app.register_blueprint(user_bp)
+    app.register_blueprint(ping_bp)
+    if app.config["METRICS_ENABLED"]:
+        app.register_blueprint(metrics_bp)
 
     api = Api(
         app,
@@ -61,9 +78,11 @@ def create_app():
         description='API for E-learning platform',
         doc='/newdocs'  
     )
+    init_serialization(app, api)
 
     api.add_namespace(course_namespace, path='/course')
     api.add_namespace(jeopardy_namespace, path='/jeopardy')
+    api.add_namespace(jeopardy_session_namespace, path='/jeopardy/session')
     api.add_namespace(course_enrollment_namespace, path='/course/enrollment')
     api.add_namespace(xp_namespace, path='/xp')  
 
@@ -0,0 +1,296 @@
+"""
+ASGI entry point, next to the WSGI app:app:
+
+    uvicorn asgi:app --workers 4 --host 0.0.0.0 --port 443 --ssl-certfile ... --ssl-keyfile ...
+
+The read-heavy GET endpoints registered with async_route below run as
+coroutines on the async engine, so a slow query only parks its own request
+instead of a whole worker. Every other request (writes, Swagger, the GETs
+without an async handler) is passed to the Flask app on a thread pool, so both
+entry points serve the same API from the same create_app configuration.
+
+The leaderboard GETs stay on the Flask app: they are answered from the
+in-memory LeaderboardIndex, whose first load of a board runs its loader
+through db.session and would block the event loop.
+
+Blocking work outside the queries runs on a thread with asyncio.to_thread: the
+course cache, which with COURSE_CACHE_SHARED_PATH reads and writes a SQLite
+file, and finishing the response, where the after_request hooks compress the
+body.
+"""
+import asyncio
+import io
+
+from a2wsgi import WSGIMiddleware
+from a2wsgi.wsgi import build_environ
+from flask import request
+from flask_jwt_extended import verify_jwt_in_request
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, Rule
+
+from app import app as flask_app
+from async_database import async_db, init_async_db
+from cache import course_cache
+from http_cache import cache_headers, make_etag, not_modified
+from models import Course
+from pagination import DEFAULT_PAGE_SIZE, paginate, split_page
+from routes.courses.course_enrollment_route import (
+    enrolled_courses_parser, enrolled_courses_query, get_user_id, serialize_enrolled_course
+)
+from routes.courses.course_route import (
+    cache_course, course_elements_query, course_entry_response, course_etag, course_list_parser,
+    course_list_query, course_list_version_query, course_summary_query, parse_course_fields,
+    serialize_course_row
+)
+from routes.games.jeopardy_route import (
+    build_jeopardy_grid, jeopardy_cells_query, jeopardy_list_query, jeopardy_list_version_query, jeopardy_query,
+    jeopardy_subjects_query, serialize_jeopardy_game
+)
+from routes.user.user_xp_route import xp_total_query
+
+async_routes = Map()
+
+
+def async_route(rule):
+    def decorator(handler):
+        async_routes.add(Rule(rule, endpoint=handler, methods=["GET"]))
+        return handler
+    return decorator
+
+
+class UseWsgi(Exception):
+    """Raised by an async handler to hand the request over to the Flask app."""
+
+
+@async_route("/course")
+async def get_courses():
+    args = course_list_parser.parse_args()
+    if args['stream']:
+        raise UseWsgi()
+    field_names = parse_course_fields(args['fields'])
+
+    try:
+        async with async_db.connect() as connection:
+            version = (await connection.execute(course_list_version_query())).one()
+            etag = make_etag("courses", *version, request.query_string.decode())
+            response = not_modified(etag)
+            if response is not None:
+                return response
+
+            statement = course_list_query(field_names, args['title'])
+
+            if args['limit'] is None and args['cursor'] is None:
+                rows = (await connection.execute(statement.order_by(Course.course_id))).all()
+                return {"courses": [serialize_course_row(row) for row in rows]}, 200, cache_headers(etag)
+
+            limit = args['limit'] or DEFAULT_PAGE_SIZE
+            rows = (await connection.execute(paginate(statement, Course.course_id, args['cursor'], limit))).all()
+            rows, next_cursor = split_page(rows, limit, lambda row: row.id)
+
+            return {
+                "courses": [serialize_course_row(row) for row in rows],
+                "nextCursor": next_cursor
+            }, 200, cache_headers(etag)
+
+    except SQLAlchemyError as e:
+        print(f"Database error: {e}")
+        return {"error": "An error occurred while fetching courses"}, 500
+
+
+@async_route("/course/<int:course_id>")
+async def get_course(course_id):
+    version = await asyncio.to_thread(course_cache.version, course_id)
+    cached = await asyncio.to_thread(course_cache.get, course_id, version)
+    if cached is not None:
+        response = not_modified(cached["etag"], cached["lastModified"])
+        if response is not None:
+            return response
+        return course_entry_response(cached)
+
+    try:
+        async with async_db.connect() as connection:
+            course = (await connection.execute(course_summary_query(course_id))).first()
+
+            if not course:
+                return {"error": f"Course with ID {course_id} not found"}, 404
+
+            response = not_modified(course_etag(course), course.created)
+            if response is not None:
+                return response
+
+            rows = (await connection.execute(course_elements_query(course_id))).all()
+        return course_entry_response(await asyncio.to_thread(cache_course, course, rows, version))
+
+    except SQLAlchemyError as e:
+        print(f"Database error: {e}")
+        return {"error": "An error occurred while retrieving the course"}, 500
+
+
+@async_route("/jeopardy")
+async def get_jeopardy_games():
+    try:
+        async with async_db.connect() as connection:
+            etag = make_etag("jeopardy_games", *(await connection.execute(jeopardy_list_version_query())).one())
+            response = not_modified(etag)
+            if response is not None:
+                return response
+
+            jeopardy_games = (await connection.execute(jeopardy_list_query())).all()
+
+        return {
+            "jeopardy_games": [serialize_jeopardy_game(game) for game in jeopardy_games]
+        }, 200, cache_headers(etag)
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+
+@async_route("/jeopardy/<int:jeopardy_id>")
+async def get_jeopardy(jeopardy_id):
+    try:
+        async with async_db.connect() as connection:
+            jeopardy = (await connection.execute(jeopardy_query(jeopardy_id))).first()
+
+            if not jeopardy:
+                return {"error": "Jeopardy game not found"}, 404
+
+            etag = make_etag("jeopardy", jeopardy_id, jeopardy.created)
+            response = not_modified(etag, jeopardy.created)
+            if response is not None:
+                return response
+
+            subjects = (await connection.execute(jeopardy_subjects_query(jeopardy_id))).scalars().all()
+            cells = (await connection.execute(jeopardy_cells_query(jeopardy_id))).all()
+
+        jeopardy_data = {
+            **serialize_jeopardy_game(jeopardy),
+            "subjects": subjects,
+            "grid": build_jeopardy_grid(cells, len(subjects))
+        }
+        return {"message": "Jeopardy game retrieved successfully", "jeopardy": jeopardy_data}, 200, cache_headers(etag, jeopardy.created)
+    except Exception as e:
+        return {"error": str(e)}, 500
+
+
+@async_route("/xp/total")
+async def get_current_user_total_xp():
+    verify_jwt_in_request()
+    return await get_total_xp(get_user_id())
+
+
+@async_route("/xp/<int:user_id>/total")
+async def get_user_total_xp(user_id):
+    verify_jwt_in_request()
+    return await get_total_xp(user_id)
+
+
+async def get_total_xp(user_id):
+    try:
+        async with async_db.connect() as connection:
+            total_xp = await connection.scalar(xp_total_query(user_id))
+        return {'user_id': user_id, 'total_xp': total_xp if total_xp else 0}, 200
+
+    except Exception as e:
+        print("Error retrieving total XP for user:", str(e))
+        return {'error': 'Internal server error', 'details': str(e)}, 500
+
+
+@async_route("/course/enrollment/enrolled")
+async def get_enrolled_courses():
+    verify_jwt_in_request()
+    args = enrolled_courses_parser.parse_args()
+    try:
+        statement = enrolled_courses_query(get_user_id())
+
+        async with async_db.connect() as connection:
+            if args['limit'] is None and args['cursor'] is None:
+                rows = (await connection.execute(statement.order_by(Course.course_id))).all()
+                return {"courses": [serialize_enrolled_course(row) for row in rows]}, 200
+
+            limit = args['limit'] or DEFAULT_PAGE_SIZE
+            rows = (await connection.execute(paginate(statement, Course.course_id, args['cursor'], limit))).all()
+
+        rows, next_cursor = split_page(rows, limit, lambda row: row.course_id)
+        return {
+            "courses": [serialize_enrolled_course(row) for row in rows],
+            "nextCursor": next_cursor
+        }, 200
+
+    except SQLAlchemyError as e:
+        print(f"Database error: {e}")
+        return {"error": "An error occurred while fetching courses"}, 500
+
+
+class AsgiApp:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WSGIMiddleware(flask_app, workers=flask_app.config["ASGI_WSGI_THREADS"])
+        self.routes = async_routes.bind("localhost")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+
+        if scope["type"] == "http" and scope["method"] == "GET":
+            try:
+                handler, view_args = self.routes.match(scope["path"], method="GET")
+            except HTTPException:
+                handler = None
+
+            if handler is not None:
+                response = await self.dispatch(scope, handler, view_args)
+                if response is not None:
+                    return await self.send_response(response, send)
+
+        await self.wsgi(scope, receive, send)
+
+    async def dispatch(self, scope, handler, view_args):
+        """
+        Run an async handler inside a regular Flask request context, so request
+        parsing, JWT checks, error handlers and after_request hooks behave as
+        they do for the Flask routes. Returns None to fall back to the Flask app.
+        """
+        app = self.flask_app
+        # A fresh app context, so g is never shared with another request even when
+        # an outer app context is pushed (tests, CLI)
+        with app.app_context(), app.request_context(build_environ(scope, io.BytesIO())):
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await handler(**view_args)
+                except UseWsgi:
+                    return None
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                # to_thread copies the context, so the hooks still see this request
+                return await asyncio.to_thread(app.process_response, app.make_response(rv))
+            except Exception as e:
+                return app.make_response(app.handle_exception(e))
+
+    async def send_response(self, response, send):
+        await send({
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in response.headers.items()]
+        })
+        await send({"type": "http.response.body", "body": response.get_data()})
+        response.close()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await async_db.dispose(self.flask_app)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(flask_app):
+    init_async_db(flask_app)
+    return AsgiApp(flask_app)
+
+
+app = create_asgi_app(flask_app)
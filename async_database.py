@@ -0,0 +1,65 @@
+"""
+Async engine used by the ASGI entry point (asgi.py). It points at the same
+database as db.engine, through the async variant of the configured driver.
+"""
+from flask import current_app
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from database import SQLiteShimConnection, engine_options
+
+ASYNC_DRIVERS = {
+    "mssql+pyodbc": "mssql+aioodbc",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite"
+}
+
+
+def async_database_url(app):
+    if app.config.get("ASYNC_DATABASE_URL"):
+        return make_url(app.config["ASYNC_DATABASE_URL"])
+
+    url = make_url(app.config["SQLALCHEMY_DATABASE_URI"])
+    if url.drivername not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for {url.drivername}, set ASYNC_DATABASE_URL")
+    return url.set(drivername=ASYNC_DRIVERS[url.drivername])
+
+
+def async_engine_options(app, url):
+    # Same pool sizing as the sync engine, but on the default async-adapted
+    # queue pool: InstrumentedQueuePool only works with blocking drivers
+    options = engine_options(app)
+    options.pop("poolclass", None)
+    if url.drivername == "sqlite+aiosqlite":
+        # aiosqlite hands extra arguments on to sqlite3.connect
+        options["connect_args"] = {"factory": SQLiteShimConnection}
+        if url.database not in (None, "", ":memory:"):
+            # aiosqlite runs a thread per connection, do not open one per request
+            options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
+
+class AsyncDatabase:
+    """One async engine per app, kept in app.extensions like Flask-SQLAlchemy does."""
+
+    def init_app(self, app):
+        url = async_database_url(app)
+        app.extensions["async_db"] = create_async_engine(url, **async_engine_options(app, url))
+
+    @property
+    def engine(self):
+        return current_app.extensions["async_db"]
+
+    def connect(self):
+        return self.engine.connect()
+
+    async def dispose(self, app):
+        await app.extensions["async_db"].dispose()
+
+
+async_db = AsyncDatabase()
+
+
+def init_async_db(app):
+    async_db.init_app(app)
@@ -0,0 +1,77 @@
+"""
+Load test of the read endpoints: the sync deployment (gunicorn app:app, sync
+workers) against the ASGI entry point (uvicorn asgi:app), with the same number
+of worker processes and CONCURRENCY clients hammering a mix of course,
+course list and Jeopardy list GETs for DURATION seconds each.
+
+Both servers are started on localhost against the benchmark database. Against
+SQLite the queries are fast and the gap is mostly the per-worker request
+concurrency; point BENCH_DATABASE_URL at SQL Server to see slow queries stop
+starving the other requests.
+"""
+import os
+import subprocess
+import sys
+
+from sqlalchemy import insert
+
+from benchmarks.common import create_bench_app, free_port, load_test, print_table, wait_until_up
+from database import db
+from models import Course, Jeopardy
+
+WORKERS = 4
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", 64))
+DURATION = float(os.getenv("BENCH_DURATION", 10))
+COURSES = 2_000
+PATHS = ["/course/{id}", "/course?limit=50", "/jeopardy"]
+
+
+def seed():
+    db.session.execute(insert(Course), [
+        {"course_title": f"Course {index}", "course_description": "Description " * 10}
+        for index in range(COURSES)
+    ])
+    db.session.execute(insert(Jeopardy), [
+        {"jeopardy_title": f"Board {index}", "jeopardy_description": "Board"} for index in range(50)
+    ])
+    db.session.commit()
+
+
+def course_reads(request_number):
+    return PATHS[request_number % len(PATHS)].format(id=request_number % COURSES + 1)
+
+
+def main():
+    app = create_bench_app()
+    with app.app_context():
+        seed()
+
+    servers = {
+        f"gunicorn app:app, {WORKERS} sync workers": [
+            sys.executable, "-m", "gunicorn", "-k", "sync", "-w", str(WORKERS), "-b", "127.0.0.1:{port}", "app:app"
+        ],
+        f"uvicorn asgi:app, {WORKERS} workers": [
+            sys.executable, "-m", "uvicorn", "--workers", str(WORKERS), "--port", "{port}",
+            "--log-level", "warning", "asgi:app"
+        ]
+    }
+
+    results = []
+    for name, command in servers.items():
+        port = free_port()
+        server = subprocess.Popen(
+            [part.format(port=port) for part in command], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_up(f"http://127.0.0.1:{port}/jeopardy")
+            results.append((name, *load_test(f"http://127.0.0.1:{port}", course_reads, CONCURRENCY, DURATION)))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{CONCURRENCY} concurrent clients, {DURATION:.0f}s per server")
+    print_table(("server", "req/s", "p50", "p99", "errors"), results)
+
+
+if __name__ == "__main__":
+    main()
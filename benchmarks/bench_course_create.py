@@ -0,0 +1,64 @@
+"""
+Course creation: one flush per element (the old CourseResource.post path)
+versus the batched inserts in add_course_elements.
+"""
+from benchmarks.common import best_of, create_bench_app, print_table
+from database import db
+from models import Course, CourseElement, InputElement, TextElement
+from routes.courses.course_route import add_course_elements
+
+
+def make_elements(count):
+    return [
+        {"type": "Text", "text": f"Paragraph {index} " * 20} if index % 2 == 0
+        else {"type": "Input", "label": f"Question {index}", "answer": "42"}
+        for index in range(count)
+    ]
+
+
+def create_course_per_row(elements):
+    course = Course(course_title="Benchmark", course_description="Per row")
+    db.session.add(course)
+    db.session.flush()
+
+    for element in elements:
+        if element['type'] == 'Text':
+            row = TextElement(text_=element['text'])
+            db.session.add(row)
+            db.session.flush()
+            element_id = row.text_element_id
+        else:
+            row = InputElement(label=element['label'], answer=element['answer'])
+            db.session.add(row)
+            db.session.flush()
+            element_id = row.input_element_id
+
+        db.session.add(CourseElement(course_id=course.course_id, element_id=element_id, element_type=element['type']))
+
+    db.session.commit()
+
+
+def create_course_bulk(elements):
+    course = Course(course_title="Benchmark", course_description="Bulk")
+    db.session.add(course)
+    db.session.flush()
+
+    add_course_elements(course.course_id, elements)
+    db.session.commit()
+
+
+def main():
+    app = create_bench_app()
+    rows = []
+    with app.app_context():
+        for count in (10, 100, 1000):
+            elements = make_elements(count)
+            per_row = best_of(lambda: create_course_per_row(elements))
+            bulk = best_of(lambda: create_course_bulk(elements))
+            rows.append((count, f"{per_row * 1000:.1f} ms", f"{bulk * 1000:.1f} ms", f"{per_row / bulk:.1f}x"))
+
+    print_table(("elements", "per row", "bulk", "speedup"), rows)
+
+
+if __name__ == "__main__":
+    main()
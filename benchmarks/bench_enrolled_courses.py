@@ -0,0 +1,71 @@
+"""
+GET /course/enrollment/enrolled: two full reads plus a list scan per course
+(the old EnrolledCourses.get) versus the single LEFT JOIN query, at 10k
+courses and 500 enrollments.
+"""
+import random
+
+from sqlalchemy import insert
+
+from benchmarks.common import best_of, create_bench_app, print_table
+from database import db
+from models import Course, StudentCourse
+from routes.courses.course_enrollment_route import enrolled_courses_query, serialize_enrolled_course
+
+COURSES = 10_000
+ENROLLMENTS = 500
+STUDENT_ID = 1
+
+
+def seed():
+    db.session.execute(insert(Course), [
+        {"course_title": f"Course {index}", "course_description": "Description " * 10}
+        for index in range(COURSES)
+    ])
+    course_ids = random.Random(42).sample(range(1, COURSES + 1), ENROLLMENTS)
+    db.session.execute(insert(StudentCourse), [
+        {"student_id": STUDENT_ID, "course_id": course_id} for course_id in course_ids
+    ])
+    db.session.commit()
+
+
+def list_scan():
+    enrolled_courses = db.session.query(StudentCourse.course_id).filter_by(student_id=STUDENT_ID).all()
+    enrolled_course_ids = [course.course_id for course in enrolled_courses]
+
+    courses = db.session.query(Course).all()
+    result = [
+        {
+            "id": course.course_id,
+            "courseTitle": course.course_title,
+            "courseDescription": course.course_description,
+            "enrolled": course.course_id in enrolled_course_ids
+        }
+        for course in courses
+    ]
+    db.session.expunge_all()
+    return result
+
+
+def left_join():
+    rows = db.session.execute(enrolled_courses_query(STUDENT_ID).order_by(Course.course_id)).all()
+    return [serialize_enrolled_course(row) for row in rows]
+
+
+def main():
+    app = create_bench_app()
+    with app.app_context():
+        seed()
+        assert [course["enrolled"] for course in list_scan()] == [course["enrolled"] for course in left_join()]
+
+        old = best_of(list_scan)
+        new = best_of(left_join)
+
+    print_table(
+        ("courses", "enrollments", "list scan", "left join", "speedup"),
+        [(COURSES, ENROLLMENTS, f"{old * 1000:.1f} ms", f"{new * 1000:.1f} ms", f"{old / new:.1f}x")]
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+The gunicorn.conf.py worker profiles (sync, gthread, gevent) under the same
+load: CONCURRENCY clients sending a mix of course, course list and Jeopardy
+list reads plus one login in LOGIN_EVERY requests, for DURATION seconds per
+profile. Logins wait on the argon2 process pool, so for the worker they are
+I/O like a slow SQL Server query is.
+
+Each profile runs with its default worker/thread counts for this machine;
+set GUNICORN_WORKERS/GUNICORN_THREADS to compare at a fixed size.
+"""
+import json
+import os
+import subprocess
+import sys
+import urllib.request
+
+from sqlalchemy import insert
+
+from benchmarks.common import create_bench_app, free_port, load_test, print_table, wait_until_up
+from database import db
+from hashing import password_hasher
+from models import Account, Course, Jeopardy, Role
+
+CONCURRENCY = int(os.getenv("BENCH_CONCURRENCY", 64))
+DURATION = float(os.getenv("BENCH_DURATION", 10))
+PROFILES = os.getenv("BENCH_PROFILES", "sync,gthread,gevent").split(",")
+COURSES = 2_000
+LOGIN_EVERY = 8
+PATHS = ["/course/{id}", "/course?limit=50", "/jeopardy"]
+PASSWORD = "bench-password"
+
+
+def seed():
+    db.session.execute(insert(Course), [
+        {"course_title": f"Course {index}", "course_description": "Description " * 10}
+        for index in range(COURSES)
+    ])
+    db.session.execute(insert(Jeopardy), [
+        {"jeopardy_title": f"Board {index}", "jeopardy_description": "Board"} for index in range(50)
+    ])
+    db.session.add(Role(id=1, role="student"))
+    db.session.add(Account(name="Bench", email="bench@example.com", password=password_hasher.hash(PASSWORD), role_id=1))
+    db.session.commit()
+
+
+def mixed_request(request_number):
+    if request_number % LOGIN_EVERY == 0:
+        return urllib.request.Request(
+            "/login",
+            data=json.dumps({"email": "bench@example.com", "password": PASSWORD}).encode(),
+            headers={"Content-Type": "application/json"}
+        )
+    return PATHS[request_number % len(PATHS)].format(id=request_number % COURSES + 1)
+
+
+def main():
+    app = create_bench_app()
+    with app.app_context():
+        seed()
+    password_hasher.shutdown()
+
+    results = []
+    for profile in PROFILES:
+        port = free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-b", f"127.0.0.1:{port}", "app:app"],
+            env={**os.environ, "GUNICORN_PROFILE": profile},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_up(f"http://127.0.0.1:{port}/jeopardy")
+            results.append((profile, *load_test(f"http://127.0.0.1:{port}", mixed_request, CONCURRENCY, DURATION)))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{CONCURRENCY} concurrent clients, {DURATION:.0f}s per profile")
+    print_table(("profile", "req/s", "p50", "p99", "errors"), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Encoding the course and Jeopardy lists at 20k rows: strftime per row plus the
+stdlib encoder that Flask-RESTX used (the old path), against the datetimes
+formatted by the encoder itself, with orjson and with the stdlib fallback.
+Only the serialization is timed, the rows are fetched once up front.
+"""
+import json
+
+from sqlalchemy import insert
+
+from benchmarks.common import best_of, create_bench_app, print_table
+from database import db
+from models import Course, Jeopardy
+from routes.courses.course_route import course_list_query, serialize_course_row
+from routes.games.jeopardy_route import jeopardy_list_query, serialize_jeopardy_game
+from serialization import dumps, orjson, stdlib_dumps
+
+ROWS = 20_000
+
+
+def seed():
+    db.session.execute(insert(Course), [
+        {"course_title": f"Course {index}", "course_description": "Description " * 10} for index in range(ROWS)
+    ])
+    db.session.execute(insert(Jeopardy), [
+        {"jeopardy_title": f"Board {index}", "jeopardy_description": "Description " * 5} for index in range(ROWS)
+    ])
+    db.session.commit()
+
+
+def strftime_course(row):
+    course = row._asdict()
+    if course.get("created") is not None:
+        course["created"] = course["created"].strftime('%Y-%m-%d %H:%M:%S')
+    return course
+
+
+def strftime_game(game):
+    return {
+        "id": game.jeopardy_id,
+        "title": game.jeopardy_title,
+        "description": game.jeopardy_description,
+        "created": game.created.strftime('%Y-%m-%d %H:%M:%S') if game.created else None,
+    }
+
+
+def main():
+    app = create_bench_app()
+    with app.app_context():
+        seed()
+        courses = db.session.execute(course_list_query(["id", "courseTitle", "courseDescription", "created"])).all()
+        games = db.session.execute(jeopardy_list_query()).all()
+
+    payloads = [
+        ("courses", courses, strftime_course, serialize_course_row),
+        ("jeopardy_games", games, strftime_game, serialize_jeopardy_game)
+    ]
+    results = []
+    for key, rows, old_serialize, serialize in payloads:
+        old = best_of(lambda: json.dumps({key: [old_serialize(row) for row in rows]}) + "\n")
+        fallback = best_of(lambda: stdlib_dumps({key: [serialize(row) for row in rows]}))
+        new = best_of(lambda: dumps({key: [serialize(row) for row in rows]})) if orjson else None
+        results.append((
+            f"{key} ({ROWS} rows)",
+            f"{old * 1000:.1f} ms",
+            f"{fallback * 1000:.1f} ms",
+            f"{new * 1000:.1f} ms" if new is not None else "not installed"
+        ))
+
+    print_table(("payload", "strftime + json", "stdlib fallback", "orjson"), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Leaderboard queries over 1M UserXP rows (100k users x 10 courses): ranking
+in SQL on every request versus the in-memory Leaderboard index.
+"""
+import random
+import time
+
+from sqlalchemy import func, insert, select
+
+from benchmarks.common import best_of, create_bench_app, print_table
+from database import db
+from leaderboard import Leaderboard
+from models import UserXP
+
+USERS = 100_000
+COURSES = 10
+ME = 4242
+
+
+def seed():
+    rng = random.Random(42)
+    rows = [
+        {"user_id": user_id, "course_id": course_id, "xp_earned": rng.randint(1, 500)}
+        for user_id in range(1, USERS + 1)
+        for course_id in range(1, COURSES + 1)
+    ]
+    for start in range(0, len(rows), 50_000):
+        db.session.execute(insert(UserXP), rows[start:start + 50_000])
+    db.session.commit()
+
+
+def sql_per_request():
+    totals = select(UserXP.user_id, func.sum(UserXP.xp_earned).label("total_xp")).group_by(UserXP.user_id).subquery()
+    top = db.session.execute(select(totals).order_by(totals.c.total_xp.desc()).limit(10)).all()
+    my_total = db.session.scalar(select(totals.c.total_xp).where(totals.c.user_id == ME))
+    my_rank = db.session.scalar(select(func.count()).select_from(totals).where(totals.c.total_xp > my_total)) + 1
+    return top, my_rank
+
+
+def build_index():
+    return Leaderboard(db.session.execute(
+        select(UserXP.user_id, func.sum(UserXP.xp_earned)).group_by(UserXP.user_id)
+    ).all())
+
+
+def main():
+    app = create_bench_app()
+    with app.app_context():
+        start = time.perf_counter()
+        seed()
+        print(f"Seeded {USERS * COURSES:,} UserXP rows in {time.perf_counter() - start:.1f} s")
+
+        sql = best_of(sql_per_request, repeat=3)
+        build = best_of(build_index, repeat=1)
+        board = build_index()
+
+    top_and_rank = best_of(lambda: (board.top(10), board.rank(ME), board.around(ME, 5)), repeat=1000)
+    award = best_of(lambda: board.add(ME, 1), repeat=1000)
+
+    print_table(("operation", "time"), [
+        ("SQL top 10 + my rank, per request", f"{sql * 1000:.1f} ms"),
+        ("index build (once per refresh)", f"{build * 1000:.1f} ms"),
+        ("index top 10 + my rank + around me", f"{top_and_rank * 1_000_000:.1f} us"),
+        ("index XP award", f"{award * 1_000_000:.1f} us")
+    ])
+
+
+if __name__ == "__main__":
+    main()
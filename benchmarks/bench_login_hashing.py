@@ -0,0 +1,54 @@
+"""
+Login throughput versus hashing concurrency: argon2 verifications per second,
+and how many are rejected with 503, for different pool sizes and numbers of
+concurrent logins hitting one worker.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask
+
+from benchmarks.common import print_table
+from hashing import HashingBusy, PasswordHashingPool
+
+LOGINS = 64
+
+
+def run(workers, concurrency, queue_depth=8):
+    app = Flask(__name__)
+    app.config.update(HASH_WORKERS=workers, HASH_QUEUE_DEPTH=queue_depth)
+    pool = PasswordHashingPool()
+    pool.init_app(app)
+    password_hash = pool.hash("Secret123")
+
+    def login(_):
+        try:
+            return pool.verify(password_hash, "Secret123")
+        except HashingBusy:
+            return None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(login, range(LOGINS)))
+    elapsed = time.perf_counter() - start
+    pool.shutdown()
+
+    accepted = sum(1 for result in results if result)
+    return accepted / elapsed, results.count(None)
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    rows = []
+    for workers in sorted({1, 2, cpus}):
+        for concurrency in (1, 4, 16):
+            throughput, rejected = run(workers, concurrency)
+            rows.append((workers, concurrency, f"{throughput:.1f}/s", rejected))
+
+    print(f"{LOGINS} logins per run, default argon2 parameters, queue depth 8, {cpus} CPUs")
+    print_table(("hash workers", "concurrent logins", "verified", "503s"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Per-login account lookup overhead, without the argon2 verification: a new
+connection and ORM Session per login (the old authenticate_user) versus the
+column-only select through the managed session.
+"""
+from sqlalchemy.orm import Session
+
+from benchmarks.common import best_of, create_bench_app, print_table
+from database import db
+from models import Account
+from routes.user.user_route import find_login_account
+
+LOGINS = 2000
+
+
+def seed():
+    db.session.add_all([
+        Account(name=f"User {index}", email=f"user{index}@example.com", password="x" * 97, role_id=1)
+        for index in range(1000)
+    ])
+    db.session.commit()
+
+
+def bypass_session():
+    for index in range(LOGINS):
+        with db.engine.connect() as connection:
+            session = Session(connection)
+            user = session.query(Account).filter_by(email=f"user{index % 1000}@example.com").first()
+        user.account_id, user.email, user.name, user.role_id, user.password
+
+
+def managed_session():
+    for index in range(LOGINS):
+        user = find_login_account(f"user{index % 1000}@example.com")
+        user.account_id, user.email, user.name, user.role_id, user.password
+
+
+def main():
+    app = create_bench_app()
+    with app.app_context():
+        seed()
+        old = best_of(bypass_session, repeat=3)
+        new = best_of(managed_session, repeat=3)
+
+    print_table(("lookup", "per login"), [
+        ("connection + Session per login", f"{old / LOGINS * 1_000_000:.0f} us"),
+        ("column-only select, managed session", f"{new / LOGINS * 1_000_000:.0f} us")
+    ])
+
+
+if __name__ == "__main__":
+    main()
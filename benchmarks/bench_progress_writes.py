@@ -0,0 +1,78 @@
+"""
+Writing course element completions: a transaction per reported element (an
+existence check and an INSERT, as a per-click endpoint would) versus adding
+them to progress_buffer and flushing once.
+"""
+from sqlalchemy import delete, insert, select
+
+from benchmarks.common import best_of, create_bench_app, print_table
+from database import db
+from models import Account, Course, CourseElement, StudentCourse, StudentCourseElement
+from progress import progress_buffer
+
+STUDENTS = 50
+ELEMENTS = 40
+
+
+def seed():
+    db.session.add(Course(course_title="Python", course_description=""))
+    db.session.add_all([
+        Account(name=f"User {index}", email=f"user{index}@example.com", password="x", role_id=1)
+        for index in range(STUDENTS)
+    ])
+    db.session.flush()
+    db.session.execute(insert(CourseElement), [
+        {"course_id": 1, "element_id": index, "element_type": "Text"} for index in range(ELEMENTS)
+    ])
+    db.session.execute(insert(StudentCourse), [
+        {"student_id": student_id, "course_id": 1} for student_id in range(1, STUDENTS + 1)
+    ])
+    db.session.commit()
+
+
+def events():
+    return [(student_id, element_id) for student_id in range(1, STUDENTS + 1) for element_id in range(1, ELEMENTS + 1)]
+
+
+def clear_progress():
+    db.session.execute(delete(StudentCourseElement))
+    db.session.commit()
+
+
+def per_event():
+    clear_progress()
+    for student_id, element_id in events():
+        exists = db.session.execute(
+            select(StudentCourseElement.student_course_element_id)
+            .where(StudentCourseElement.student_id == student_id, StudentCourseElement.course_element_id == element_id)
+        ).first()
+        if not exists:
+            db.session.add(StudentCourseElement(student_id=student_id, course_element_id=element_id))
+        db.session.commit()
+
+
+def buffered():
+    clear_progress()
+    for student_id, element_id in events():
+        progress_buffer.add(student_id, [element_id])
+    progress_buffer.flush()
+
+
+def main():
+    app = create_bench_app()
+    progress_buffer.flush_seconds = 0
+    progress_buffer.flush_size = len(events()) + 1
+    with app.app_context():
+        seed()
+        old = best_of(per_event, repeat=3)
+        new = best_of(buffered, repeat=3)
+
+    count = len(events())
+    print_table(("write path", "total", "per event"), [
+        ("transaction per event", f"{old * 1000:.0f} ms", f"{old / count * 1_000_000:.0f} us"),
+        ("buffered, one flush", f"{new * 1000:.0f} ms", f"{new / count * 1_000_000:.0f} us")
+    ])
+
+
+if __name__ == "__main__":
+    main()
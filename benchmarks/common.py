@@ -0,0 +1,110 @@
+"""
+Shared setup for the benchmark scripts.
+
+The benchmarks run against a throw-away SQLite file by default. Set
+BENCH_DATABASE_URL to run them against a real SQL Server database instead.
+Run them from the repository root, e.g. ``python -m benchmarks.bench_course_create``.
+"""
+import os
+import socket
+import tempfile
+import threading
+import time
+import urllib.request
+
+BENCH_DATABASE_URL = os.getenv(
+    "BENCH_DATABASE_URL",
+    "sqlite:///" + os.path.join(tempfile.gettempdir(), "codecrafting_bench.db")
+)
+
+os.environ["FLASK_ENV"] = "development"
+os.environ["DEV_DATABASE_URL"] = BENCH_DATABASE_URL
+os.environ.setdefault("JWT_SECRET_KEY", "bench-secret")
+
+from app import create_app
+from database import db
+from models import Base
+
+
+def create_bench_app():
+    """Create the app and a fresh schema when benchmarking against SQLite."""
+    app = create_app()
+    if BENCH_DATABASE_URL.startswith("sqlite"):
+        with app.app_context():
+            Base.metadata.drop_all(db.engine)
+            Base.metadata.create_all(db.engine)
+    return app
+
+
+def best_of(func, repeat=5):
+    """Run func repeat times and return the fastest wall-clock time in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    for values in [headers, *rows]:
+        print("  ".join(str(value).rjust(width) for value, width in zip(values, widths)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def load_test(base_url, make_request, concurrency, duration):
+    """
+    Send requests from concurrency client threads for duration seconds.
+    make_request(n) returns the path, or a urllib Request for that path, of the
+    n-th request. Returns (requests per second, p50, p99, errors).
+    """
+    latencies = []
+    errors = []
+    deadline = time.monotonic() + duration
+
+    def client(number):
+        request_number = number
+        while time.monotonic() < deadline:
+            request = make_request(request_number)
+            if isinstance(request, str):
+                request = urllib.request.Request(base_url + request)
+            else:
+                request.full_url = base_url + request.full_url
+            start = time.perf_counter()
+            try:
+                urllib.request.urlopen(request, timeout=30).read()
+                latencies.append(time.perf_counter() - start)
+            except OSError as e:
+                errors.append(e)
+            request_number += concurrency
+
+    threads = [threading.Thread(target=client, args=(number,)) for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return (
+        f"{len(latencies) / duration:.0f}",
+        f"{latencies[len(latencies) // 2] * 1000:.1f} ms" if latencies else "-",
+        f"{latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms" if latencies else "-",
+        len(errors)
+    )
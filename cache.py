@@ -0,0 +1,200 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from serialization import dumps, loads
+
+
+class LRUCache:
+    """
+    Size-bounded, thread-safe LRU cache local to one worker process.
+    Entries older than ttl seconds are treated as misses when a ttl is given.
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+class SQLiteCacheBackend:
+    """
+    Cache shared by every worker on a host, stored in a local SQLite file.
+    Values are stored as JSON; versions are plain integer counters.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS cache_entry (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS cache_version (key TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+
+    def _connect(self):
+        # A connection per call keeps the backend safe across threads and gunicorn forks
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def get(self, key):
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM cache_entry WHERE key = ?", (key,)).fetchone()
+        return loads(row[0]) if row else None
+
+    def set(self, key, value):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO cache_entry (key, value) VALUES (?, ?)",
+                (key, dumps(value).decode("utf-8"))
+            )
+
+    def delete_prefix(self, prefix):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM cache_entry WHERE key LIKE ? || '%'", (prefix,))
+
+    def get_version(self, key):
+        with self._connect() as connection:
+            row = connection.execute("SELECT version FROM cache_version WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def bump_version(self, key):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT INTO cache_version (key, version) VALUES (?, 1) "
+                "ON CONFLICT(key) DO UPDATE SET version = version + 1",
+                (key,)
+            )
+            return connection.execute("SELECT version FROM cache_version WHERE key = ?", (key,)).fetchone()[0]
+
+
+class VersionedCache:
+    """
+    Two-level cache keyed by a per-item version.
+
+    Each entry is stored under "<namespace>:<key>:v<version>". Invalidating a key
+    bumps its version, so stale entries in any worker's LRU simply stop being hit
+    and age out. When a shared backend is configured the versions live there, which
+    makes an invalidation in one worker visible to all of them. Without one the
+    versions are per worker, and another worker keeps serving its copy until the
+    ttl runs out; so COURSE_CACHE_SHARED_PATH has to be set whenever more than
+    one worker serves requests (the Dockerfile does).
+
+    Readers take the version before they read the database and pass it to get()
+    and set(). A value read before an invalidation is then stored under the old
+    version, where no one looks for it, rather than under the new one.
+    """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.local = LRUCache()
+        self.shared = None
+        self._versions = {}
+
+    def init_app(self, app):
+        self.local = LRUCache(
+            maxsize=app.config.get("COURSE_CACHE_SIZE", 256),
+            ttl=app.config.get("COURSE_CACHE_TTL")
+        )
+        shared_path = app.config.get("COURSE_CACHE_SHARED_PATH")
+        self.shared = SQLiteCacheBackend(shared_path) if shared_path else None
+        self._versions = {}
+
+    def version(self, key):
+        if self.shared is not None:
+            return self.shared.get_version(f"{self.namespace}:{key}")
+        return self._versions.get(key, 0)
+
+    def _entry_key(self, key, version):
+        return f"{self.namespace}:{key}:v{version}"
+
+    def get(self, key, version=None):
+        entry_key = self._entry_key(key, self.version(key) if version is None else version)
+        value = self.local.get(entry_key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(entry_key)
+            if value is not None:
+                self.local.set(entry_key, value)
+        return value
+
+    def set(self, key, value, version=None):
+        entry_key = self._entry_key(key, self.version(key) if version is None else version)
+        self.local.set(entry_key, value)
+        if self.shared is not None:
+            self.shared.set(entry_key, value)
+
+    def invalidate(self, key):
+        old_entry_key = self._entry_key(key, self.version(key))
+        self.local.delete(old_entry_key)
+
+        if self.shared is not None:
+            self.shared.bump_version(f"{self.namespace}:{key}")
+            self.shared.delete_prefix(f"{self.namespace}:{key}:v")
+        else:
+            self._versions[key] = self._versions.get(key, 0) + 1
+
+    def stats(self):
+        return {**self.local.stats(), "shared": self.shared is not None}
+
+
+course_cache = VersionedCache("course")
+
+# Public Account fields by account_id, for requests whose token lacks the claims
+account_cache = LRUCache(maxsize=1024, ttl=30)
+
+# Number of elements by course_id. Elements are only written when a course is
+# created, so entries stay valid until the course is deleted.
+course_element_counts = LRUCache(maxsize=4096)
+
+
+def init_cache(app):
+    course_cache.init_app(app)
+    account_cache.ttl = app.config.get("ACCOUNT_CACHE_TTL", 30)
+    account_cache.clear()
+    course_element_counts.clear()
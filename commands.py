@@ -0,0 +1,29 @@
+import click
+from flask.cli import AppGroup
+
+from progress import reconcile_progress_counters
+from routes.user.user_xp_route import reconcile_xp_totals
+
+xp_cli = AppGroup('xp', help='XP maintenance commands.')
+
+
+@xp_cli.command('reconcile-totals')
+def reconcile_totals_command():
+    """Rebuild UserXPTotal from UserXP and fix any drift."""
+    inserted, updated, deleted = reconcile_xp_totals()
+    click.echo(f"UserXPTotal reconciled: {inserted} inserted, {updated} updated, {deleted} deleted")
+
+
+progress_cli = AppGroup('progress', help='Course progress maintenance commands.')
+
+
+@progress_cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Rebuild StudentCourseProgress from StudentCourseElement and fix any drift."""
+    inserted, updated, deleted = reconcile_progress_counters()
+    click.echo(f"StudentCourseProgress reconciled: {inserted} inserted, {updated} updated, {deleted} deleted")
+
+
+def init_commands(app):
+    app.cli.add_command(xp_cli)
+    app.cli.add_command(progress_cli)
@@ -0,0 +1,158 @@
+"""
+gzip/brotli response compression, applied to every response by an
+after_request hook.
+
+Bodies under COMPRESS_MIN_SIZE are sent as they are. Streamed responses and
+bodies over COMPRESS_STREAM_MIN_SIZE are compressed chunk by chunk while they
+are sent, everything else in one go. A route serving a cached payload can call
+cache_compressed so the compressed bytes are kept next to it and reused on
+every hit instead of compressing the same body again.
+"""
+import zlib
+
+from flask import current_app, g, request
+
+from cache import LRUCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/plain", "text/css", "application/javascript"}
+STREAM_CHUNK_SIZE = 64 * 1024
+
+compressed_cache = LRUCache(maxsize=256)
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding():
+    """The best encoding the client accepts, brotli before gzip, or None."""
+    accepted = request.accept_encodings
+    candidates = [(accepted[encoding], encoding) for encoding in available_encodings() if accepted[encoding] > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: candidate[0])[1]
+
+
+def make_compressor(encoding):
+    if encoding == "br":
+        return BrotliCompressor(current_app.config["COMPRESS_BROTLI_QUALITY"])
+    return GzipCompressor(current_app.config["COMPRESS_GZIP_LEVEL"])
+
+
+def compress(data, encoding):
+    compressor = make_compressor(encoding)
+    return compressor.compress(data) + compressor.flush()
+
+
+def stream_compressed(chunks, compressor):
+    # The compressor is made up front: the body is sent after the request
+    # context is gone
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def split_chunks(data, size=STREAM_CHUNK_SIZE):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def cache_compressed(key):
+    """
+    Keep the compressed body of this request's response under key. The key has
+    to identify the content version, e.g. include its ETag, so that a stale
+    entry is never served.
+    """
+    g.compressed_cache_key = key
+
+
+def representation_etag(response, encoding):
+    etag, weak = response.get_etag()
+    if etag is not None:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+
+
+def compress_response(response):
+    config = current_app.config
+    if not config["COMPRESS_ENABLED"] or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add("Accept-Encoding")
+
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if response.status_code == 304:
+        # Answer with the ETag of the representation the client validated
+        if request.if_none_match.contains(f"{response.get_etag()[0]}-{encoding}"):
+            representation_etag(response, encoding)
+        return response
+
+    if (
+        response.status_code < 200
+        or response.status_code == 204
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or "no-transform" in response.headers.get("Cache-Control", "")
+    ):
+        return response
+
+    if response.is_streamed:
+        response.response = stream_compressed(response.response, make_compressor(encoding))
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < config["COMPRESS_MIN_SIZE"]:
+            return response
+
+        cache_key = g.get("compressed_cache_key")
+        if cache_key is not None:
+            compressed = compressed_cache.get((cache_key, encoding))
+            if compressed is None:
+                compressed = compress(body, encoding)
+                compressed_cache.set((cache_key, encoding), compressed)
+            response.set_data(compressed)
+        elif len(body) >= config["COMPRESS_STREAM_MIN_SIZE"]:
+            response.response = stream_compressed(split_chunks(body), make_compressor(encoding))
+            response.headers.pop("Content-Length", None)
+        else:
+            response.set_data(compress(body, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    representation_etag(response, encoding)
+    return response
+
+
+def init_compression(app):
+    compressed_cache.maxsize = app.config["COMPRESS_CACHE_SIZE"]
+    compressed_cache.clear()
+    app.after_request(compress_response)
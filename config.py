@@ -1,19 +1,107 @@
 import os
+from datetime import timedelta
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
 
 class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=60)
     DEBUG = False
 
+    # Connection pool, applied by init_db to server databases
+    DB_POOL_SIZE = env_int("DB_POOL_SIZE", 5)
+    DB_MAX_OVERFLOW = env_int("DB_MAX_OVERFLOW", 10)
+    DB_POOL_TIMEOUT = env_int("DB_POOL_TIMEOUT", 10)
+    DB_POOL_RECYCLE = env_int("DB_POOL_RECYCLE", 1800)
+    DB_POOL_PRE_PING = env_bool("DB_POOL_PRE_PING", True)
+    DB_POOL_WARMUP = env_int("DB_POOL_WARMUP", 2)
+
+    COURSE_CACHE_SIZE = env_int("COURSE_CACHE_SIZE", 256)
+    COURSE_CACHE_TTL = env_int("COURSE_CACHE_TTL", 300)
+    # Required with more than one worker, see VersionedCache in cache.py
+    COURSE_CACHE_SHARED_PATH = os.getenv("COURSE_CACHE_SHARED_PATH")
+    ACCOUNT_CACHE_TTL = env_int("ACCOUNT_CACHE_TTL", 30)
+    LEADERBOARD_REFRESH_SECONDS = env_int("LEADERBOARD_REFRESH_SECONDS", 60)
+    LEADERBOARD_MAX_BOARDS = env_int("LEADERBOARD_MAX_BOARDS", 256)
+    # Boards per transaction in POST /jeopardy/import
+    JEOPARDY_IMPORT_CHUNK_SIZE = env_int("JEOPARDY_IMPORT_CHUNK_SIZE", 50)
+    # Course element progress write buffer, see progress.py
+    PROGRESS_FLUSH_SIZE = env_int("PROGRESS_FLUSH_SIZE", 500)
+    PROGRESS_FLUSH_SECONDS = env_int("PROGRESS_FLUSH_SECONDS", 2)
+    # Live Jeopardy games, see game_sessions.py
+    GAME_SESSION_EVENT_BUFFER = env_int("GAME_SESSION_EVENT_BUFFER", 256)
+    GAME_SESSION_HEARTBEAT_SECONDS = env_int("GAME_SESSION_HEARTBEAT_SECONDS", 15)
+    GAME_SESSION_IDLE_SECONDS = env_int("GAME_SESSION_IDLE_SECONDS", 4 * 3600)
+
+    ARGON2_TIME_COST = env_int("ARGON2_TIME_COST", 3)
+    ARGON2_MEMORY_COST = env_int("ARGON2_MEMORY_COST", 65536)
+    ARGON2_PARALLELISM = env_int("ARGON2_PARALLELISM", 4)
+    HASH_WORKERS = env_int("HASH_WORKERS", 2)
+    # Hashing jobs running or waiting per worker before logins get 503; 0 = no limit
+    HASH_QUEUE_DEPTH = env_int("HASH_QUEUE_DEPTH", 8)
+
+    # Response compression, see compression.py
+    COMPRESS_ENABLED = env_bool("COMPRESS_ENABLED", True)
+    COMPRESS_MIN_SIZE = env_int("COMPRESS_MIN_SIZE", 1024)
+    COMPRESS_STREAM_MIN_SIZE = env_int("COMPRESS_STREAM_MIN_SIZE", 1024 * 1024)
+    COMPRESS_GZIP_LEVEL = env_int("COMPRESS_GZIP_LEVEL", 6)
+    COMPRESS_BROTLI_QUALITY = env_int("COMPRESS_BROTLI_QUALITY", 4)
+    COMPRESS_CACHE_SIZE = env_int("COMPRESS_CACHE_SIZE", 256)
+
+    # Request instrumentation, see instrumentation.py
+    INSTRUMENTATION_ENABLED = env_bool("INSTRUMENTATION_ENABLED", True)
+    SERVER_TIMING_HEADER = env_bool("SERVER_TIMING_HEADER", True)
+    N_PLUS_ONE_THRESHOLD = env_int("N_PLUS_ONE_THRESHOLD", 10)
+    # Prometheus metrics on /metrics, fed by the instrumentation, see metrics.py
+    METRICS_ENABLED = env_bool("METRICS_ENABLED", True)
+    # Bearer token for /metrics; without one only local requests may scrape
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    METRICS_GAUGE_SECONDS = env_int("METRICS_GAUGE_SECONDS", 5)
+
+    # ASGI entry point (asgi.py): async driver URL, derived from the sync URL when
+    # unset, and the threads serving the routes that stay on the Flask app
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+    ASGI_WSGI_THREADS = env_int("ASGI_WSGI_THREADS", 10)
+
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.getenv("DEV_DATABASE_URL") 
 
 class ProductionConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.getenv("PROD_DATABASE_URL") 
+    DB_POOL_SIZE = env_int("DB_POOL_SIZE", 10)
+    DB_MAX_OVERFLOW = env_int("DB_MAX_OVERFLOW", 20)
+    DB_POOL_WARMUP = env_int("DB_POOL_WARMUP", 4)
+    # Server-Timing shows query counts and timings to every client; opt in
+    SERVER_TIMING_HEADER = env_bool("SERVER_TIMING_HEADER", False)
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL", "sqlite://")
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "test-secret")
+    DB_POOL_WARMUP = 0
+    # Hash inline with cheap argon2 parameters
+    HASH_WORKERS = 0
+    # Progress is written when the buffer is full or flushed explicitly
+    PROGRESS_FLUSH_SECONDS = 0
+    ARGON2_TIME_COST = 1
+    ARGON2_MEMORY_COST = 8
+    ARGON2_PARALLELISM = 1
 
 
 config = {
     "development": DevelopmentConfig,
-    "production": ProductionConfig
-}
\ No newline at end of file
+    "production": ProductionConfig,
+    "testing": TestingConfig
+}
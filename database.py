@@ -1,9 +1,226 @@
+import datetime
+import sqlite3
+import threading
+import time
+
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import BigInteger, and_, event, exists, insert, literal, or_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import QueuePool
 
 db = SQLAlchemy()
 migrate = Migrate()
 
+
+class PoolStats:
+    """How long requests waited to check a connection out of the pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def record(self, wait_seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def as_dict(self):
+        return {
+            "checkouts": self.checkouts,
+            "wait_seconds": self.wait_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+            "timeouts": self.timeouts
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records the checkout wait of every connection in pool_stats."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_stats.record(time.perf_counter() - start)
+        return connection
+
+
+def engine_options(app):
+    """Pool settings from the config for server databases; SQLite keeps its defaults."""
+    if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return {}
+
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": app.config["DB_POOL_SIZE"],
+        "max_overflow": app.config["DB_MAX_OVERFLOW"],
+        "pool_timeout": app.config["DB_POOL_TIMEOUT"],
+        "pool_recycle": app.config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": app.config["DB_POOL_PRE_PING"]
+    }
+
+
 def init_db(app):
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {})
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {**engine_options(app), **app.config["SQLALCHEMY_ENGINE_OPTIONS"]}
     db.init_app(app)
     migrate.init_app(app, db)
+
+
+def warm_pool(app, connections=None):
+    """
+    Open connections up front so the first requests after a deploy or restart do
+    not pay the ODBC connect and TLS handshake. Called once per gunicorn worker.
+    """
+    connections = app.config.get("DB_POOL_WARMUP", 0) if connections is None else connections
+    with app.app_context():
+        opened = []
+        try:
+            for _ in range(connections):
+                connection = db.engine.connect()
+                connection.exec_driver_sql("SELECT 1")
+                opened.append(connection)
+        finally:
+            for connection in opened:
+                connection.close()
+    return len(opened)
+
+
+def pool_status():
+    """Current pool occupancy and checkout-wait statistics of this worker."""
+    pool = db.engine.pool
+    status = {"checked_out": pool.checkedout()} if hasattr(pool, "checkedout") else {}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), overflow=pool.overflow(), checked_in=pool.checkedin())
+    return {**status, **pool_stats.as_dict()}
+
+
+# SQL Server accepts at most 2100 parameters per statement, so large IN lists
+# have to be split up.
+MAX_IN_PARAMETERS = 1000
+
+
+def chunked(values, size=MAX_IN_PARAMETERS):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def existing_pairs(first_column, second_column, pairs):
+    """
+    Return the subset of (first, second) value pairs that have a row. The pairs
+    are grouped by their first value and looked up as OR-ed
+    "first = ? AND second IN (...)" conditions, as many per statement as fit in
+    MAX_IN_PARAMETERS, so the number of queries grows with the number of pairs
+    rather than with distinct firsts times distinct seconds.
+    """
+    seconds_by_first = {}
+    for first, second in set(pairs):
+        seconds_by_first.setdefault(first, []).append(second)
+
+    statements = [[]]
+    parameters = 0
+    for first, seconds in seconds_by_first.items():
+        for chunk in chunked(seconds, MAX_IN_PARAMETERS - 1):
+            if statements[-1] and parameters + 1 + len(chunk) > MAX_IN_PARAMETERS:
+                statements.append([])
+                parameters = 0
+            statements[-1].append(and_(first_column == first, second_column.in_(chunk)))
+            parameters += 1 + len(chunk)
+
+    existing = set()
+    for conditions in statements:
+        if conditions:
+            rows = db.session.execute(select(first_column, second_column).where(or_(*conditions)))
+            existing.update(map(tuple, rows))
+    return existing
+
+
+def insert_returning_ids(model, id_column, rows):
+    """
+    Insert rows in batches and return their identity values in the same order
+    as the given rows.
+    """
+    if not rows:
+        return []
+
+    return db.session.scalars(
+        insert(model).returning(id_column, sort_by_parameter_order=True),
+        rows
+    ).all()
+
+
+def insert_if_absent(model, values, unique_on, where=()):
+    """
+    Insert a row unless one with the same unique_on values already exists, as a
+    single INSERT ... SELECT ... WHERE NOT EXISTS statement instead of a read
+    followed by an insert. Extra where criteria (e.g. the parent row exists) are
+    checked in the same statement. Returns True when the row was created.
+
+    On SQL Server the existence check takes UPDLOCK, HOLDLOCK, so concurrent
+    requests for the same key serialize on a key-range lock and exactly one of
+    them inserts. SQLite serializes writers on the database lock.
+    """
+    columns = list(values)
+    already_exists = (
+        select(literal(1))
+        .select_from(model)
+        .where(*[getattr(model, column) == values[column] for column in unique_on])
+        .with_hint(model, "WITH (UPDLOCK, HOLDLOCK)", "mssql")
+    )
+    source = select(
+        *[literal(values[column], type_=getattr(model, column).type) for column in columns]
+    ).where(~exists(already_exists), *where)
+
+    result = db.session.execute(insert(model).from_select(columns, source))
+    return result.rowcount == 1
+
+
+# Local development, benchmarks and the test suite can run against SQLite.
+# The models are generated from SQL Server, so SQLite needs INTEGER identity
+# columns, the SQL Server collation and getdate().
+@compiles(BigInteger, "sqlite")
+def compile_big_integer_sqlite(type_, compiler, **kw):
+    return "INTEGER"
+
+
+def register_sqlite_shims(sqlite_connection):
+    sqlite_connection.create_collation(
+        "SQL_Latin1_General_CP1_CI_AS",
+        lambda a, b: (a.lower() > b.lower()) - (a.lower() < b.lower())
+    )
+    sqlite_connection.create_function(
+        "getdate", 0, lambda: datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+    )
+
+
+class SQLiteShimConnection(sqlite3.Connection):
+    """
+    sqlite3 connection with the shims registered as it opens. The async engine
+    passes it to aiosqlite as sqlite3's factory argument, so it is created on
+    aiosqlite's own thread without reaching into aiosqlite's internals.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        register_sqlite_shims(self)
+
+
+@event.listens_for(Engine, "connect")
+def register_sqlite_functions(dbapi_connection, connection_record):
+    if type(dbapi_connection).__module__.startswith("sqlite3"):
+        register_sqlite_shims(dbapi_connection)
@@ -0,0 +1,330 @@
+"""
+Live Jeopardy games.
+
+A game session is held in memory by the worker that created it: the answered
+cells as a bitset over row * columns + column, the team scores and whose turn
+it is. Every change is encoded once as a server-sent event and appended to a
+ring buffer, and the clients waiting on the session's Condition all send those
+same bytes, so a move costs one encode however many clients watch. A client
+that reconnects with Last-Event-ID gets the events it missed, or a fresh
+snapshot once they have left the buffer.
+
+When the host finishes a game the result is written by result_writer from a
+background thread, so the request does not wait on the database.
+
+Sessions are not shared between worker processes. Every session key starts
+with the tag of the worker that created it, so a request that reaches another
+worker is answered with 409 rather than a 404 for a game that does exist.
+Deployments run /jeopardy/session on its own gunicorn instance with the
+"games" profile (see gunicorn.conf.py): a single gevent worker that is never
+recycled, which holds every game and keeps thousands of event streams open
+without a thread each.
+"""
+import datetime
+import itertools
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import deque
+
+from serialization import dumps
+
+
+class GameSessionError(Exception):
+    """A move that does not fit the state of the game; answered with 409."""
+
+
+_worker_tag = (None, None)
+
+
+def worker_tag():
+    """A random tag for this process, new after a fork; it prefixes the session keys it creates."""
+    global _worker_tag
+    pid, tag = _worker_tag
+    if pid != os.getpid():
+        _worker_tag = pid, tag = os.getpid(), secrets.token_hex(4)
+    return tag
+
+
+def encode_event(seq, event, data):
+    return f"id: {seq}\nevent: {event}\ndata: ".encode("utf-8") + dumps(data) + b"\n\n"
+
+
+class GameSession:
+    def __init__(self, jeopardy_id, subjects, grid, teams, buffer_size=256):
+        self.key = f"{worker_tag()}-{secrets.token_hex(16)}"
+        self.host_token = secrets.token_urlsafe(24)
+        self.jeopardy_id = jeopardy_id
+        self.subjects = subjects
+        self.teams = teams
+        self.rows = len(grid)
+        self.columns = len(grid[0]) if grid else len(subjects)
+        self.cells = [cell for row in grid for cell in row]
+        # Positions without a cell count as answered from the start
+        self.missing = sum(1 << index for index, cell in enumerate(self.cells) if cell is None)
+        self.answered = self.missing
+        self.scores = [0] * len(teams)
+        self.turn = 0
+        self.open_cell = None
+        self.started = datetime.datetime.now()
+        self.finished = None
+        self.last_activity = time.monotonic()
+        self.seq = 0
+        self._events = deque(maxlen=buffer_size)
+        self._condition = threading.Condition()
+
+    def _index(self, row, column):
+        if not (0 <= row < self.rows and 0 <= column < self.columns):
+            raise GameSessionError(f"Cell ({row}, {column}) is not on the board")
+        return row * self.columns + column
+
+    def _is_answered(self, index):
+        return self.answered >> index & 1
+
+    def answered_count(self):
+        return (self.answered & ~self.missing).bit_count()
+
+    def _publish(self, event, data):
+        # Called with the condition held
+        self.seq += 1
+        self._events.append(encode_event(self.seq, event, data))
+        self.last_activity = time.monotonic()
+        self._condition.notify_all()
+
+    def _check_running(self):
+        if self.finished is not None:
+            raise GameSessionError("The game has finished")
+
+    def open(self, row, column):
+        """Show a cell's question to everyone."""
+        with self._condition:
+            self._check_running()
+            if self.open_cell is not None:
+                raise GameSessionError(f"Cell {self.open_cell} is still open")
+            index = self._index(row, column)
+            if self._is_answered(index):
+                raise GameSessionError(f"Cell ({row}, {column}) has already been played")
+
+            cell = self.cells[index]
+            self.open_cell = (row, column)
+            self._publish("open", {
+                "row": row,
+                "column": column,
+                "value": cell["value"],
+                "question": cell["question"]
+            })
+
+    def resolve(self, team, correct):
+        """
+        Close the open cell. A correct answer earns the team the cell's value
+        and the next pick, a wrong one costs the value and passes the turn on.
+        """
+        with self._condition:
+            self._check_running()
+            if self.open_cell is None:
+                raise GameSessionError("No cell is open")
+            if not 0 <= team < len(self.teams):
+                raise GameSessionError(f"Team {team} is not in the game")
+
+            row, column = self.open_cell
+            index = self._index(row, column)
+            cell = self.cells[index]
+            points = cell["value"] if correct else -cell["value"]
+            self.scores[team] += points
+            self.answered |= 1 << index
+            self.open_cell = None
+            self.turn = team if correct else (self.turn + 1) % len(self.teams)
+            self._publish("resolve", {
+                "row": row,
+                "column": column,
+                "answer": cell["answer"],
+                "team": team,
+                "points": points,
+                "score": self.scores[team],
+                "turn": self.turn
+            })
+
+    def finish(self):
+        """End the game and return its result for saving."""
+        with self._condition:
+            self._check_running()
+            self.finished = datetime.datetime.now()
+            self.open_cell = None
+            self._publish("finish", {"scores": self._scores()})
+            return {
+                "session_key": self.key,
+                "jeopardy_id": self.jeopardy_id,
+                "started": self.started,
+                "finished": self.finished,
+                "answered_cells": self.answered_count(),
+                "teams": list(zip(self.teams, self.scores))
+            }
+
+    def _scores(self):
+        return [{"team": name, "score": score} for name, score in zip(self.teams, self.scores)]
+
+    def _cell_state(self, index):
+        cell = self.cells[index]
+        if cell is None:
+            return None
+        if self._is_answered(index):
+            return {"value": cell["value"], "answered": True, "question": cell["question"], "answer": cell["answer"]}
+        return {"value": cell["value"], "answered": False}
+
+    def _state(self):
+        return {
+            "sessionId": self.key,
+            "jeopardyId": self.jeopardy_id,
+            "seq": self.seq,
+            "subjects": self.subjects,
+            "teams": self._scores(),
+            "turn": self.turn,
+            "openCell": self.open_cell,
+            "finished": self.finished,
+            "grid": [
+                [self._cell_state(row * self.columns + column) for column in range(self.columns)]
+                for row in range(self.rows)
+            ]
+        }
+
+    def state(self):
+        """The whole game as players see it: answers only for played cells."""
+        with self._condition:
+            return self._state()
+
+    def snapshot_event(self):
+        with self._condition:
+            return self.seq, encode_event(self.seq, "snapshot", self._state())
+
+    def wait_for_events(self, after, timeout):
+        """
+        Wait up to timeout seconds for events after seq number after and return
+        them encoded, [] on timeout, or None when they are no longer buffered
+        and the client needs a snapshot.
+        """
+        with self._condition:
+            if after == self.seq and self.finished is None:
+                self._condition.wait(timeout)
+            missed = self.seq - after
+            if missed < 0 or missed > len(self._events):
+                return None
+            return list(itertools.islice(self._events, len(self._events) - missed, None))
+
+
+def event_stream(session, last_event_id=None, heartbeat=15):
+    """The text/event-stream body for one client, ending after the game has finished."""
+    after = last_event_id
+    if after is None:
+        after, snapshot = session.snapshot_event()
+        yield snapshot
+
+    while session.finished is None or after < session.seq:
+        events = session.wait_for_events(after, heartbeat)
+        if events is None:
+            after, snapshot = session.snapshot_event()
+            yield snapshot
+        elif events:
+            after += len(events)
+            yield b"".join(events)
+        else:
+            # Keeps proxies from closing an idle connection
+            yield b": keep-alive\n\n"
+
+
+class GameSessionIndex:
+    """The games held by this worker; idle ones are dropped when a new game starts."""
+
+    def __init__(self):
+        self.buffer_size = 256
+        self.idle_seconds = 4 * 3600
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.buffer_size = app.config.get("GAME_SESSION_EVENT_BUFFER", 256)
+        self.idle_seconds = app.config.get("GAME_SESSION_IDLE_SECONDS", 4 * 3600)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._sessions = {}
+
+    def create(self, jeopardy_id, subjects, grid, teams):
+        session = GameSession(jeopardy_id, subjects, grid, teams, self.buffer_size)
+        now = time.monotonic()
+        with self._lock:
+            self._sessions = {
+                key: existing for key, existing in self._sessions.items()
+                if now - existing.last_activity < self.idle_seconds
+            }
+            self._sessions[session.key] = session
+        return session
+
+    def get(self, key):
+        with self._lock:
+            return self._sessions.get(key)
+
+    def held_elsewhere(self, key):
+        """Whether key was created by another worker, or by this one before a restart."""
+        return not key.startswith(f"{worker_tag()}-")
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class ResultWriter:
+    """
+    Runs write jobs one after another on a background thread with an app
+    context. The thread is started lazily, and again after a fork, so every
+    worker has its own.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread_pid != os.getpid():
+                self._queue = queue.Queue()
+                self._thread = None
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+                self._thread.start()
+                self._thread_pid = os.getpid()
+
+    def submit(self, job, *args):
+        self._ensure_thread()
+        self._queue.put((job, args))
+
+    def _run(self):
+        while True:
+            job, args = self._queue.get()
+            try:
+                with self.app.app_context():
+                    job(*args)
+            except Exception as e:
+                print(f"Error in background write {job.__name__}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def join(self):
+        """Wait until every submitted job has run."""
+        self._queue.join()
+
+
+game_sessions = GameSessionIndex()
+result_writer = ResultWriter()
+
+
+def init_game_sessions(app):
+    game_sessions.init_app(app)
+    result_writer.init_app(app)
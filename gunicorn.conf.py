@@ -0,0 +1,131 @@
+"""
+Gunicorn configuration, used with: gunicorn -c gunicorn.conf.py app:app
+
+GUNICORN_PROFILE picks the worker model, the other settings default from the
+CPU count and can be overridden through the environment:
+
+    sync     one request per worker process
+    gthread  GUNICORN_THREADS requests per worker process (default)
+    gevent   GUNICORN_WORKER_CONNECTIONS greenlets per worker process
+    games    one gevent worker that is never recycled, for /jeopardy/session
+
+Our requests mostly wait on SQL Server and the argon2 process pool, which the
+gthread workers overlap well. gevent only helps when the database driver
+yields to the event loop; pyodbc does not, so a query blocks every greenlet of
+its worker. See benchmarks/bench_gunicorn_profiles.py.
+
+Live Jeopardy games are the exception. They are held in the memory of one
+process (see game_sessions.py) and every player keeps an event stream open,
+so they run on a separate instance with the games profile behind the same
+proxy. Its requests wait on the games' Conditions rather than on the
+database, which is only queried when a game starts and when its result is
+written, so gevent's greenlets suit it even with pyodbc.
+"""
+import os
+
+if os.getenv("GUNICORN_PROFILE") in ("gevent", "games"):
+    # Patch before anything else is imported, preload_app would otherwise create
+    # the app's locks and sockets as the blocking ones
+    from gevent import monkey
+    monkey.patch_all()
+
+import multiprocessing
+import shutil
+
+from config import env_bool, env_int
+
+cpu_count = multiprocessing.cpu_count()
+
+PROFILES = {
+    "sync": {"worker_class": "sync", "workers": cpu_count * 2 + 1, "threads": 1},
+    "gthread": {"worker_class": "gthread", "workers": cpu_count + 1, "threads": 4},
+    "gevent": {"worker_class": "gevent", "workers": cpu_count + 1, "threads": 1},
+    # Every game lives in this one worker; recycling it would end them all
+    "games": {"worker_class": "gevent", "workers": 1, "threads": 1, "worker_connections": 2000, "max_requests": 0}
+}
+
+profile = os.getenv("GUNICORN_PROFILE", "gthread")
+if profile not in PROFILES:
+    raise ValueError(f"Invalid GUNICORN_PROFILE. Please set it to one of: {', '.join(PROFILES)}.")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:443")
+worker_class = PROFILES[profile]["worker_class"]
+workers = env_int("GUNICORN_WORKERS", PROFILES[profile]["workers"])
+threads = env_int("GUNICORN_THREADS", PROFILES[profile]["threads"])
+worker_connections = env_int("GUNICORN_WORKER_CONNECTIONS", PROFILES[profile].get("worker_connections", 100))
+
+# Import the app, build the models and the Swagger specs once in the master
+# and share them with the workers copy-on-write
+preload_app = env_bool("GUNICORN_PRELOAD", True)
+
+# Recycle workers now and then so slow leaks cannot build up, with jitter so
+# they do not all restart at once
+max_requests = env_int("GUNICORN_MAX_REQUESTS", PROFILES[profile].get("max_requests", 2000))
+max_requests_jitter = env_int("GUNICORN_MAX_REQUESTS_JITTER", 200)
+
+timeout = env_int("GUNICORN_TIMEOUT", 30)
+graceful_timeout = env_int("GUNICORN_GRACEFUL_TIMEOUT", 30)
+keepalive = env_int("GUNICORN_KEEPALIVE", 5)
+
+# Every process writes its metrics to PROMETHEUS_MULTIPROC_DIR (see metrics.py).
+# Start from an empty directory, values of a previous run would otherwise be
+# added to this one's. This has to happen here, before preload_app imports the app.
+metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if metrics_dir:
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def post_fork(server, worker):
+    # With preload_app the master already opened connections (create_app runs
+    # SELECT 1). A socket must never be shared between processes, so the
+    # worker drops the inherited pool, without closing the master's
+    # connections, and opens its own.
+    if not server.cfg.preload_app:
+        return
+
+    from database import db
+
+    with server.app.wsgi().app_context():
+        db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # Runs in each worker once the app is loaded: open DB_POOL_WARMUP connections
+    # before the worker accepts its first request. A database that is down must
+    # not keep the worker from booting; it starts with a cold pool and /ping
+    # reports the outage.
+    from sqlalchemy.exc import SQLAlchemyError
+
+    from database import warm_pool
+
+    try:
+        opened = warm_pool(worker.wsgi)
+    except SQLAlchemyError as e:
+        worker.log.warning("Could not warm up the database pool, starting cold: %s", e)
+        return
+    worker.log.info("Warmed up %s database connections", opened)
+
+
+def worker_exit(server, worker):
+    # Write the course element progress and the game results this worker has
+    # not written yet
+    from game_sessions import result_writer
+    from progress import progress_buffer
+
+    try:
+        if progress_buffer.app is not None:
+            progress_buffer.flush()
+    except Exception as e:
+        worker.log.error("Could not write buffered course element progress: %s", e)
+    finally:
+        result_writer.join()
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges (in-flight requests, pool, argon2
+    # queue); its counters stay part of the totals
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
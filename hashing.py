@@ -0,0 +1,161 @@
+import os
+import threading
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from argon2 import PasswordHasher, exceptions
+
+
+class HashingBusy(Exception):
+    """
+    Raised when the hashing queue is full, a job does not finish within
+    HASH_TIMEOUT or the pool has broken; the request should be answered with 503.
+    """
+
+
+# The hasher used by the job functions. Each pool process sets up its own through
+# _init_hasher; the main process has one for running jobs inline.
+_hasher = None
+
+
+def _init_hasher(params):
+    global _hasher
+    _hasher = PasswordHasher(**params)
+
+
+def _hash(password):
+    return _hasher.hash(password)
+
+
+def _verify(password_hash, password):
+    try:
+        return _hasher.verify(password_hash, password)
+    except (exceptions.VerificationError, exceptions.InvalidHashError):
+        return False
+
+
+class PasswordHashingPool:
+    """
+    Runs argon2 hashing and verification in a bounded process pool, so a burst
+    of logins cannot occupy every request worker. At most queue_depth jobs may be
+    running or waiting at once; beyond that HashingBusy is raised instead of
+    queueing more work. queue_depth=0 turns the limit off. With workers=0 the
+    jobs run inline in the calling thread (still bounded), which is what the
+    tests use.
+
+    A job keeps its slot until it has actually finished in the pool, also when
+    the request stopped waiting for it after timeout seconds, so the bound holds
+    for the work the pool really has.
+    """
+
+    def __init__(self):
+        self.params = {}
+        self.workers = 0
+        self.queue_depth = 8
+        self.timeout = 10
+        self._hasher = PasswordHasher()
+        self._slots = threading.BoundedSemaphore(self.queue_depth)
+        _init_hasher(self.params)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    def init_app(self, app):
+        self.params = {
+            "time_cost": app.config.get("ARGON2_TIME_COST", 3),
+            "memory_cost": app.config.get("ARGON2_MEMORY_COST", 65536),
+            "parallelism": app.config.get("ARGON2_PARALLELISM", 4)
+        }
+        self.workers = app.config.get("HASH_WORKERS", 2)
+        self.queue_depth = app.config.get("HASH_QUEUE_DEPTH", 8)
+        self.timeout = app.config.get("HASH_TIMEOUT", 10)
+        self._hasher = PasswordHasher(**self.params)
+        self._slots = threading.BoundedSemaphore(self.queue_depth) if self.queue_depth else None
+        self.shutdown()
+        if not self.workers:
+            _init_hasher(self.params)
+
+    def _get_executor(self):
+        # Created lazily, and again after a fork, so every gunicorn worker owns its pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_hasher,
+                initargs=(self.params,)
+            )
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _run(self, func, *args):
+        slots = self._slots
+        if slots is not None and not slots.acquire(blocking=False):
+            raise HashingBusy()
+
+        with self._pending_lock:
+            self._pending += 1
+
+        def done(future=None):
+            with self._pending_lock:
+                self._pending -= 1
+            if slots is not None:
+                slots.release()
+
+        if not self.workers:
+            try:
+                return func(*args)
+            finally:
+                done()
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(func, *args)
+        except BrokenProcessPool:
+            # A pool process died (e.g. OOM-killed); start a new pool next time
+            self._reset_executor(executor)
+            done()
+            raise HashingBusy()
+        future.add_done_callback(done)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except futures.TimeoutError:
+            raise HashingBusy()
+        except BrokenProcessPool:
+            self._reset_executor(executor)
+            raise HashingBusy()
+
+    def _reset_executor(self, executor):
+        if self._executor is executor:
+            self._executor = None
+            self._executor_pid = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def hash(self, password):
+        return self._run(_hash, password)
+
+    def verify(self, password_hash, password):
+        """Return True when the password matches, False otherwise (also for malformed hashes)."""
+        return self._run(_verify, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # Only parses the hash's parameters, cheap enough to run inline
+        return self._hasher.check_needs_rehash(password_hash)
+
+    def pending(self):
+        """Number of hashing jobs running or waiting in this worker."""
+        return self._pending
+
+    def shutdown(self):
+        if self._executor is not None and self._executor_pid == os.getpid():
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._executor_pid = None
+
+
+password_hasher = PasswordHashingPool()
+
+
+def init_hashing(app):
+    password_hasher.init_app(app)
@@ -0,0 +1,55 @@
+import datetime
+import hashlib
+
+from flask import Response, request
+from werkzeug.http import http_date, parse_date
+
+CACHE_CONTROL = "no-cache"
+
+# Compressed responses carry the ETag with the encoding appended (see
+# compression.py), they validate the same content version
+ETAG_ENCODINGS = ("gzip", "br")
+
+
+def make_etag(*parts):
+    """Build a strong ETag value from the parts that identify a content version."""
+    return hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def cache_headers(etag, last_modified=None):
+    """
+    Validator and Cache-Control headers for a response. last_modified may be a
+    datetime or an already formatted HTTP date (as kept in cached payloads).
+    """
+    headers = {"ETag": f'"{etag}"', "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(_as_utc(last_modified))
+    return headers
+
+
+def not_modified(etag, last_modified=None):
+    """
+    Return a 304 response when the request's validators match the current
+    version, otherwise None. If-None-Match takes precedence over If-Modified-Since.
+    """
+    if request.if_none_match:
+        matches = any(
+            request.if_none_match.contains(tag)
+            for tag in (etag, *(f"{etag}-{encoding}" for encoding in ETAG_ENCODINGS))
+        )
+    elif last_modified is not None and request.if_modified_since is not None:
+        matches = _as_utc(last_modified).replace(microsecond=0) <= request.if_modified_since
+    else:
+        matches = False
+
+    if not matches:
+        return None
+    return Response(status=304, headers=cache_headers(etag, last_modified))
+
+
+def _as_utc(value):
+    if isinstance(value, str):
+        return parse_date(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value
@@ -0,0 +1,209 @@
+"""
+Per-request performance instrumentation.
+
+Every request records its latency, the number of SQL statements and the time
+spent in them. The totals per endpoint are kept in
+request_metrics (per worker process) and passed on to its observers, and each
+response gets a Server-Timing header so the numbers show up in the browser's
+network tab. A statement that runs more than N_PLUS_ONE_THRESHOLD times in one
+request is logged as a likely N+1 query.
+
+Rows are not counted: cursor.rowcount is -1 for SELECTs under pyodbc, and
+buffering every ORM result to count it would load streamed results into
+memory.
+"""
+import bisect
+import threading
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestRecord:
+    """What one request did, kept in g while it runs."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = Counter()
+        self.n_plus_one = []
+
+
+class LatencyHistogram:
+    """Cumulative-friendly latency histogram with fixed bucket bounds in seconds."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of the observations."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class EndpointStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.statuses = Counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.n_plus_one = 0
+
+    def as_dict(self):
+        return {
+            "requests": self.latency.count,
+            "seconds": self.latency.sum,
+            "p50": self.latency.percentile(0.5),
+            "p95": self.latency.percentile(0.95),
+            "p99": self.latency.percentile(0.99),
+            "statuses": dict(self.statuses),
+            "queries": self.queries,
+            "db_seconds": self.db_seconds,
+            "n_plus_one": self.n_plus_one
+        }
+
+
+class RequestMetrics:
+    """Per-endpoint totals of this worker, plus observers that want every request."""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.in_flight = 0
+        self.observers = []
+        self._lock = threading.Lock()
+
+    def add_observer(self, observer):
+        """observer(route, method, status, seconds, record) is called after every request."""
+        self.observers.append(observer)
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def ended(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def finished(self, route, method, status, seconds, record):
+        with self._lock:
+            stats = self.endpoints.setdefault((method, route), EndpointStats())
+            stats.latency.observe(seconds)
+            stats.statuses[status] += 1
+            stats.queries += record.queries
+            stats.db_seconds += record.db_seconds
+            stats.n_plus_one += len(record.n_plus_one)
+
+        for observer in self.observers:
+            observer(route, method, status, seconds, record)
+
+    def snapshot(self):
+        with self._lock:
+            return {f"{method} {route}": stats.as_dict() for (method, route), stats in self.endpoints.items()}
+
+    def clear(self):
+        with self._lock:
+            self.endpoints.clear()
+
+
+request_metrics = RequestMetrics()
+
+
+def current_record():
+    if has_request_context():
+        return g.get("request_record")
+    return None
+
+
+def request_route():
+    # The URL rule rather than the path, so /course/1 and /course/2 share a series
+    return request.url_rule.rule if request.url_rule is not None else "unmatched"
+
+
+def start_request():
+    g.request_record = RequestRecord()
+    request_metrics.started()
+
+
+def finish_request(response):
+    record = g.get("request_record")
+    if record is None:
+        return response
+
+    seconds = time.perf_counter() - record.start
+    request_metrics.finished(request_route(), request.method, response.status_code, seconds, record)
+
+    if current_app.config["SERVER_TIMING_HEADER"]:
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={record.db_seconds * 1000:.1f};desc="{record.queries} queries", '
+            f'app;dur={seconds * 1000:.1f}'
+        )
+    return response
+
+
+def end_request(exception=None):
+    # Teardown runs even when after_request did not, keep in_flight honest
+    if g.pop("request_record", None) is not None:
+        request_metrics.ended()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query(conn, cursor, statement, parameters, context, executemany):
+    if current_record() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def finish_query(conn, cursor, statement, parameters, context, executemany):
+    record = current_record()
+    if record is None or not conn.info.get("query_start"):
+        return
+
+    record.db_seconds += time.perf_counter() - conn.info["query_start"].pop()
+    record.queries += 1
+    record.statements[statement] += 1
+
+    if record.statements[statement] == current_app.config["N_PLUS_ONE_THRESHOLD"] + 1:
+        record.n_plus_one.append(statement)
+        current_app.logger.warning(
+            "Possible N+1 in %s %s, statement ran more than %s times: %s",
+            request.method, request_route(), current_app.config["N_PLUS_ONE_THRESHOLD"], statement
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def discard_query(exception_context):
+    # after_cursor_execute does not run for a failed statement; drop its start
+    # time so it is not left on the connection for the next request
+    conn = exception_context.connection
+    if current_record() is not None and conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+
+def init_instrumentation(app):
+    if not app.config["INSTRUMENTATION_ENABLED"]:
+        return
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    app.teardown_request(end_request)
@@ -0,0 +1,208 @@
+import bisect
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class Leaderboard:
+    """
+    Scores kept in a list sorted by (-score, user_id), so top-N is a slice and a
+    user's rank is a binary search. Updating one user's score is a bisect removal
+    and insertion instead of re-sorting everything.
+    """
+
+    def __init__(self, scores=()):
+        self._scores = {}
+        self._ranked = []
+        self._lock = threading.Lock()
+        self.load(scores)
+
+    def load(self, scores):
+        """Replace the contents with (user_id, score) pairs."""
+        scores = {user_id: score for user_id, score in scores}
+        ranked = sorted((-score, user_id) for user_id, score in scores.items())
+        with self._lock:
+            self._scores = scores
+            self._ranked = ranked
+
+    def add(self, user_id, points):
+        with self._lock:
+            old_score = self._scores.get(user_id)
+            if old_score is not None:
+                del self._ranked[bisect.bisect_left(self._ranked, (-old_score, user_id))]
+            new_score = (old_score or 0) + points
+            self._scores[user_id] = new_score
+            bisect.insort(self._ranked, (-new_score, user_id))
+
+    def __len__(self):
+        return len(self._ranked)
+
+    def _rank_of_score(self, score):
+        # Competition ranking: users with equal scores share a rank
+        return bisect.bisect_left(self._ranked, (-score,)) + 1
+
+    def _entries(self, start, stop):
+        return [
+            {"rank": self._rank_of_score(-negative_score), "user_id": user_id, "total_xp": -negative_score}
+            for negative_score, user_id in self._ranked[max(start, 0):stop]
+        ]
+
+    def top(self, limit, offset=0):
+        with self._lock:
+            return self._entries(offset, offset + limit)
+
+    def rank(self, user_id):
+        """Return the user's entry, or None when the user has no score."""
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return None
+            return {"rank": self._rank_of_score(score), "user_id": user_id, "total_xp": score}
+
+    def around(self, user_id, radius):
+        """Return the user's entry with up to radius neighbours on each side."""
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return []
+            position = bisect.bisect_left(self._ranked, (-score, user_id))
+            return self._entries(position - radius, position + radius + 1)
+
+
+class BoardEntry:
+    """A board of the index and the state of its (re)build."""
+
+    def __init__(self):
+        self.board = None
+        self.built_at = 0.0
+        self.loading = False
+        # Awards recorded while the loader runs, applied to the new board
+        self.replay = None
+        self.build_lock = threading.Lock()
+        self.thread = None
+
+
+class LeaderboardIndex:
+    """
+    The global leaderboard and one leaderboard per course, held in memory by each
+    worker. Boards are built lazily with a loader query and rebuilt once they are
+    older than refresh_seconds, which bounds how stale XP awarded through another
+    worker can be. Awards handled by this worker are applied immediately.
+
+    Only the first load of a board runs in the request. A stale board keeps
+    being served while a background thread rebuilds it, and awards recorded
+    during a load are replayed onto the new board. An award that commits just
+    as the loader reads can be counted twice until the next rebuild. At most
+    max_boards course boards are kept, the least recently read ones are dropped.
+    """
+
+    def __init__(self, refresh_seconds=60, max_boards=256):
+        self.refresh_seconds = refresh_seconds
+        self.max_boards = max_boards
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get("LEADERBOARD_REFRESH_SECONDS", 60)
+        self.max_boards = app.config.get("LEADERBOARD_MAX_BOARDS", 256)
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._boards = OrderedDict()
+
+    def get(self, key, loader):
+        """Return the board for key (None for global, else a course id), building it with loader() if needed."""
+        with self._lock:
+            entry = self._boards.get(key)
+            if entry is None:
+                entry = self._boards[key] = BoardEntry()
+                self._evict()
+            else:
+                self._boards.move_to_end(key)
+
+            stale = (
+                entry.board is not None
+                and not entry.loading
+                and time.monotonic() - entry.built_at >= self.refresh_seconds
+            )
+            if stale:
+                entry.loading = True
+                entry.replay = []
+
+        if entry.board is None:
+            # One request per board runs the first load, the others wait for it
+            with entry.build_lock:
+                if entry.board is None:
+                    with self._lock:
+                        entry.replay = []
+                    try:
+                        scores = loader()
+                    except Exception:
+                        with self._lock:
+                            entry.replay = None
+                        raise
+                    self._install(entry, scores)
+            return entry.board
+
+        board = entry.board
+        if stale:
+            app = current_app._get_current_object()
+            entry.thread = threading.Thread(target=self._rebuild, args=(app, entry, loader), daemon=True)
+            entry.thread.start()
+        return board
+
+    def _evict(self):
+        # Called with the lock held; the global board is never dropped
+        while len(self._boards) > self.max_boards + 1:
+            del self._boards[next(key for key in self._boards if key is not None)]
+
+    def _install(self, entry, scores):
+        board = Leaderboard(scores)
+        with self._lock:
+            for user_id, points in entry.replay or ():
+                board.add(user_id, points)
+            entry.board = board
+            entry.built_at = time.monotonic()
+            entry.loading = False
+            entry.replay = None
+
+    def _rebuild(self, app, entry, loader):
+        try:
+            with app.app_context():
+                self._install(entry, loader())
+        except Exception as e:
+            print(f"Error rebuilding leaderboard: {e}")
+            with self._lock:
+                # Keep serving the old board, try again after refresh_seconds
+                entry.built_at = time.monotonic()
+                entry.loading = False
+                entry.replay = None
+
+    def record(self, user_id, course_id, points):
+        """Apply an XP award to the boards this worker has loaded or is loading."""
+        with self._lock:
+            for key in (None, course_id):
+                entry = self._boards.get(key)
+                if entry is None:
+                    continue
+                if entry.replay is not None:
+                    entry.replay.append((user_id, points))
+                if entry.board is not None:
+                    entry.board.add(user_id, points)
+
+    def join(self):
+        """Wait for the background rebuilds that are running."""
+        with self._lock:
+            threads = [entry.thread for entry in self._boards.values() if entry.thread is not None]
+        for thread in threads:
+            thread.join()
+
+
+leaderboards = LeaderboardIndex()
+
+
+def init_leaderboards(app):
+    leaderboards.init_app(app)
@@ -0,0 +1,125 @@
+"""
+Prometheus metrics, served by routes/metrics.py.
+
+Under gunicorn every worker process has its own counters. When
+PROMETHEUS_MULTIPROC_DIR is set (it must be before the app is imported), each
+worker writes its values to files in that directory and a scrape of /metrics,
+whichever worker answers it, aggregates all of them. gunicorn.conf.py clears
+the directory on start and marks exited workers as dead.
+
+The gauges describing a worker (pool, caches, queues, requests in flight) are
+refreshed when it answers a scrape, and otherwise at most every
+METRICS_GAUGE_SECONDS as it finishes requests, so the other workers' values
+stay current without a dozen gauge writes per request.
+"""
+import os
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+
+from cache import account_cache, course_cache, course_element_counts
+from compression import compressed_cache
+from database import pool_status
+from hashing import password_hasher
+from instrumentation import LATENCY_BUCKETS, request_metrics
+from progress import progress_buffer
+
+http_requests = Counter(
+    "http_requests_total", "Requests handled", ["method", "route", "status"]
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Request latency", ["method", "route"], buckets=LATENCY_BUCKETS
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "Requests being handled", multiprocess_mode="livesum"
+)
+db_queries = Counter(
+    "db_queries_total", "SQL statements executed by requests", ["method", "route"]
+)
+db_query_duration = Counter(
+    "db_query_duration_seconds_total", "Time requests spent in SQL statements", ["method", "route"]
+)
+n_plus_one_queries = Counter(
+    "db_n_plus_one_total", "Statements repeated more than N_PLUS_ONE_THRESHOLD times in a request", ["method", "route"]
+)
+
+db_pool_connections = Gauge(
+    "db_pool_connections", "Connections of the database pool by state", ["state"], multiprocess_mode="livesum"
+)
+db_pool_checkout_timeouts = Gauge(
+    "db_pool_checkout_timeouts", "Pool checkouts that timed out", multiprocess_mode="sum"
+)
+# Hits and misses only ever grow per worker; "sum" keeps the totals of
+# recycled workers so rate() stays meaningful
+cache_requests = Gauge(
+    "cache_requests", "Cache lookups by result", ["cache", "result"], multiprocess_mode="sum"
+)
+hashing_queue_depth = Gauge(
+    "argon2_queue_depth", "Password hashing jobs running or waiting", multiprocess_mode="livesum"
+)
+progress_buffer_pending = Gauge(
+    "progress_buffer_pending", "Course element completions waiting to be written", multiprocess_mode="livesum"
+)
+
+
+def multiprocess_dir():
+    return os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+
+_gauges_updated = 0.0
+gauge_seconds = 5
+
+
+def update_worker_gauges():
+    """Refresh the gauges that describe this worker's state."""
+    global _gauges_updated
+    _gauges_updated = time.monotonic()
+
+    http_requests_in_flight.set(request_metrics.in_flight)
+    status = pool_status()
+    for state in ("checked_out", "checked_in", "overflow", "size"):
+        if state in status:
+            db_pool_connections.labels(state).set(status[state])
+    db_pool_checkout_timeouts.set(status["timeouts"])
+
+    for name, stats in (
+        ("course", course_cache.stats()),
+        ("account", account_cache.stats()),
+        ("compressed", compressed_cache.stats()),
+        ("course_element_count", course_element_counts.stats())
+    ):
+        cache_requests.labels(name, "hit").set(stats["hits"])
+        cache_requests.labels(name, "miss").set(stats["misses"])
+
+    hashing_queue_depth.set(password_hasher.pending())
+    progress_buffer_pending.set(progress_buffer.pending())
+
+
+def observe_request(route, method, status, seconds, record):
+    http_requests.labels(method, route, status).inc()
+    http_request_duration.labels(method, route).observe(seconds)
+    db_queries.labels(method, route).inc(record.queries)
+    db_query_duration.labels(method, route).inc(record.db_seconds)
+    if record.n_plus_one:
+        n_plus_one_queries.labels(method, route).inc(len(record.n_plus_one))
+    if time.monotonic() - _gauges_updated >= gauge_seconds:
+        update_worker_gauges()
+
+
+def generate_metrics(path=None):
+    path = path or multiprocess_dir()
+    if path is None:
+        return generate_latest(REGISTRY)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=path)
+    return generate_latest(registry)
+
+
+def init_metrics(app):
+    global gauge_seconds
+    if not app.config["METRICS_ENABLED"]:
+        return
+    gauge_seconds = app.config["METRICS_GAUGE_SECONDS"]
+    if observe_request not in request_metrics.observers:
+        request_metrics.add_observer(observe_request)
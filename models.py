@@ -130,7 +130,8 @@ class JeopardyCells(Base):
     __tablename__ = 'JeopardyCells'
     __table_args__ = (
         ForeignKeyConstraint(['jeopardy_cell_jeopardy_id'], ['Jeopardy.jeopardy_id'], ondelete='CASCADE', name='FK__JeopardyC__jeopa__7B264821'),
-        PrimaryKeyConstraint('jeopardy_cell_id', name='PK__Jeopardy__FA902A9F3AFEA41E')
+        PrimaryKeyConstraint('jeopardy_cell_id', name='PK__Jeopardy__FA902A9F3AFEA41E'),
+        Index('IX_JeopardyCells_board_position', 'jeopardy_cell_jeopardy_id', 'RowNumber', 'ColumnNumber')
     )
 
     jeopardy_cell_id: Mapped[int] = mapped_column(Integer, Identity(start=1, increment=1), primary_key=True)
@@ -148,7 +149,8 @@ class Subjects(Base):
     __tablename__ = 'Subjects'
     __table_args__ = (
         ForeignKeyConstraint(['subject_jeopardy_id'], ['Jeopardy.jeopardy_id'], ondelete='CASCADE', name='FK__Subjects__subjec__7849DB76'),
-        PrimaryKeyConstraint('subject_Id', name='PK__Subjects__5007F248494E295F')
+        PrimaryKeyConstraint('subject_Id', name='PK__Subjects__5007F248494E295F'),
+        Index('IX_Subjects_jeopardy', 'subject_jeopardy_id', 'subject_Id')
     )
 
     subject_Id: Mapped[int] = mapped_column(Integer, Identity(start=1, increment=1), primary_key=True)
@@ -200,7 +202,8 @@ class UserXP(Base):
     __table_args__ = (
         ForeignKeyConstraint(['course_id'], ['Course.course_id'], name='FK__UserXP__course_i__5F492382'),
         ForeignKeyConstraint(['user_id'], ['Account.account_id'], name='FK__UserXP__user_id__5E54FF49'),
-        PrimaryKeyConstraint('id', name='PK__UserXP__3213E83F22B2CF1E')
+        PrimaryKeyConstraint('id', name='PK__UserXP__3213E83F22B2CF1E'),
+        Index('UQ_UserXP_user_course', 'user_id', 'course_id', unique=True)
     )
 
     id: Mapped[int] = mapped_column(Integer, Identity(start=1, increment=1), primary_key=True)
@@ -211,3 +214,58 @@ class UserXP(Base):
 
     course: Mapped['Course'] = relationship('Course', back_populates='UserXP')
     user: Mapped['Account'] = relationship('Account', back_populates='UserXP')
+
+
+class UserXPTotal(Base):
+    __tablename__ = 'UserXPTotal'
+    __table_args__ = (
+        ForeignKeyConstraint(['user_id'], ['Account.account_id'], ondelete='CASCADE', name='FK_UserXPTotal_Account'),
+        PrimaryKeyConstraint('user_id', name='PK_UserXPTotal')
+    )
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    total_xp: Mapped[int] = mapped_column(BigInteger, server_default=text('((0))'))
+    updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, server_default=text('(getdate())'))
+
+
+class JeopardySession(Base):
+    __tablename__ = 'JeopardySession'
+    __table_args__ = (
+        ForeignKeyConstraint(['jeopardy_id'], ['Jeopardy.jeopardy_id'], ondelete='CASCADE', name='FK_JeopardySession_Jeopardy'),
+        PrimaryKeyConstraint('jeopardy_session_id', name='PK_JeopardySession'),
+        Index('UQ_JeopardySession_session_key', 'session_key', unique=True)
+    )
+
+    jeopardy_session_id: Mapped[int] = mapped_column(Integer, Identity(start=1, increment=1), primary_key=True)
+    session_key: Mapped[str] = mapped_column(String(32, 'SQL_Latin1_General_CP1_CI_AS'))
+    jeopardy_id: Mapped[int] = mapped_column(Integer)
+    started: Mapped[datetime.datetime] = mapped_column(DateTime)
+    finished: Mapped[datetime.datetime] = mapped_column(DateTime)
+    answered_cells: Mapped[int] = mapped_column(Integer)
+
+
+class JeopardySessionTeam(Base):
+    __tablename__ = 'JeopardySessionTeam'
+    __table_args__ = (
+        ForeignKeyConstraint(['jeopardy_session_id'], ['JeopardySession.jeopardy_session_id'], ondelete='CASCADE', name='FK_JeopardySessionTeam_JeopardySession'),
+        PrimaryKeyConstraint('jeopardy_session_id', 'team_index', name='PK_JeopardySessionTeam')
+    )
+
+    jeopardy_session_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    team_index: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    team_name: Mapped[str] = mapped_column(Unicode(255, 'SQL_Latin1_General_CP1_CI_AS'))
+    score: Mapped[int] = mapped_column(Integer)
+
+
+class StudentCourseProgress(Base):
+    __tablename__ = 'StudentCourseProgress'
+    __table_args__ = (
+        ForeignKeyConstraint(['course_id'], ['Course.course_id'], ondelete='CASCADE', name='FK_StudentCourseProgress_Course'),
+        ForeignKeyConstraint(['student_id'], ['Account.account_id'], ondelete='CASCADE', name='FK_StudentCourseProgress_Account'),
+        PrimaryKeyConstraint('student_id', 'course_id', name='PK_StudentCourseProgress')
+    )
+
+    student_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    course_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    completed_elements: Mapped[int] = mapped_column(Integer, server_default=text('((0))'))
+    updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime, server_default=text('(getdate())'))
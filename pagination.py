@@ -0,0 +1,31 @@
+from flask_restx import inputs
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def add_page_arguments(parser):
+    """Add the keyset pagination query arguments to a flask-restx request parser."""
+    parser.add_argument('cursor', type=int, location='args',
+                        help='Return items after this id (the nextCursor of the previous page)')
+    parser.add_argument('limit', type=inputs.int_range(1, MAX_PAGE_SIZE), location='args',
+                        help=f'Page size, at most {MAX_PAGE_SIZE}')
+    return parser
+
+
+def paginate(statement, id_column, cursor, limit):
+    """
+    Apply keyset pagination on id_column. One extra row is fetched so that
+    split_page can tell whether there is a next page without a COUNT query.
+    """
+    if cursor is not None:
+        statement = statement.where(id_column > cursor)
+    return statement.order_by(id_column).limit(limit + 1)
+
+
+def split_page(rows, limit, get_id):
+    """Return the rows of the page and the cursor of the next page (None on the last page)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, get_id(rows[-1])
@@ -0,0 +1,287 @@
+"""
+Course element progress, written in batches.
+
+Students report completed course elements far more often than anyone reads
+them, so POST /course/enrollment/progress only adds the events to
+progress_buffer. The buffer keeps one entry per (student, element), holding
+the first time it was reported, and writes them out every
+PROGRESS_FLUSH_SECONDS, or as soon as PROGRESS_FLUSH_SIZE entries are
+waiting, with one existence query and one bulk INSERT per flush instead of a
+transaction per click. With PROGRESS_FLUSH_SECONDS = 0 there is no flush
+thread and the buffer is written when it is full or flush() is called.
+
+Progress is therefore visible to reads up to PROGRESS_FLUSH_SECONDS late.
+gunicorn.conf.py flushes the buffer when a worker exits. While the database
+cannot be written the entries stay buffered, up to 10 * PROGRESS_FLUSH_SIZE;
+beyond that add() raises ProgressBufferFull and the request gets a 503.
+
+Every flush also adds the new rows to the StudentCourseProgress counters in
+the same transaction. Compared with the cached number of elements of the
+course, they answer course completion without counting StudentCourseElement.
+"""
+import datetime
+import os
+import threading
+from collections import Counter
+
+from sqlalchemy import and_, bindparam, delete, exists, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from cache import course_element_counts
+from database import chunked, db, existing_pairs
+from models import CourseElement, StudentCourse, StudentCourseElement, StudentCourseProgress
+
+progress_table = StudentCourseProgress.__table__
+
+# Executed as one executemany with a row per (student, course)
+increment_progress = (
+    update(progress_table)
+    .where(
+        progress_table.c.student_id == bindparam("b_student_id"),
+        progress_table.c.course_id == bindparam("b_course_id")
+    )
+    .values(
+        completed_elements=progress_table.c.completed_elements + bindparam("b_added"),
+        updated_at=func.current_timestamp()
+    )
+)
+
+
+def course_element_count(course_id):
+    count = course_element_counts.get(course_id)
+    if count is None:
+        count = db.session.scalar(
+            select(func.count()).select_from(CourseElement).where(CourseElement.course_id == course_id)
+        )
+        course_element_counts.set(course_id, count)
+    return count
+
+
+def add_to_progress_counters(added):
+    """
+    Add {(student_id, course_id): new completed elements} to the
+    StudentCourseProgress counters. Must run in the same transaction as the
+    StudentCourseElement inserts so the two never disagree.
+    """
+    existing = existing_pairs(StudentCourseProgress.student_id, StudentCourseProgress.course_id, added)
+    missing = [
+        {"student_id": student_id, "course_id": course_id, "completed_elements": count}
+        for (student_id, course_id), count in added.items() if (student_id, course_id) not in existing
+    ]
+    increments = [
+        {"b_student_id": student_id, "b_course_id": course_id, "b_added": count}
+        for (student_id, course_id), count in added.items() if (student_id, course_id) in existing
+    ]
+
+    if missing:
+        db.session.execute(insert(StudentCourseProgress), missing)
+    if increments:
+        db.session.connection().execute(increment_progress, increments)
+
+
+def reconcile_progress_counters():
+    """
+    Recount every student's completed elements per course and repair the
+    StudentCourseProgress rows that drifted, e.g. after course elements were
+    deleted. Set-based: one statement each deletes, updates and inserts the
+    counters, recounting in the same statement, rather than writing back
+    counts read earlier over increments flushed in the meantime. Returns the
+    number of (inserted, updated, deleted) rows.
+    """
+    actual = (
+        select(StudentCourseElement.student_id, CourseElement.course_id, func.count().label("completed_elements"))
+        .join(CourseElement, CourseElement.course_element_id == StudentCourseElement.course_element_id)
+        .group_by(StudentCourseElement.student_id, CourseElement.course_id)
+        .subquery()
+    )
+    counter_matches = and_(
+        progress_table.c.student_id == actual.c.student_id,
+        progress_table.c.course_id == actual.c.course_id
+    )
+
+    deleted = db.session.execute(
+        delete(progress_table).where(~exists().where(
+            StudentCourseElement.student_id == progress_table.c.student_id,
+            CourseElement.course_element_id == StudentCourseElement.course_element_id,
+            CourseElement.course_id == progress_table.c.course_id
+        ))
+    ).rowcount
+    # UPDATE ... FROM the recount
+    updated = db.session.execute(
+        update(progress_table)
+        .where(counter_matches, progress_table.c.completed_elements != actual.c.completed_elements)
+        .values(completed_elements=actual.c.completed_elements, updated_at=func.current_timestamp())
+    ).rowcount
+    inserted = db.session.execute(
+        insert(progress_table).from_select(
+            ["student_id", "course_id", "completed_elements"],
+            select(actual.c.student_id, actual.c.course_id, actual.c.completed_elements)
+            .where(~exists().where(counter_matches))
+        )
+    ).rowcount
+    db.session.commit()
+
+    return inserted, updated, deleted
+
+
+def save_element_progress(entries):
+    """
+    Insert the StudentCourseElement rows of entries, {(student_id,
+    course_element_id): completed_at}, that do not exist yet. Elements that no
+    longer exist or whose course the student is not enrolled in are dropped.
+    Returns the (student_id, course_element_id) pairs that were inserted.
+    """
+    course_by_element = {}
+    for chunk in chunked({element_id for _, element_id in entries}):
+        course_by_element.update(db.session.execute(
+            select(CourseElement.course_element_id, CourseElement.course_id)
+            .where(CourseElement.course_element_id.in_(chunk))
+        ).all())
+
+    enrolled = existing_pairs(StudentCourse.student_id, StudentCourse.course_id, {
+        (student_id, course_by_element[element_id])
+        for student_id, element_id in entries if element_id in course_by_element
+    })
+    candidates = [
+        (student_id, element_id) for student_id, element_id in entries
+        if (student_id, course_by_element.get(element_id)) in enrolled
+    ]
+
+    # Another worker can flush the same pair between our read and insert; the
+    # unique index UQ__StudentC__DD0A1290ABB1EDA1 (or the counter's primary
+    # key) rejects it and we re-read once.
+    for attempt in range(2):
+        existing = existing_pairs(StudentCourseElement.student_id, StudentCourseElement.course_element_id, candidates)
+        new_pairs = [pair for pair in candidates if pair not in existing]
+        try:
+            insert_progress(new_pairs, entries, course_by_element)
+            db.session.commit()
+            return new_pairs
+        except IntegrityError:
+            db.session.rollback()
+
+    # Rejected again: write the pairs one at a time and drop those that still
+    # fail, so a single bad row cannot keep the whole batch in the buffer
+    inserted = []
+    for pair in new_pairs:
+        try:
+            insert_progress([pair], entries, course_by_element)
+            db.session.commit()
+            inserted.append(pair)
+        except IntegrityError as e:
+            db.session.rollback()
+            print(f"Dropping course element progress {pair}: {e}")
+    return inserted
+
+
+def insert_progress(pairs, entries, course_by_element):
+    if not pairs:
+        return
+    db.session.execute(insert(StudentCourseElement), [
+        {"student_id": student_id, "course_element_id": element_id, "completed_at": entries[(student_id, element_id)]}
+        for student_id, element_id in pairs
+    ])
+    add_to_progress_counters(Counter(
+        (student_id, course_by_element[element_id]) for student_id, element_id in pairs
+    ))
+
+
+class ProgressBufferFull(Exception):
+    """Raised when too many completions are waiting to be written; the request should be answered with 503."""
+
+
+class ProgressBuffer:
+    """Per-worker buffer of element completions, see the module docstring."""
+
+    def __init__(self):
+        self.app = None
+        self.flush_size = 500
+        self.flush_seconds = 2
+        self.max_pending = 5000
+        self.written = 0
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_size = app.config.get("PROGRESS_FLUSH_SIZE", 500)
+        self.flush_seconds = app.config.get("PROGRESS_FLUSH_SECONDS", 2)
+        self.max_pending = 10 * self.flush_size
+        with self._lock:
+            self._pending = {}
+
+    def _ensure_thread(self):
+        # Started lazily, and again after a fork, so every worker flushes its own buffer
+        with self._lock:
+            if self._thread_pid != os.getpid() or not self._thread.is_alive():
+                self._wake = threading.Event()
+                self._thread = threading.Thread(target=self._run, name="progress-flush", daemon=True)
+                self._thread.start()
+                self._thread_pid = os.getpid()
+
+    def add(self, student_id, course_element_ids):
+        completed_at = datetime.datetime.now()
+        with self._lock:
+            # Counted before adding, so one large batch cannot overshoot the cap
+            if len(self._pending) + len(course_element_ids) > self.max_pending:
+                raise ProgressBufferFull()
+            for element_id in course_element_ids:
+                self._pending.setdefault((student_id, element_id), completed_at)
+            full = len(self._pending) >= self.flush_size
+
+        if self.flush_seconds:
+            self._ensure_thread()
+            if full:
+                self._wake.set()
+        elif full:
+            self.flush()
+
+    def pending(self):
+        return len(self._pending)
+
+    def flush(self, student_id=None):
+        """
+        Write everything buffered so far, or only one student's entries.
+        Returns the number of rows inserted.
+        """
+        with self._lock:
+            if student_id is None:
+                entries, self._pending = self._pending, {}
+            else:
+                entries = {pair: completed_at for pair, completed_at in self._pending.items() if pair[0] == student_id}
+                for pair in entries:
+                    del self._pending[pair]
+        if not entries:
+            return 0
+
+        try:
+            with self.app.app_context():
+                inserted = save_element_progress(entries)
+        except Exception:
+            # Keep the entries for the next flush; the first report of a pair wins
+            with self._lock:
+                self._pending = {**self._pending, **entries}
+            raise
+
+        self.written += len(inserted)
+        return len(inserted)
+
+    def _run(self):
+        # Stops once the flush interval is turned off
+        while self.flush_seconds:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error writing course element progress: {e}")
+
+
+progress_buffer = ProgressBuffer()
+
+
+def init_progress(app):
+    progress_buffer.init_app(app)
@@ -1,10 +1,13 @@
 from flask import app, current_app
-from flask_restx import Namespace, Resource
+from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import jsonify
-from sqlalchemy.exc import SQLAlchemyError
-from database import db
-from models import Course, StudentCourse
+from sqlalchemy import and_, case, delete, exists, func, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from database import chunked, db, existing_pairs, insert_if_absent
+from models import Account, Course, CourseElement, StudentCourse, StudentCourseElement, StudentCourseProgress
+from pagination import DEFAULT_PAGE_SIZE, add_page_arguments, paginate, split_page
+from progress import ProgressBufferFull, course_element_count, progress_buffer
 
 api = Namespace('course_enrollment', description='Course Enrollment operations')
 
@@ -12,12 +15,242 @@ def get_user_id():
     student_identity = get_jwt_identity()
     return student_identity["id"] if isinstance(student_identity, dict) else student_identity
 
+def get_user_role():
+    student_identity = get_jwt_identity()
+    return student_identity.get("role_id") if isinstance(student_identity, dict) else None
+
 def get_course(course_id):
     return db.session.query(Course).filter_by(course_id=course_id).first()
 
 def get_enrollment(student_id, course_id):
     return db.session.query(StudentCourse).filter_by(student_id=student_id, course_id=course_id).first()
 
+def enrolled_courses_query(student_id):
+    """
+    All courses left joined with the student's enrollment, so the enrolled flag,
+    completion and enrollment date are computed by the database in one query.
+    """
+    return (
+        select(
+            Course.course_id,
+            Course.course_title,
+            Course.course_description,
+            case((StudentCourse.student_course_id.is_not(None), True), else_=False).label("enrolled"),
+            StudentCourse.completed,
+            StudentCourse.enrolled_at
+        )
+        .outerjoin(StudentCourse, and_(
+            StudentCourse.course_id == Course.course_id,
+            StudentCourse.student_id == student_id
+        ))
+    )
+
+def serialize_enrolled_course(row):
+    return {
+        "id": row.course_id,
+        "courseTitle": row.course_title,
+        "courseDescription": row.course_description,
+        "enrolled": bool(row.enrolled),
+        "completed": bool(row.completed),
+        "enrolledAt": row.enrolled_at
+    }
+
+enrolled_courses_parser = add_page_arguments(api.parser())
+
+ADMIN_ROLE_ID = 2
+MAX_BATCH_SIZE = 5000
+
+enrollment_item_model = api.model('EnrollmentItem', {
+    'student_id': fields.Integer(required=True, description='The student to enroll'),
+    'course_id': fields.Integer(required=True, description='The course to enroll the student in')
+})
+
+enrollment_batch_model = api.model('EnrollmentBatch', {
+    'items': fields.List(fields.Nested(enrollment_item_model), description='(student_id, course_id) pairs, admins only for other students'),
+    'course_ids': fields.List(fields.Integer, description='Courses to enroll the current user in')
+})
+
+def parse_enrollment_batch(data, user_id, role_id):
+    """
+    Turn a batch payload into a de-duplicated list of (student_id, course_id)
+    pairs. Returns (pairs, error_response).
+    """
+    data = data or {}
+    items = data.get('items') or []
+    course_ids = data.get('course_ids') or []
+    if not isinstance(items, list) or not isinstance(course_ids, list):
+        return None, ({"error": "items and course_ids must be lists"}, 400)
+
+    try:
+        pairs = [(int(item['student_id']), int(item['course_id'])) for item in items]
+        pairs += [(user_id, int(course_id)) for course_id in course_ids]
+    except (KeyError, TypeError, ValueError):
+        return None, ({"error": "Every item needs an integer student_id and course_id"}, 400)
+
+    if not pairs:
+        return None, ({"error": "No enrollments given"}, 400)
+    if len(pairs) > MAX_BATCH_SIZE:
+        return None, ({"error": f"At most {MAX_BATCH_SIZE} enrollments per batch"}, 400)
+    if role_id != ADMIN_ROLE_ID and any(student_id != user_id for student_id, _ in pairs):
+        return None, ({"error": "Only admins can enroll other students"}, 403)
+
+    return list(dict.fromkeys(pairs)), None
+
+def get_existing_course_ids(course_ids):
+    existing = set()
+    for chunk in chunked(set(course_ids)):
+        existing.update(db.session.scalars(select(Course.course_id).where(Course.course_id.in_(chunk))))
+    return existing
+
+def get_existing_student_ids(student_ids):
+    existing = set()
+    for chunk in chunked(set(student_ids)):
+        existing.update(db.session.scalars(select(Account.account_id).where(Account.account_id.in_(chunk))))
+    return existing
+
+def get_existing_enrollments(pairs):
+    """Return the subset of (student_id, course_id) pairs that already have a StudentCourse row."""
+    return existing_pairs(StudentCourse.student_id, StudentCourse.course_id, pairs)
+
+def enroll_batch(pairs):
+    """
+    Enroll every pair whose student and course exist and that is not enrolled
+    yet, using chunked existence queries and a single bulk INSERT. Returns the
+    per-item status.
+    """
+    student_ids = get_existing_student_ids(student_id for student_id, _ in pairs)
+    course_ids = get_existing_course_ids(course_id for _, course_id in pairs)
+    candidates = [pair for pair in pairs if pair[0] in student_ids and pair[1] in course_ids]
+
+    # A concurrent request can enroll the same pair between our read and insert;
+    # the unique index UQ__StudentC__D2C2E9E178CDEDF0 rejects it and we re-read once.
+    for attempt in range(2):
+        existing = get_existing_enrollments(candidates)
+        new_pairs = [pair for pair in candidates if pair not in existing]
+        try:
+            if new_pairs:
+                db.session.execute(insert(StudentCourse), [
+                    {"student_id": student_id, "course_id": course_id} for student_id, course_id in new_pairs
+                ])
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                raise
+
+    new_pairs = set(new_pairs)
+    return [
+        {
+            "student_id": student_id,
+            "course_id": course_id,
+            "status": "enrolled" if (student_id, course_id) in new_pairs
+            else "student_not_found" if student_id not in student_ids
+            else "course_not_found" if course_id not in course_ids
+            else "already_enrolled"
+        }
+        for student_id, course_id in pairs
+    ]
+
+def unenroll_batch(pairs):
+    """Delete the given enrollments with one DELETE per student. Returns the per-item status."""
+    existing = get_existing_enrollments(pairs)
+
+    course_ids_by_student = {}
+    for student_id, course_id in existing:
+        course_ids_by_student.setdefault(student_id, []).append(course_id)
+
+    for student_id, course_ids in course_ids_by_student.items():
+        for chunk in chunked(course_ids):
+            db.session.execute(
+                delete(StudentCourse)
+                .where(StudentCourse.student_id == student_id, StudentCourse.course_id.in_(chunk))
+            )
+    db.session.commit()
+
+    return [
+        {
+            "student_id": student_id,
+            "course_id": course_id,
+            "status": "unenrolled" if (student_id, course_id) in existing else "not_enrolled"
+        }
+        for student_id, course_id in pairs
+    ]
+
+progress_model = api.model('ElementProgress', {
+    'course_element_ids': fields.List(fields.Integer, required=True, description='Course elements the current user has completed')
+})
+
+def parse_progress(data):
+    """Return the de-duplicated course element ids of a progress payload and an error response."""
+    element_ids = (data or {}).get('course_element_ids')
+    if not isinstance(element_ids, list) or not element_ids:
+        return None, ({"error": "course_element_ids must be a non-empty list"}, 400)
+    if len(element_ids) > MAX_BATCH_SIZE:
+        return None, ({"error": f"At most {MAX_BATCH_SIZE} elements per batch"}, 400)
+    if not all(isinstance(element_id, int) and not isinstance(element_id, bool) for element_id in element_ids):
+        return None, ({"error": "course_element_ids must be integers"}, 400)
+    return list(dict.fromkeys(element_ids)), None
+
+def progress_counts_query(student_id):
+    """Completed elements per course of a student, counted by the database."""
+    return (
+        select(CourseElement.course_id, func.count().label("completed_elements"))
+        .join(StudentCourseElement, StudentCourseElement.course_element_id == CourseElement.course_element_id)
+        .where(StudentCourseElement.student_id == student_id)
+        .group_by(CourseElement.course_id)
+        .order_by(CourseElement.course_id)
+    )
+
+def completed_elements_query(student_id, course_id):
+    return (
+        select(StudentCourseElement.course_element_id, StudentCourseElement.completed_at)
+        .join(CourseElement, CourseElement.course_element_id == StudentCourseElement.course_element_id)
+        .where(StudentCourseElement.student_id == student_id, CourseElement.course_id == course_id)
+        .order_by(StudentCourseElement.course_element_id)
+    )
+
+def completion_query(student_id, course_id):
+    """The enrollment together with its progress counter, one primary key lookup each."""
+    return (
+        select(
+            StudentCourse.student_course_id,
+            StudentCourse.completed,
+            func.coalesce(StudentCourseProgress.completed_elements, 0).label("completed_elements")
+        )
+        .outerjoin(StudentCourseProgress, and_(
+            StudentCourseProgress.student_id == StudentCourse.student_id,
+            StudentCourseProgress.course_id == StudentCourse.course_id
+        ))
+        .where(StudentCourse.student_id == student_id, StudentCourse.course_id == course_id)
+    )
+
+def serialize_completion(completed, completed_elements, total_elements):
+    if total_elements:
+        percentage = min(100, completed_elements * 100 // total_elements)
+    else:
+        percentage = 100 if completed else 0
+    return {
+        "completed": bool(completed),
+        "completedElements": completed_elements,
+        "totalElements": total_elements,
+        "percentage": percentage
+    }
+
+def mark_completed(student_course_id):
+    db.session.execute(
+        update(StudentCourse)
+        .where(StudentCourse.student_course_id == student_course_id)
+        .values(completed=True)
+    )
+    db.session.commit()
+
+def summarize(results):
+    summary = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    return summary
+
 @api.route('/<int:course_id>')
 class CourseEnrollment(Resource):
     @jwt_required()
@@ -27,19 +260,26 @@ class CourseEnrollment(Resource):
         """
         try:
             student_id = get_user_id()
-            course = get_course(course_id)
+            created = insert_if_absent(
+                StudentCourse,
+                {"student_id": student_id, "course_id": course_id},
+                unique_on=("student_id", "course_id"),
+                where=[exists(select(Course.course_id).where(Course.course_id == course_id))]
+            )
+            db.session.commit()
 
-            if not course:
-                return {"error": "Course not found"}, 404
+            if created:
+                return {"message": "Enrollment successful"}, 201
 
-            if get_enrollment(student_id, course_id):
-                return {"message": "Already enrolled"}, 200
+            if not get_course(course_id):
+                return {"error": "Course not found"}, 404
 
-            new_enrollment = StudentCourse(student_id=student_id, course_id=course_id)
-            db.session.add(new_enrollment)
-            db.session.commit()
+            return {"message": "Already enrolled"}, 200
 
-            return {"message": "Enrollment successful"}, 201
+        except IntegrityError:
+            # The unique index caught a concurrent enrollment of the same pair
+            db.session.rollback()
+            return {"message": "Already enrolled"}, 200
 
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -80,7 +320,7 @@ class CourseEnrollment(Resource):
 
             return {
                 "status": "Enrolled",
-                "enrolled_at": enrollment.enrolled_at.strftime('%Y-%m-%d %H:%M:%S') if enrollment.enrolled_at else None
+                "enrolled_at": enrollment.enrolled_at
             }, 200
 
         except SQLAlchemyError as e:
@@ -96,15 +336,29 @@ class CourseCompletion(Resource):
         """
         user_id = get_user_id()
         try:
-            enrollment = db.session.query(StudentCourse).filter_by(
-                course_id=course_id, student_id=user_id
-            ).first()
+            # Write the student's progress buffered in this worker first, it may
+            # hold the last elements. If that fails the counter decides.
+            progress_buffer.flush(user_id)
+        except Exception as e:
+            print(f"Error writing course element progress: {e}")
+
+        try:
+            enrollment = db.session.execute(completion_query(user_id, course_id)).first()
 
             if not enrollment:
                 return {"error": "Enrollment not found"}, 404
 
-            enrollment.completed = True
-            db.session.commit()
+            total_elements = course_element_count(course_id)
+            if enrollment.completed_elements < total_elements:
+                # Progress reported to another worker is written within
+                # PROGRESS_FLUSH_SECONDS, a retry after that sees it
+                return {
+                    "error": "Not every element of the course has been completed",
+                    **serialize_completion(False, enrollment.completed_elements, total_elements)
+                }, 409, {"Retry-After": str(max(1, current_app.config["PROGRESS_FLUSH_SECONDS"]))}
+
+            if not enrollment.completed:
+                mark_completed(enrollment.student_course_id)
 
             return {"message": "Kursus gennemført"}, 200
 
@@ -123,49 +377,167 @@ class CourseCompletionStatus(Resource):
         """
         user_id = get_user_id()
         try:
-            enrollment = db.session.query(StudentCourse).filter_by(
-                course_id=course_id, student_id=user_id
-            ).first()
+            enrollment = db.session.execute(completion_query(user_id, course_id)).first()
 
             if not enrollment:
                 print(f"No enrollment found for course_id={course_id}, user_id={user_id}")
                 return {"completed": False, "message": "Not enrolled in the course"}, 404
 
-            completed = getattr(enrollment, "completed", False)
-            return {"completed": completed}, 200
+            total_elements = course_element_count(course_id)
+            completed = enrollment.completed
+            if not completed and total_elements and enrollment.completed_elements >= total_elements:
+                # Every element is done, complete the course without waiting for the client
+                mark_completed(enrollment.student_course_id)
+                completed = True
+
+            return serialize_completion(completed, enrollment.completed_elements, total_elements), 200
 
         except SQLAlchemyError as e:
+            db.session.rollback()
             print(f"Database error while checking course completion status: {e}")
             return {"error": "An error occurred while checking course completion status"}, 500
 
 
 
+@api.route('/batch')
+class CourseEnrollmentBatch(Resource):
+    @jwt_required()
+    @api.expect(enrollment_batch_model)
+    @api.response(200, 'Per-item enrollment results.')
+    @api.response(400, 'Invalid batch.')
+    @api.response(403, 'Only admins can enroll other students.')
+    def post(self):
+        """
+        Tilmeld mange (studerende, kursus)-par på én gang.
+        """
+        pairs, error = parse_enrollment_batch(api.payload, get_user_id(), get_user_role())
+        if error:
+            return error
+
+        try:
+            results = enroll_batch(pairs)
+            return {"results": results, "summary": summarize(results)}, 200
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"Error enrolling batch: {e}")
+            return {"error": "An error occurred while enrolling the batch"}, 500
+
+    @jwt_required()
+    @api.expect(enrollment_batch_model)
+    @api.response(200, 'Per-item unenrollment results.')
+    @api.response(400, 'Invalid batch.')
+    @api.response(403, 'Only admins can unenroll other students.')
+    def delete(self):
+        """
+        Afmeld mange (studerende, kursus)-par på én gang.
+        """
+        pairs, error = parse_enrollment_batch(api.payload, get_user_id(), get_user_role())
+        if error:
+            return error
+
+        try:
+            results = unenroll_batch(pairs)
+            return {"results": results, "summary": summarize(results)}, 200
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"Error unenrolling batch: {e}")
+            return {"error": "An error occurred while unenrolling the batch"}, 500
+
+
+@api.route('/progress')
+class CourseProgress(Resource):
+    @jwt_required()
+    @api.expect(progress_model)
+    @api.response(202, 'Progress accepted, written within PROGRESS_FLUSH_SECONDS.')
+    @api.response(400, 'Invalid batch.')
+    @api.response(503, 'Too much progress waiting to be written, retry later.')
+    def post(self):
+        """
+        Registrer gennemførte kursuselementer for den aktuelle bruger.
+        """
+        element_ids, error = parse_progress(api.payload)
+        if error:
+            return error
+
+        try:
+            progress_buffer.add(get_user_id(), element_ids)
+            return {"message": "Progress accepted", "accepted": len(element_ids)}, 202
+
+        except ProgressBufferFull:
+            return {"error": "Too much progress is waiting to be saved, try again shortly"}, 503, {"Retry-After": "1"}
+
+        except SQLAlchemyError as e:
+            # Only a full buffer without a flush thread writes in the request
+            print(f"Error writing course element progress: {e}")
+            return {"error": "An error occurred while saving progress"}, 500
+
+    @jwt_required()
+    def get(self):
+        """
+        Hent antal gennemførte elementer pr. kursus for den aktuelle bruger.
+        """
+        try:
+            rows = db.session.execute(progress_counts_query(get_user_id())).all()
+            return {
+                "courses": [
+                    {"course_id": row.course_id, "completed_elements": row.completed_elements} for row in rows
+                ]
+            }, 200
+
+        except SQLAlchemyError as e:
+            print(f"Database error: {e}")
+            return {"error": "An error occurred while fetching progress"}, 500
+
+
+@api.route('/<int:course_id>/progress')
+class CourseElementProgress(Resource):
+    @jwt_required()
+    def get(self, course_id):
+        """
+        Hent de gennemførte elementer i et kursus for den aktuelle bruger.
+        """
+        try:
+            rows = db.session.execute(completed_elements_query(get_user_id(), course_id)).all()
+            return {
+                "course_id": course_id,
+                "elements": [
+                    {"course_element_id": row.course_element_id, "completed_at": row.completed_at} for row in rows
+                ]
+            }, 200
+
+        except SQLAlchemyError as e:
+            print(f"Database error: {e}")
+            return {"error": "An error occurred while fetching progress"}, 500
+
+
 @api.route('/enrolled')
 class EnrolledCourses(Resource):
     @jwt_required()
+    @api.expect(enrolled_courses_parser)
     def get(self):
         """
         Hent alle kurser med tilmeldingsstatus for den aktuelle bruger.
         """
+        args = enrolled_courses_parser.parse_args()
         try:
             student_id = get_user_id()
-            enrolled_courses = db.session.query(StudentCourse.course_id).filter_by(student_id=student_id).all()
-            enrolled_course_ids = [course.course_id for course in enrolled_courses]
-
-            courses = db.session.query(Course).all()
-            serialized_courses = [
-                {
-                    "id": course.course_id,
-                    "courseTitle": course.course_title,
-                    "courseDescription": course.course_description,
-                    "enrolled": course.course_id in enrolled_course_ids
-                }
-                for course in courses
-            ]
-
-            return {"courses": serialized_courses}, 200
+            statement = enrolled_courses_query(student_id)
+
+            if args['limit'] is None and args['cursor'] is None:
+                rows = db.session.execute(statement.order_by(Course.course_id)).all()
+                return {"courses": [serialize_enrolled_course(row) for row in rows]}, 200
+
+            limit = args['limit'] or DEFAULT_PAGE_SIZE
+            rows = db.session.execute(paginate(statement, Course.course_id, args['cursor'], limit)).all()
+            rows, next_cursor = split_page(rows, limit, lambda row: row.course_id)
+
+            return {
+                "courses": [serialize_enrolled_course(row) for row in rows],
+                "nextCursor": next_cursor
+            }, 200
 
         except SQLAlchemyError as e:
             print(f"Database error: {e}")
             return {"error": "An error occurred while fetching courses"}, 500
-
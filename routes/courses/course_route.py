@@ -1,9 +1,17 @@
+from flask import Response, request, stream_with_context
 from flask_cors import cross_origin
-from flask_restx import Namespace, Resource, fields, abort
-from sqlalchemy import text
+from flask_jwt_extended import jwt_required
+from flask_restx import Namespace, Resource, fields, abort, inputs
+from sqlalchemy import and_, func, insert, select, text
 from sqlalchemy.exc import SQLAlchemyError
-from database import db
+from database import db, insert_returning_ids
+from cache import course_cache, course_element_counts
+from compression import cache_compressed, compressed_cache
+from http_cache import cache_headers, make_etag, not_modified
+from serialization import dumps
+from pagination import DEFAULT_PAGE_SIZE, add_page_arguments, paginate, split_page
 from models import Course, CourseElement, TextElement, InputElement
+from routes.courses.course_enrollment_route import ADMIN_ROLE_ID, get_user_role
 
 api = Namespace('course', description='Course-related operations')
 
@@ -29,26 +37,193 @@ course_model = api.model('CourseResponse', {
 })
 
 courses_model = api.model('CoursesResponse', {
-    "courses": fields.List(fields.Nested(course_model), description="List of all courses")
+    "courses": fields.List(fields.Nested(course_model), description="List of all courses"),
+    "nextCursor": fields.Integer(description="Cursor of the next page, only present when paginating")
 })
 
-def add_text_element(text):
-    text_element = TextElement(
-        text_=text
+course_list_parser = add_page_arguments(api.parser())
+course_list_parser.add_argument('fields', type=str, location='args',
+                                help='Comma separated fields to return, e.g. id,courseTitle')
+course_list_parser.add_argument('title', type=str, location='args',
+                                help='Only return courses whose title starts with this prefix')
+course_list_parser.add_argument('stream', type=inputs.boolean, location='args', default=False,
+                                help='Stream the full (unpaginated) export')
+
+course_list_columns = {
+    "id": Course.course_id,
+    "courseTitle": Course.course_title,
+    "courseDescription": Course.course_description,
+    "created": Course.created
+}
+
+def course_list_version_query():
+    """
+    Cheap version of the course list: courses are only ever created or deleted,
+    so the row count and the newest id/created change whenever the list does.
+    """
+    return select(func.count(Course.course_id), func.max(Course.course_id), func.max(Course.created))
+
+
+def course_summary_query(course_id):
+    """
+    The course row together with the element count and newest element id,
+    which together identify the version of the course content.
+    """
+    return select(
+        Course.course_id,
+        Course.course_title,
+        Course.course_description,
+        Course.created,
+        select(func.count(CourseElement.course_element_id))
+            .where(CourseElement.course_id == Course.course_id)
+            .scalar_subquery().label("element_count"),
+        select(func.max(CourseElement.course_element_id))
+            .where(CourseElement.course_id == Course.course_id)
+            .scalar_subquery().label("last_element_id")
+    ).where(Course.course_id == course_id)
+
+
+def course_list_query(field_names, title_prefix=None):
+    statement = select(*[course_list_columns[name].label(name) for name in field_names])
+    if title_prefix:
+        statement = statement.where(Course.course_title.startswith(title_prefix, autoescape=True))
+    return statement
+
+
+def serialize_course_row(row):
+    return row._asdict()
+
+
+def parse_course_fields(value):
+    if not value:
+        return list(course_list_columns)
+
+    field_names = [name.strip() for name in value.split(',') if name.strip()]
+    unknown = [name for name in field_names if name not in course_list_columns]
+    if unknown:
+        abort(400, f"Unknown fields: {', '.join(unknown)}")
+
+    # The id is always returned, it is the pagination cursor
+    return ["id"] + [name for name in field_names if name != "id"]
+
+
+def stream_courses(statement):
+    """Stream the courses as one JSON document without holding them all in memory."""
+    yield b'{"courses": ['
+    rows = db.session.execute(statement.order_by(Course.course_id).execution_options(yield_per=500))
+    for index, partition in enumerate(rows.partitions()):
+        yield (b',' if index else b'') + dumps([serialize_course_row(row) for row in partition])[1:-1]
+    yield b']}'
+
+
+def course_elements_query(course_id):
+    """
+    Build a single query returning every element of a course together with its
+    Text/Input content, in course order.
+    """
+    return (
+        select(
+            CourseElement.course_element_id,
+            CourseElement.element_type,
+            TextElement.text_.label("text_"),
+            InputElement.label,
+            InputElement.answer
+        )
+        .outerjoin(TextElement, and_(
+            CourseElement.element_type == 'Text',
+            TextElement.text_element_id == CourseElement.element_id
+        ))
+        .outerjoin(InputElement, and_(
+            CourseElement.element_type == 'Input',
+            InputElement.input_element_id == CourseElement.element_id
+        ))
+        .where(CourseElement.course_id == course_id)
+        .order_by(CourseElement.course_element_id)
     )
-    db.session.add(text_element)
-    db.session.flush()
-    return text_element.text_element_id
 
 
-def add_input_element(label, answer):
-    input_element = InputElement(
-        label=label,
-        answer=answer
-    )
-    db.session.add(input_element)
-    db.session.flush()
-    return input_element.input_element_id
+def serialize_course_elements(rows):
+    elements_data = []
+    for row in rows:
+        if row.element_type == 'Text' and row.text_ is not None:
+            elements_data.append({
+                "id": row.course_element_id,
+                "type": "Text",
+                "isEditing": False,
+                "text": row.text_
+            })
+        elif row.element_type == 'Input' and row.label is not None:
+            elements_data.append({
+                "id": row.course_element_id,
+                "type": "Input",
+                "isEditing": False,
+                "label": row.label,
+                "answer": row.answer
+            })
+    return elements_data
+
+
+def course_etag(course):
+    return make_etag("course", course.course_id, course.created, course.element_count, course.last_element_id)
+
+
+def cache_course(course, element_rows, version):
+    """
+    Build the cache entry for a course from its course_summary_query row and
+    element rows, and store it in the course cache under the version that was
+    current before they were read.
+    """
+    etag = course_etag(course)
+    entry = {
+        "etag": etag,
+        "lastModified": cache_headers(etag, course.created).get("Last-Modified"),
+        "course": {
+            "id": course.course_id,
+            "courseTitle": course.course_title,
+            "courseDescription": course.course_description,
+            "created": course.created,
+            "elements": serialize_course_elements(element_rows)
+        }
+    }
+    course_cache.set(course.course_id, entry, version)
+    return entry
+
+
+def course_entry_response(entry):
+    cache_compressed(f"course:{entry['etag']}")
+    headers = cache_headers(entry["etag"], entry["lastModified"])
+    return {"message": "Course retrieved successfully", "course": entry["course"]}, 200, headers
+
+
+def add_course_elements(course_id, elements):
+    """
+    Create the Text/Input rows for a course and link them through CourseElement,
+    using one batched INSERT per table instead of one round trip per element.
+    """
+    text_ids = iter(insert_returning_ids(
+        TextElement,
+        TextElement.text_element_id,
+        [{"text_": element.get('text', '')} for element in elements if element['type'] == 'Text']
+    ))
+    input_ids = iter(insert_returning_ids(
+        InputElement,
+        InputElement.input_element_id,
+        [
+            {"label": element.get('label', ''), "answer": element.get('answer', '')}
+            for element in elements if element['type'] == 'Input'
+        ]
+    ))
+
+    course_elements = [
+        {
+            "course_id": course_id,
+            "element_id": next(text_ids) if element['type'] == 'Text' else next(input_ids),
+            "element_type": element['type']
+        }
+        for element in elements
+    ]
+    if course_elements:
+        db.session.execute(insert(CourseElement), course_elements)
 
 
 @api.route('')
@@ -67,13 +242,18 @@ class CourseResource(Resource):
         """
         Create a new course.
         """
-        try:
-            data = api.payload
-            print(f"Received course data: {data}")
+        data = api.payload
+        print(f"Received course data: {data}")
 
-            if not isinstance(data.get('elements', []), list):
-                abort(400, "Elements should be a list.")
+        elements = data.get('elements', [])
+        if not isinstance(elements, list):
+            abort(400, "Elements should be a list.")
 
+        for element in elements:
+            if 'type' not in element or element['type'] not in ['Text', 'Input']:
+                abort(400, f"Invalid element type: {element.get('type')}")
+
+        try:
             new_course = Course(
                 course_title=data.get('courseTitle'),
                 course_description=data.get('courseDescription')
@@ -81,24 +261,10 @@ class CourseResource(Resource):
             db.session.add(new_course)
             db.session.flush()
 
-            elements = data.get('elements', [])
-            for element in elements:
-                if 'type' not in element or element['type'] not in ['Text', 'Input']:
-                    abort(400, f"Invalid element type: {element.get('type')}")
-
-                if element['type'] == 'Text':
-                    element_id = add_text_element(element.get('text', ''))
-                elif element['type'] == 'Input':
-                    element_id = add_input_element(element.get('label', ''), element.get('answer', ''))
-
-                course_element = CourseElement(
-                    course_id=new_course.course_id,
-                    element_id=element_id,
-                    element_type=element['type']
-                )
-                db.session.add(course_element)
+            add_course_elements(new_course.course_id, elements)
 
             db.session.commit()
+            course_cache.invalidate(new_course.course_id)
 
             course_data = {
                 "id": new_course.course_id,
@@ -125,30 +291,50 @@ class CourseResource(Resource):
             }, 500
 
     @api.doc(
-        description="Fetch all courses",
+        description="Fetch courses. Pass limit/cursor for keyset pagination, fields to "
+                    "select columns, title for a prefix filter or stream=true for a full export",
         responses={
-            200: ("A list of all courses", courses_model),
+            200: ("A list of courses", courses_model),
+            400: "Invalid query arguments",
             500: "An error occurred while fetching courses"
         }
     )
+    @api.expect(course_list_parser)
     @cross_origin()
     def get(self):
         """
         Fetch all courses.
         """
+        args = course_list_parser.parse_args()
+        field_names = parse_course_fields(args['fields'])
+
         try:
-            courses = db.session.query(Course).all()
-            serialized_courses = [
-                {
-                    "id": course.course_id,
-                    "courseTitle": course.course_title,
-                    "courseDescription": course.course_description,
-                    "created": course.created.strftime('%Y-%m-%d %H:%M:%S') if course.created else None
-                }
-                for course in courses
-            ]
-
-            return {"courses": serialized_courses}, 200
+            version = db.session.execute(course_list_version_query()).one()
+            etag = make_etag("courses", *version, request.query_string.decode())
+            response = not_modified(etag)
+            if response is not None:
+                return response
+
+            statement = course_list_query(field_names, args['title'])
+
+            if args['stream']:
+                return Response(
+                    stream_with_context(stream_courses(statement)),
+                    mimetype='application/json',
+                    headers=cache_headers(etag)
+                )
+
+            if args['limit'] is None and args['cursor'] is None:
+                rows = db.session.execute(statement.order_by(Course.course_id)).all()
+                serialized_courses = [serialize_course_row(row) for row in rows]
+                return {"courses": serialized_courses}, 200, cache_headers(etag)
+
+            limit = args['limit'] or DEFAULT_PAGE_SIZE
+            rows = db.session.execute(paginate(statement, Course.course_id, args['cursor'], limit)).all()
+            rows, next_cursor = split_page(rows, limit, lambda row: row.id)
+            serialized_courses = [serialize_course_row(row) for row in rows]
+
+            return {"courses": serialized_courses, "nextCursor": next_cursor}, 200, cache_headers(etag)
 
         except SQLAlchemyError as e:
             print(f"Database error: {e}")
@@ -160,6 +346,23 @@ class CourseResource(Resource):
         
 
 
+@api.route('/cache/stats')
+class CourseCacheStats(Resource):
+    @api.doc(
+        description="Hit, miss and eviction counters for this worker's course cache (admins only)",
+        responses={200: "Cache statistics", 401: "Missing or invalid token", 403: "Not an admin"}
+    )
+    @jwt_required()
+    @cross_origin()
+    def get(self):
+        """
+        Get course cache statistics.
+        """
+        if get_user_role() != ADMIN_ROLE_ID:
+            return {"error": "Only admins can read the cache statistics"}, 403
+        return {**course_cache.stats(), "compressed": compressed_cache.stats()}, 200
+
+
 @api.route('/<int:course_id>')
 class CourseById(Resource):
 
@@ -178,47 +381,26 @@ class CourseById(Resource):
         Retrieve a course by its ID, including its content elements.
         """
         try:
-            course = db.session.query(Course).filter_by(course_id=course_id).first()
+            version = course_cache.version(course_id)
+            cached = course_cache.get(course_id, version)
+            if cached is not None:
+                response = not_modified(cached["etag"], cached["lastModified"])
+                if response is not None:
+                    return response
+                return course_entry_response(cached)
+
+            course = db.session.execute(course_summary_query(course_id)).first()
 
             if not course:
                 return {"error": f"Course with ID {course_id} not found"}, 404
 
+            etag = course_etag(course)
+            response = not_modified(etag, course.created)
+            if response is not None:
+                return response
 
-            course_elements = db.session.query(CourseElement).filter_by(course_id=course_id).all()
-
-            elements_data = []
-            for course_element in course_elements:
-                if course_element.element_type == 'Text':
-
-                    text_element = db.session.query(TextElement).filter_by(text_element_id=course_element.element_id).first()
-                    if text_element:
-                        elements_data.append({
-                            "id": course_element.course_element_id,
-                            "type": "Text",
-                            "isEditing": False, 
-                            "text": text_element.text_
-                        })
-
-                elif course_element.element_type == 'Input':
-                    input_element = db.session.query(InputElement).filter_by(input_element_id=course_element.element_id).first()
-                    if input_element:
-                        elements_data.append({
-                            "id": course_element.course_element_id,
-                            "type": "Input",
-                            "isEditing": False, 
-                            "label": input_element.label,
-                            "answer": input_element.answer
-                        })
-
-            course_data = {
-                "id": course.course_id,
-                "courseTitle": course.course_title,
-                "courseDescription": course.course_description,
-                "created": course.created.strftime('%Y-%m-%d %H:%M:%S') if course.created else None,
-                "elements": elements_data 
-            }
-
-            return {"message": "Course retrieved successfully", "course": course_data}, 200
+            rows = db.session.execute(course_elements_query(course_id)).all()
+            return course_entry_response(cache_course(course, rows, version))
 
         except SQLAlchemyError as e:
             print(f"Database error: {e}")
@@ -256,6 +438,8 @@ class CourseResource(Resource):
             delete_course_query = text("DELETE FROM Course WHERE course_id = :course_id")
             db.session.execute(delete_course_query, {"course_id": course_id})
             db.session.commit()
+            course_cache.invalidate(course_id)
+            course_element_counts.delete(course_id)
 
             return {"message": f"Course with ID {course_id} deleted successfully"}, 200
 
@@ -1,10 +1,11 @@
-from flask import request
+from flask import current_app, request
 from flask_cors import cross_origin
 from flask_restx import Namespace, Resource, fields, abort
 from sqlalchemy.exc import SQLAlchemyError
-from database import db
+from database import db, insert_returning_ids
 from models import Jeopardy, JeopardyCells, Subjects
-from sqlalchemy import text
+from sqlalchemy import func, insert, select, text
+from http_cache import cache_headers, make_etag, not_modified
 
 api = Namespace('jeopardy', description='Jeopardy related operations')
 
@@ -19,6 +20,163 @@ jeopardy_create_model = api.model('JeopardyCreate', {
     }))), required=True, description='2D array of cells')
 })
 
+jeopardy_import_model = api.model('JeopardyImport', {
+    'boards': fields.List(fields.Nested(jeopardy_create_model), required=True, description='The Jeopardy games to create')
+})
+
+
+def is_integer(value):
+    # bool is a subclass of int, but true/false are not numbers here
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def jeopardy_board_error(data):
+    """
+    Check a board before anything is written: every grid row needs one cell per
+    subject. Returns the problem as a message, or None when the board is valid.
+    """
+    if not isinstance(data, dict):
+        return "Board must be an object"
+    if not isinstance(data.get('title'), str) or not data['title'].strip():
+        return "title is required"
+
+    subjects = data.get('subjects')
+    if not isinstance(subjects, list) or not subjects or not all(isinstance(subject, str) for subject in subjects):
+        return "subjects must be a non-empty list of strings"
+
+    grid = data.get('grid')
+    if not isinstance(grid, list):
+        return "grid must be a list of rows"
+    for row_index, row in enumerate(grid):
+        if not isinstance(row, list) or len(row) != len(subjects):
+            return f"grid row {row_index} must have {len(subjects)} cells, one per subject"
+        for col_index, cell in enumerate(row):
+            if (
+                not isinstance(cell, dict)
+                or not is_integer(cell.get('value'))
+                or not isinstance(cell.get('question'), str)
+                or not isinstance(cell.get('answer'), str)
+            ):
+                return f"grid cell ({row_index}, {col_index}) needs an integer value, a question and an answer"
+    return None
+
+
+def create_jeopardy_boards(boards):
+    """
+    Insert validated boards with one batched INSERT per table instead of an ORM
+    object per subject and cell. Returns the new ids in the order of boards;
+    the caller commits.
+    """
+    jeopardy_ids = insert_returning_ids(
+        Jeopardy,
+        Jeopardy.jeopardy_id,
+        [
+            {"jeopardy_title": board['title'], "jeopardy_description": board.get('description', '')}
+            for board in boards
+        ]
+    )
+
+    subjects = [
+        {"subject_name": subject_name, "subject_jeopardy_id": jeopardy_id}
+        for jeopardy_id, board in zip(jeopardy_ids, boards)
+        for subject_name in board['subjects']
+    ]
+    cells = [
+        {
+            "jeopardy_cell_value": cell['value'],
+            "jeopardy_cell_question": cell['question'],
+            "jeopardy_cell_answer": cell['answer'],
+            "RowNumber": row_index,
+            "ColumnNumber": col_index,
+            "jeopardy_cell_jeopardy_id": jeopardy_id
+        }
+        for jeopardy_id, board in zip(jeopardy_ids, boards)
+        for row_index, row in enumerate(board['grid'])
+        for col_index, cell in enumerate(row)
+    ]
+
+    if subjects:
+        db.session.execute(insert(Subjects), subjects)
+    if cells:
+        db.session.execute(insert(JeopardyCells), cells)
+    return jeopardy_ids
+
+
+def jeopardy_list_version_query():
+    """
+    Boards are only ever created or deleted, so the row count and the newest
+    id/created change whenever the list does.
+    """
+    return select(func.count(Jeopardy.jeopardy_id), func.max(Jeopardy.jeopardy_id), func.max(Jeopardy.created))
+
+
+def jeopardy_list_query():
+    return select(
+        Jeopardy.jeopardy_id,
+        Jeopardy.jeopardy_title,
+        Jeopardy.jeopardy_description,
+        Jeopardy.created
+    )
+
+
+def jeopardy_query(jeopardy_id):
+    return jeopardy_list_query().where(Jeopardy.jeopardy_id == jeopardy_id)
+
+
+def jeopardy_subjects_query(jeopardy_id):
+    # Subjects have no column number, they are created left to right
+    return (
+        select(Subjects.subject_name)
+        .where(Subjects.subject_jeopardy_id == jeopardy_id)
+        .order_by(Subjects.subject_Id)
+    )
+
+
+def jeopardy_cells_query(jeopardy_id):
+    return (
+        select(
+            JeopardyCells.RowNumber,
+            JeopardyCells.ColumnNumber,
+            JeopardyCells.jeopardy_cell_value,
+            JeopardyCells.jeopardy_cell_question,
+            JeopardyCells.jeopardy_cell_answer
+        )
+        .where(JeopardyCells.jeopardy_cell_jeopardy_id == jeopardy_id)
+        .order_by(JeopardyCells.RowNumber, JeopardyCells.ColumnNumber)
+    )
+
+
+def build_jeopardy_grid(cells, column_count=0):
+    """
+    Place cells ordered by (RowNumber, ColumnNumber) in a rows x columns grid in
+    one pass. The board is at least as wide as its subjects; positions without
+    a cell are None, and a board without cells has an empty grid.
+    """
+    if not cells:
+        return []
+
+    row_count = cells[-1].RowNumber + 1
+    column_count = max(column_count, max(cell.ColumnNumber for cell in cells) + 1)
+    grid = [[None] * column_count for _ in range(row_count)]
+
+    for cell in cells:
+        grid[cell.RowNumber][cell.ColumnNumber] = {
+            "value": cell.jeopardy_cell_value,
+            "question": cell.jeopardy_cell_question,
+            "answer": cell.jeopardy_cell_answer
+        }
+    return grid
+
+
+def serialize_jeopardy_game(game):
+    return {
+        "id": game.jeopardy_id,
+        "title": game.jeopardy_title,
+        "description": game.jeopardy_description,
+        "created": game.created,
+    }
+
+
 @api.route('')
 class JeopardyResource(Resource):
     @api.expect(jeopardy_create_model)
@@ -35,36 +193,15 @@ class JeopardyResource(Resource):
         """
         Create a new Jeopardy game.
         """
-        try:
-            data = api.payload
-            new_jeopardy = Jeopardy(
-                jeopardy_title=data['title'],
-                jeopardy_description=data.get('description', '')
-            )
-            db.session.add(new_jeopardy)
-            db.session.flush()
-
-            for subject_name in data["subjects"]:
-                new_subject = Subjects(
-                    subject_name=subject_name,
-                    subject_jeopardy_id=new_jeopardy.jeopardy_id
-                )
-                db.session.add(new_subject)
-
-            for row_index, row in enumerate(data['grid']):
-                for col_index, cell in enumerate(row):
-                    new_cell = JeopardyCells(
-                        jeopardy_cell_value=cell['value'],
-                        jeopardy_cell_question=cell['question'],
-                        jeopardy_cell_answer=cell['answer'],
-                        RowNumber=row_index,
-                        ColumnNumber=col_index,
-                        jeopardy_cell_jeopardy_id=new_jeopardy.jeopardy_id
-                    )
-                    db.session.add(new_cell)
+        data = api.payload
+        error = jeopardy_board_error(data)
+        if error is not None:
+            abort(400, error)
 
+        try:
+            jeopardy_id, = create_jeopardy_boards([data])
             db.session.commit()
-            return {"message": "Jeopardy game created successfully"}, 201
+            return {"message": "Jeopardy game created successfully", "id": jeopardy_id}, 201
 
         except Exception as e:
             db.session.rollback()
@@ -80,27 +217,69 @@ class JeopardyResource(Resource):
         List all Jeopardy games.
         """
         try:
-            jeopardy_games = db.session.query(
-                Jeopardy.jeopardy_id,
-                Jeopardy.jeopardy_title,
-                Jeopardy.jeopardy_description,
-                Jeopardy.created
-            ).all()
+            etag = make_etag("jeopardy_games", *db.session.execute(jeopardy_list_version_query()).one())
+            response = not_modified(etag)
+            if response is not None:
+                return response
+
+            jeopardy_games = db.session.execute(jeopardy_list_query()).all()
 
             return {
-                "jeopardy_games": [
-                    {
-                        "id": game.jeopardy_id,
-                        "title": game.jeopardy_title,
-                        "description": game.jeopardy_description,
-                        "created": game.created.strftime('%Y-%m-%d %H:%M:%S') if game.created else None,
-                    } for game in jeopardy_games
-                ]
-            }, 200
+                "jeopardy_games": [serialize_jeopardy_game(game) for game in jeopardy_games]
+            }, 200, cache_headers(etag)
         except Exception as e:
             return {"error": str(e)}, 500
         
 
+@api.route('/import')
+class JeopardyImportResource(Resource):
+    @api.expect(jeopardy_import_model)
+    @api.doc(
+        description="Create many Jeopardy games at once. Every board is validated before any "
+                    "is written; they are then inserted and committed in chunks of "
+                    "JEOPARDY_IMPORT_CHUNK_SIZE boards",
+        responses={
+            201: "Jeopardy games imported",
+            400: "Invalid input data",
+            500: "An error occurred while importing; the chunks already committed are reported"
+        }
+    )
+    @cross_origin()
+    def post(self):
+        """
+        Import Jeopardy games in bulk.
+        """
+        boards = (api.payload or {}).get('boards')
+        if not isinstance(boards, list) or not boards:
+            abort(400, "boards must be a non-empty list")
+
+        for index, board in enumerate(boards):
+            error = jeopardy_board_error(board)
+            if error is not None:
+                abort(400, f"Board {index}: {error}")
+
+        chunk_size = current_app.config["JEOPARDY_IMPORT_CHUNK_SIZE"]
+        jeopardy_ids = []
+        try:
+            # A transaction per chunk keeps locks and the transaction log small
+            # on large imports
+            for start in range(0, len(boards), chunk_size):
+                chunk_ids = create_jeopardy_boards(boards[start:start + chunk_size])
+                db.session.commit()
+                jeopardy_ids.extend(chunk_ids)
+
+            return {"message": "Jeopardy games imported successfully", "ids": jeopardy_ids}, 201
+
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"Database error: {e}")
+            return {
+                "error": "An error occurred while importing the Jeopardy games",
+                "imported": len(jeopardy_ids),
+                "ids": jeopardy_ids
+            }, 500
+
+
 @api.route('/<int:jeopardy_id>')
 class JeopardyByIdResource(Resource):
     @api.doc(
@@ -117,29 +296,27 @@ class JeopardyByIdResource(Resource):
         Retrieve a Jeopardy game by ID.
         """
         try:
-            jeopardy = db.session.query(Jeopardy).filter_by(jeopardy_id=jeopardy_id).first()
+            jeopardy = db.session.execute(jeopardy_query(jeopardy_id)).first()
 
             if not jeopardy:
                 return {"error": "Jeopardy game not found"}, 404
 
+            # A board and its subjects/cells are immutable once created
+            etag = make_etag("jeopardy", jeopardy_id, jeopardy.created)
+            response = not_modified(etag, jeopardy.created)
+            if response is not None:
+                return response
+
+            subjects = db.session.execute(jeopardy_subjects_query(jeopardy_id)).scalars().all()
+            cells = db.session.execute(jeopardy_cells_query(jeopardy_id)).all()
+
             jeopardy_data = {
-                "id": jeopardy.jeopardy_id,
-                "title": jeopardy.jeopardy_title,
-                "description": jeopardy.jeopardy_description,
-                "created": jeopardy.created.strftime('%Y-%m-%d %H:%M:%S') if jeopardy.created else None,
-                "subjects": [s.subject_name for s in jeopardy.Subjects],
-                "grid": [
-                    [
-                        {
-                            "value": cell.jeopardy_cell_value,
-                            "question": cell.jeopardy_cell_question,
-                            "answer": cell.jeopardy_cell_answer
-                        } for cell in jeopardy.JeopardyCells if cell.RowNumber == row
-                    ] for row in range(max(c.RowNumber for c in jeopardy.JeopardyCells) + 1)
-                ]
+                **serialize_jeopardy_game(jeopardy),
+                "subjects": subjects,
+                "grid": build_jeopardy_grid(cells, len(subjects))
             }
 
-            return {"message": "Jeopardy game retrieved successfully", "jeopardy": jeopardy_data}, 200
+            return {"message": "Jeopardy game retrieved successfully", "jeopardy": jeopardy_data}, 200, cache_headers(etag, jeopardy.created)
 
         except Exception as e:
             return {"error": str(e)}, 500
@@ -0,0 +1,256 @@
+import secrets
+
+from flask import Response, current_app, request
+from flask_cors import cross_origin
+from flask_restx import Namespace, Resource, fields, abort
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from database import db, insert_returning_ids
+from game_sessions import GameSessionError, event_stream, game_sessions, result_writer
+from models import JeopardySession, JeopardySessionTeam
+from routes.games.jeopardy_route import (
+    build_jeopardy_grid, is_integer, jeopardy_cells_query, jeopardy_query, jeopardy_subjects_query
+)
+
+api = Namespace('jeopardy_session', description='Live Jeopardy games')
+
+session_create_model = api.model('JeopardySessionCreate', {
+    'jeopardyId': fields.Integer(required=True, description='The Jeopardy game to play'),
+    'teams': fields.List(fields.String, required=True, description='Team names, in turn order')
+})
+
+cell_model = api.model('JeopardySessionCell', {
+    'row': fields.Integer(required=True, description='Row of the cell'),
+    'column': fields.Integer(required=True, description='Column of the cell')
+})
+
+resolve_model = api.model('JeopardySessionResolve', {
+    'team': fields.Integer(required=True, description='Index of the team that answered'),
+    'correct': fields.Boolean(required=True, description='Whether the answer was correct')
+})
+
+host_header = {"X-Host-Token": {"description": "The hostToken returned when the session was created", "in": "header"}}
+
+
+def save_session_result(result):
+    """Write a finished game and its team scores; runs on the result writer's thread."""
+    try:
+        session_id, = insert_returning_ids(
+            JeopardySession,
+            JeopardySession.jeopardy_session_id,
+            [{
+                "session_key": result["session_key"],
+                "jeopardy_id": result["jeopardy_id"],
+                "started": result["started"],
+                "finished": result["finished"],
+                "answered_cells": result["answered_cells"]
+            }]
+        )
+        db.session.execute(insert(JeopardySessionTeam), [
+            {"jeopardy_session_id": session_id, "team_index": index, "team_name": name, "score": score}
+            for index, (name, score) in enumerate(result["teams"])
+        ])
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    finally:
+        db.session.remove()
+
+
+def find_session(session_key):
+    session = game_sessions.get(session_key)
+    if session is None:
+        if game_sessions.held_elsewhere(session_key):
+            # The game lives in another process; /jeopardy/session has to be
+            # routed to the single games worker (see game_sessions.py)
+            abort(409, "Game session is held by another worker")
+        abort(404, "Game session not found")
+    return session
+
+
+def host_session(session_key):
+    session = find_session(session_key)
+    if not secrets.compare_digest(request.headers.get("X-Host-Token", ""), session.host_token):
+        abort(403, "Only the host can change the game")
+    return session
+
+
+@api.route('')
+class JeopardySessionResource(Resource):
+    @api.expect(session_create_model)
+    @api.doc(
+        description="Start a live game of a Jeopardy board. The response holds the hostToken "
+                    "needed to play it; players follow the game through the events stream",
+        responses={
+            201: "Game session started",
+            400: "Invalid input data",
+            404: "Jeopardy game not found",
+            500: "An error occurred while loading the Jeopardy game"
+        }
+    )
+    @cross_origin()
+    def post(self):
+        """
+        Start a live Jeopardy game.
+        """
+        data = api.payload or {}
+        jeopardy_id = data.get('jeopardyId')
+        teams = data.get('teams')
+        if not is_integer(jeopardy_id):
+            abort(400, "jeopardyId is required")
+        if not isinstance(teams, list) or not teams or not all(isinstance(team, str) and team.strip() for team in teams):
+            abort(400, "teams must be a non-empty list of team names")
+
+        try:
+            jeopardy = db.session.execute(jeopardy_query(jeopardy_id)).first()
+            if not jeopardy:
+                return {"error": "Jeopardy game not found"}, 404
+
+            subjects = db.session.execute(jeopardy_subjects_query(jeopardy_id)).scalars().all()
+            cells = db.session.execute(jeopardy_cells_query(jeopardy_id)).all()
+        except SQLAlchemyError as e:
+            print(f"Database error: {e}")
+            return {"error": "An error occurred while loading the Jeopardy game"}, 500
+
+        session = game_sessions.create(jeopardy_id, subjects, build_jeopardy_grid(cells, len(subjects)), teams)
+        return {
+            "message": "Game session started",
+            "sessionId": session.key,
+            "hostToken": session.host_token,
+            "session": session.state()
+        }, 201
+
+
+@api.route('/<string:session_key>')
+class JeopardySessionStateResource(Resource):
+    @api.doc(
+        description="The current state of a game; answers are only included for played cells",
+        responses={
+            200: "Game session state",
+            404: "Game session not found",
+            409: "Game session held by another worker"
+        }
+    )
+    @cross_origin()
+    def get(self, session_key):
+        """
+        Get the state of a live Jeopardy game.
+        """
+        return {"session": find_session(session_key).state()}, 200
+
+
+@api.route('/<string:session_key>/events')
+class JeopardySessionEventsResource(Resource):
+    @api.doc(
+        description="Server-sent events of a game: a snapshot first, then open, resolve and "
+                    "finish events. Reconnecting with Last-Event-ID resumes after that event",
+        responses={
+            200: "text/event-stream of the game",
+            404: "Game session not found",
+            409: "Game session held by another worker"
+        }
+    )
+    @cross_origin()
+    def get(self, session_key):
+        """
+        Follow a live Jeopardy game.
+        """
+        session = find_session(session_key)
+        last_event_id = request.headers.get("Last-Event-ID", "")
+        return Response(
+            event_stream(
+                session,
+                int(last_event_id) if last_event_id.isdigit() else None,
+                current_app.config["GAME_SESSION_HEARTBEAT_SECONDS"]
+            ),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+
+@api.route('/<string:session_key>/open')
+class JeopardySessionOpenResource(Resource):
+    @api.expect(cell_model)
+    @api.doc(
+        description="Show the question of a cell to every player",
+        params=host_header,
+        responses={
+            200: "Cell opened",
+            403: "Not the host",
+            404: "Game session not found",
+            409: "Move not allowed or game held by another worker"
+        }
+    )
+    @cross_origin()
+    def post(self, session_key):
+        """
+        Open a cell.
+        """
+        session = host_session(session_key)
+        data = api.payload or {}
+        if not is_integer(data.get('row')) or not is_integer(data.get('column')):
+            abort(400, "row and column are required")
+
+        try:
+            session.open(data['row'], data['column'])
+        except GameSessionError as e:
+            return {"error": str(e)}, 409
+        return {"session": session.state()}, 200
+
+
+@api.route('/<string:session_key>/resolve')
+class JeopardySessionResolveResource(Resource):
+    @api.expect(resolve_model)
+    @api.doc(
+        description="Score the open cell for a team and reveal its answer",
+        params=host_header,
+        responses={
+            200: "Cell resolved",
+            403: "Not the host",
+            404: "Game session not found",
+            409: "Move not allowed or game held by another worker"
+        }
+    )
+    @cross_origin()
+    def post(self, session_key):
+        """
+        Resolve the open cell.
+        """
+        session = host_session(session_key)
+        data = api.payload or {}
+        if not is_integer(data.get('team')) or not isinstance(data.get('correct'), bool):
+            abort(400, "team and correct are required")
+
+        try:
+            session.resolve(data['team'], data['correct'])
+        except GameSessionError as e:
+            return {"error": str(e)}, 409
+        return {"session": session.state()}, 200
+
+
+@api.route('/<string:session_key>/finish')
+class JeopardySessionFinishResource(Resource):
+    @api.doc(
+        description="End the game. The result is saved in the background",
+        params=host_header,
+        responses={
+            200: "Game finished",
+            403: "Not the host",
+            404: "Game session not found",
+            409: "Already finished or game held by another worker"
+        }
+    )
+    @cross_origin()
+    def post(self, session_key):
+        """
+        Finish a live Jeopardy game.
+        """
+        session = host_session(session_key)
+        try:
+            result = session.finish()
+        except GameSessionError as e:
+            return {"error": str(e)}, 409
+
+        result_writer.submit(save_session_result, result)
+        return {"message": "Game finished", "session": session.state()}, 200
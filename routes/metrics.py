@@ -0,0 +1,23 @@
+import secrets
+
+from flask import Blueprint, Response, current_app, jsonify, request
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from metrics import generate_metrics, update_worker_gauges
+
+metrics_bp = Blueprint('metrics_bp', __name__)
+
+LOCAL_ADDRESSES = ("127.0.0.1", "::1")
+
+def may_scrape():
+    token = current_app.config["METRICS_TOKEN"]
+    if token:
+        return secrets.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    return request.remote_addr in LOCAL_ADDRESSES
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def metrics():
+    if not may_scrape():
+        return jsonify({"error": "Not allowed to read metrics"}), 403
+    update_worker_gauges()
+    return Response(generate_metrics(), content_type=CONTENT_TYPE_LATEST)
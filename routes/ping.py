@@ -1,7 +1,18 @@
 from flask import Blueprint, jsonify
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import db
 
 ping_bp = Blueprint('ping_bp', __name__)
 
 @ping_bp.route("/ping", methods=["GET"])
 def ping():
-    return jsonify({"message": "pong"}), 200
\ No newline at end of file
+    # Readiness check: only report ready when this worker can reach the database
+    try:
+        db.session.execute(text("SELECT 1"))
+    except SQLAlchemyError as e:
+        print(f"Readiness check failed: {e}")
+        db.session.rollback()
+        return jsonify({"message": "Database unavailable"}), 503
+    return jsonify({"message": "pong", "database": "ok"}), 200
@@ -1,15 +1,84 @@
 from flask import Blueprint, jsonify, request
-from argon2 import PasswordHasher, exceptions
 from flask_jwt_extended import create_access_token, create_refresh_token, get_jwt_identity, jwt_required
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy import bindparam, select, update
 from models import Account
 from database import db
+from hashing import HashingBusy, password_hasher
+from cache import account_cache
 
 from flasgger import Swagger, swag_from
 
 user_bp = Blueprint('user_bp', __name__)
-ph = PasswordHasher()
+
+
+def hashing_busy_response():
+    response = jsonify({"error": "Server is busy, please try again"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+def upgrade_password_hash(account_id, password_hash, password):
+    """
+    Re-hash the password with the current argon2 parameters when the stored hash
+    was made with older ones. Skipped when the hashing queue is busy or the
+    write fails; the upgrade will happen on a later login.
+    """
+    if not password_hasher.needs_rehash(password_hash):
+        return
+
+    try:
+        new_hash = password_hasher.hash(password)
+    except HashingBusy:
+        return
+
+    try:
+        db.session.execute(update(Account).where(Account.account_id == account_id).values(password=new_hash))
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"Error upgrading password hash: {e}")
+        return
+    account_cache.delete(account_id)
+
+
+# Column-only lookup through the managed session; being a module-level constant,
+# SQLAlchemy compiles it once and reuses it from the compiled-statement cache.
+login_query = select(
+    Account.account_id,
+    Account.email,
+    Account.name,
+    Account.role_id,
+    Account.password
+).where(Account.email == bindparam("email"))
+
+
+def find_login_account(email):
+    return db.session.execute(login_query, {"email": email}).first()
+
+
+CURRENT_USER_CLAIMS = ("id", "email", "name", "role_id")
+
+
+def load_current_user(account_id, fresh=False):
+    """
+    Public fields of an account, from the per-worker TTL cache unless fresh is
+    requested. Returns None when the account does not exist.
+    """
+    user = None if fresh else account_cache.get(account_id)
+    if user is not None:
+        return user
+
+    row = db.session.execute(
+        select(Account.account_id, Account.name, Account.email, Account.role_id)
+        .where(Account.account_id == account_id)
+    ).first()
+    if row is None:
+        return None
+
+    user = {"id": row.account_id, "fullName": row.name, "email": row.email, "role": row.role_id}
+    account_cache.set(account_id, user)
+    return user
 
 class UserRoutes():
 
@@ -122,7 +191,7 @@ class UserRoutes():
             return jsonify({"error": "Invalid request form"}), 400 
 
         try:
-            hashed_password = ph.hash(password)
+            hashed_password = password_hasher.hash(password)
 
             new_account = Account(
                 name=full_name,
@@ -135,6 +204,9 @@ class UserRoutes():
 
             return jsonify({"message": "User created successfully"}), 201
 
+        except HashingBusy:
+            return hashing_busy_response()
+
         except IntegrityError:
             db.session.rollback()
             return jsonify({"error": "Email already exists"}), 400
@@ -236,18 +308,16 @@ def authenticate_user():
         return jsonify({"error": "Email and password are required"}), 400
 
     try:
-        with db.engine.connect() as connection:
-            session = Session(connection)
-            user = session.query(Account).filter_by(email=email).first()
+        user = find_login_account(email)
 
         if user is None:
             return jsonify({"error": "Invalid email or password"}), 401
 
-        try:
-            ph.verify(user.password, password) 
-        except exceptions.VerifyMismatchError:
+        if not password_hasher.verify(user.password, password):
             return jsonify({"error": "Invalid email or password"}), 401
 
+        upgrade_password_hash(user.account_id, user.password, password)
+
         access_token = create_access_token(identity={"id": user.account_id, "email": user.email, "name": user.name, "role_id": user.role_id})
         refresh_token = create_refresh_token(identity={"id": user.account_id, "email": user.email, "role_id": user.role_id})
 
@@ -257,6 +327,9 @@ def authenticate_user():
             "refresh_token": refresh_token
         }), 200
 
+    except HashingBusy:
+        return hashing_busy_response()
+
     except Exception as e:
         return jsonify({"error": "An error occurred during login", "details": str(e)}), 500
 
@@ -313,7 +386,17 @@ def refresh_token():
 @swag_from({
     'tags': ['User'],
     'summary': 'Get Current User Info',
-    'description': 'Retrieve information about the currently authenticated user, including their full name, email, and role.',
+    'description': 'Retrieve information about the currently authenticated user, including their full name, email, and role. '
+                   'Served from the verified token claims; pass fresh=1 to read the account from the database.',
+    'parameters': [
+        {
+            'name': 'fresh',
+            'in': 'query',
+            'type': 'string',
+            'required': False,
+            'description': 'Set to 1 to bypass the token claims and caches'
+        }
+    ],
     'responses': {
         200: {
             'description': 'Successfully retrieved user information.',
@@ -389,18 +472,25 @@ def get_current_user():
     Hent oplysninger om den aktuelle bruger.
     """
     try:
-        user_id = get_jwt_identity()
-        user = db.session.query(Account).filter_by(account_id=user_id["id"]).first()
+        identity = get_jwt_identity()
+        fresh = request.args.get("fresh", "").lower() in ("1", "true")
+
+        # Access tokens issued at login carry every field, and they are signature-verified
+        if not fresh and isinstance(identity, dict) and all(claim in identity for claim in CURRENT_USER_CLAIMS):
+            return jsonify({
+                "id": identity["id"],
+                "fullName": identity["name"],
+                "email": identity["email"],
+                "role": identity["role_id"]
+            }), 200
+
+        account_id = identity["id"] if isinstance(identity, dict) else identity
+        user = load_current_user(account_id, fresh=fresh)
 
         if not user:
             return jsonify({"error": "User not found"}), 404
 
-        return jsonify({
-            "id": user.account_id,
-            "fullName": user.name,
-            "email": user.email,
-            "role": user.role_id
-        }), 200
+        return jsonify(user), 200
 
     except Exception as e:
         return jsonify({"error": "An error occurred while fetching user info", "details": str(e)}), 500
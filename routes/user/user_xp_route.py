@@ -1,8 +1,11 @@
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, Resource, fields, inputs
 from flask import request
-from models import Course, UserXP
-from database import db
+from sqlalchemy import delete, exists, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from models import Account, Course, UserXP, UserXPTotal
+from database import db, insert_if_absent
+from leaderboard import leaderboards
 
 api = Namespace('xp', description='Operations related to XP management')
 
@@ -10,6 +13,95 @@ def get_user_id():
     student_identity = get_jwt_identity()
     return student_identity["id"] if isinstance(student_identity, dict) else student_identity
 
+def add_to_xp_total(user_id, xp_earned):
+    """
+    Add earned XP to the user's maintained total. Must run in the same
+    transaction as the UserXP insert so the two never disagree.
+    """
+    insert_if_absent(UserXPTotal, {"user_id": user_id, "total_xp": 0}, unique_on=("user_id",))
+    db.session.execute(
+        update(UserXPTotal)
+        .where(UserXPTotal.user_id == user_id)
+        .values(total_xp=UserXPTotal.total_xp + xp_earned, updated_at=func.current_timestamp())
+    )
+
+def xp_total_query(user_id):
+    return select(UserXPTotal.total_xp).where(UserXPTotal.user_id == user_id)
+
+def get_xp_total(user_id):
+    total_xp = db.session.scalar(xp_total_query(user_id))
+    return total_xp if total_xp else 0
+
+def reconcile_xp_totals():
+    """
+    Recompute every user's total from UserXP and repair the UserXPTotal rows
+    that drifted. Set-based: the totals are summed in the same statement that
+    writes them, so XP added while this runs is not overwritten with an older
+    sum. Returns the number of (inserted, updated, deleted) rows.
+    """
+    totals_table = UserXPTotal.__table__
+    actual = (
+        select(UserXP.user_id, func.sum(UserXP.xp_earned).label("total_xp"))
+        .group_by(UserXP.user_id)
+        .subquery()
+    )
+
+    deleted = db.session.execute(
+        delete(totals_table).where(~exists().where(UserXP.user_id == totals_table.c.user_id))
+    ).rowcount
+    # UPDATE ... FROM the sums
+    updated = db.session.execute(
+        update(totals_table)
+        .where(totals_table.c.user_id == actual.c.user_id, totals_table.c.total_xp != actual.c.total_xp)
+        .values(total_xp=actual.c.total_xp, updated_at=func.current_timestamp())
+    ).rowcount
+    inserted = db.session.execute(
+        insert(totals_table).from_select(
+            ["user_id", "total_xp"],
+            select(actual.c.user_id, actual.c.total_xp)
+            .where(~exists().where(totals_table.c.user_id == actual.c.user_id))
+        )
+    ).rowcount
+    db.session.commit()
+
+    return inserted, updated, deleted
+
+def global_xp_scores():
+    return db.session.execute(select(UserXPTotal.user_id, UserXPTotal.total_xp)).all()
+
+def course_xp_scores(course_id):
+    # UserXP holds at most one row per (user, course)
+    return db.session.execute(
+        select(UserXP.user_id, UserXP.xp_earned).where(UserXP.course_id == course_id)
+    ).all()
+
+def leaderboard_response(board, args):
+    user_id = get_user_id()
+    entries = board.top(args['limit'], args['offset'])
+    around_me = board.around(user_id, args['radius']) if args['radius'] else []
+
+    user_ids = {entry["user_id"] for entry in entries + around_me}
+    names = dict(db.session.execute(
+        select(Account.account_id, Account.name).where(Account.account_id.in_(user_ids))
+    ).all()) if user_ids else {}
+    for entry in entries + around_me:
+        entry["name"] = names.get(entry["user_id"])
+
+    return {
+        "entries": entries,
+        "me": board.rank(user_id),
+        "around_me": around_me,
+        "total_users": len(board)
+    }
+
+leaderboard_parser = api.parser()
+leaderboard_parser.add_argument('limit', type=inputs.int_range(1, 100), default=10, location='args',
+                                help='Number of entries from the top')
+leaderboard_parser.add_argument('offset', type=inputs.natural, default=0, location='args',
+                                help='Number of entries to skip from the top')
+leaderboard_parser.add_argument('radius', type=inputs.int_range(0, 50), default=0, location='args',
+                                help='Return this many neighbours on each side of the current user')
+
 xp_model = api.model('XPModel', {
     'course_id': fields.Integer(required=True, description='The ID of the course'),
     'xp_earned': fields.Integer(required=True, description='The amount of XP earned')
@@ -41,18 +133,33 @@ class AddXP(Resource):
                 print("Missing fields: course_id or xp_earned")
                 return {'error': 'Missing required fields'}, 400
 
-            existing_xp = db.session.query(UserXP).filter_by(user_id=user_id, course_id=course_id).first()
-            if existing_xp:
+            created = insert_if_absent(
+                UserXP,
+                {"user_id": user_id, "course_id": course_id, "xp_earned": xp_earned},
+                unique_on=("user_id", "course_id"),
+                where=[exists(select(Course.course_id).where(Course.course_id == course_id))]
+            )
+            if created:
+                add_to_xp_total(user_id, xp_earned)
+            db.session.commit()
+
+            if not created:
+                if not db.session.query(Course.course_id).filter_by(course_id=course_id).first():
+                    return {'error': 'Course not found'}, 404
+
                 print(f"XP already exists for user_id={user_id}, course_id={course_id}")
                 return {'error': 'XP already added for this course and user'}, 400
 
-            new_xp = UserXP(user_id=user_id, course_id=course_id, xp_earned=xp_earned)
-            db.session.add(new_xp)
-            db.session.commit()
+            leaderboards.record(user_id, course_id, xp_earned)
 
             print(f"XP successfully added for user_id={user_id}, course_id={course_id}, xp_earned={xp_earned}")
             return {'message': 'XP successfully added'}, 201
 
+        except IntegrityError:
+            # The unique (user_id, course_id) index caught a concurrent duplicate
+            db.session.rollback()
+            return {'error': 'XP already added for this course and user'}, 400
+
         except Exception as e:
             print("Error adding XP:", str(e))
             db.session.rollback()
@@ -80,8 +187,7 @@ class GetUserTotalXP(Resource):
     def get(self, user_id):
         """Get the total XP for a specific user by user_id"""
         try:
-            total_xp = db.session.query(db.func.sum(UserXP.xp_earned)).filter_by(user_id=user_id).scalar()
-            total_xp = total_xp if total_xp else 0
+            total_xp = get_xp_total(user_id)
 
             print(f"Total XP for user_id={user_id}: {total_xp}")
             return {'user_id': user_id, 'total_xp': total_xp}, 200
@@ -111,8 +217,7 @@ class GetCurrentUserTotalXP(Resource):
             user_id = get_user_id()
             print("User ID from token:", user_id)
 
-            total_xp = db.session.query(db.func.sum(UserXP.xp_earned)).filter_by(user_id=user_id).scalar()
-            total_xp = total_xp if total_xp else 0
+            total_xp = get_xp_total(user_id)
 
             print(f"Total XP for current user_id={user_id}: {total_xp}")
             return {'user_id': user_id, 'total_xp': total_xp}, 200
@@ -122,3 +227,40 @@ class GetCurrentUserTotalXP(Resource):
             return {'error': 'Internal server error', 'details': str(e)}, 500
 
 
+
+
+
+@api.route('/leaderboard')
+class GlobalLeaderboard(Resource):
+    @jwt_required()
+    @api.expect(leaderboard_parser)
+    @api.response(200, 'Leaderboard retrieved successfully.')
+    @api.response(500, 'Internal server error.')
+    def get(self):
+        """Get the global XP leaderboard, the current user's rank and neighbourhood"""
+        args = leaderboard_parser.parse_args()
+        try:
+            board = leaderboards.get(None, global_xp_scores)
+            return leaderboard_response(board, args), 200
+
+        except Exception as e:
+            print("Error retrieving leaderboard:", str(e))
+            return {'error': 'Internal server error', 'details': str(e)}, 500
+
+
+@api.route('/leaderboard/<int:course_id>')
+class CourseLeaderboard(Resource):
+    @jwt_required()
+    @api.expect(leaderboard_parser)
+    @api.response(200, 'Leaderboard retrieved successfully.')
+    @api.response(500, 'Internal server error.')
+    def get(self, course_id):
+        """Get the XP leaderboard of one course, the current user's rank and neighbourhood"""
+        args = leaderboard_parser.parse_args()
+        try:
+            board = leaderboards.get(course_id, lambda: course_xp_scores(course_id))
+            return leaderboard_response(board, args), 200
+
+        except Exception as e:
+            print("Error retrieving course leaderboard:", str(e))
+            return {'error': 'Internal server error', 'details': str(e)}, 500
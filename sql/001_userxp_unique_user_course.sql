@@ -0,0 +1,11 @@
+-- XP can only be earned once per (user, course). AddXP.post relies on this
+-- index to stay correct under concurrent requests.
+
+-- Keep the first XP row of any duplicates created before the index existed
+WITH ranked AS (
+    SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id, course_id ORDER BY id) AS row_number
+    FROM UserXP
+)
+DELETE FROM ranked WHERE row_number > 1;
+
+CREATE UNIQUE INDEX UQ_UserXP_user_course ON UserXP (user_id, course_id);
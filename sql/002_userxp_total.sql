@@ -0,0 +1,16 @@
+-- Per-user XP totals maintained by AddXP.post in the same transaction as the
+-- UserXP insert, so the total endpoints are a primary key lookup.
+CREATE TABLE UserXPTotal (
+    user_id INT NOT NULL,
+    total_xp BIGINT NOT NULL DEFAULT ((0)),
+    updated_at DATETIME NULL DEFAULT (getdate()),
+    CONSTRAINT PK_UserXPTotal PRIMARY KEY (user_id),
+    CONSTRAINT FK_UserXPTotal_Account FOREIGN KEY (user_id) REFERENCES Account (account_id) ON DELETE CASCADE
+);
+
+INSERT INTO UserXPTotal (user_id, total_xp)
+SELECT user_id, SUM(CAST(xp_earned AS BIGINT))
+FROM UserXP
+GROUP BY user_id;
+
+-- Drift can be repaired at any time with: flask xp reconcile-totals
@@ -0,0 +1,5 @@
+-- JeopardyByIdResource.get reads a board's subjects and its cells ordered by
+-- (RowNumber, ColumnNumber); these indexes serve both without a sort.
+CREATE INDEX IX_Subjects_jeopardy ON Subjects (subject_jeopardy_id, subject_Id);
+
+CREATE INDEX IX_JeopardyCells_board_position ON JeopardyCells (jeopardy_cell_jeopardy_id, RowNumber, ColumnNumber);
@@ -0,0 +1,24 @@
+-- Results of live Jeopardy games (game_sessions.py). A row is written by the
+-- worker's result writer when the host finishes the game; the game state
+-- itself only lives in memory while it is played.
+CREATE TABLE JeopardySession (
+    jeopardy_session_id INT IDENTITY(1,1) NOT NULL,
+    session_key VARCHAR(32) NOT NULL,
+    jeopardy_id INT NOT NULL,
+    started DATETIME NOT NULL,
+    finished DATETIME NOT NULL,
+    answered_cells INT NOT NULL,
+    CONSTRAINT PK_JeopardySession PRIMARY KEY (jeopardy_session_id),
+    CONSTRAINT FK_JeopardySession_Jeopardy FOREIGN KEY (jeopardy_id) REFERENCES Jeopardy (jeopardy_id) ON DELETE CASCADE
+);
+
+CREATE UNIQUE INDEX UQ_JeopardySession_session_key ON JeopardySession (session_key);
+
+CREATE TABLE JeopardySessionTeam (
+    jeopardy_session_id INT NOT NULL,
+    team_index INT NOT NULL,
+    team_name NVARCHAR(255) NOT NULL,
+    score INT NOT NULL,
+    CONSTRAINT PK_JeopardySessionTeam PRIMARY KEY (jeopardy_session_id, team_index),
+    CONSTRAINT FK_JeopardySessionTeam_JeopardySession FOREIGN KEY (jeopardy_session_id) REFERENCES JeopardySession (jeopardy_session_id) ON DELETE CASCADE
+);
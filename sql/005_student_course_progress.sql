@@ -0,0 +1,20 @@
+-- Completed elements per (student, course), maintained by the progress buffer
+-- flush (progress.py) in the same transaction as the StudentCourseElement
+-- inserts, so course completion is a primary key lookup instead of a COUNT join.
+CREATE TABLE StudentCourseProgress (
+    student_id INT NOT NULL,
+    course_id BIGINT NOT NULL,
+    completed_elements INT NOT NULL DEFAULT ((0)),
+    updated_at DATETIME NULL DEFAULT (getdate()),
+    CONSTRAINT PK_StudentCourseProgress PRIMARY KEY (student_id, course_id),
+    CONSTRAINT FK_StudentCourseProgress_Course FOREIGN KEY (course_id) REFERENCES Course (course_id) ON DELETE CASCADE,
+    CONSTRAINT FK_StudentCourseProgress_Account FOREIGN KEY (student_id) REFERENCES Account (account_id) ON DELETE CASCADE
+);
+
+INSERT INTO StudentCourseProgress (student_id, course_id, completed_elements)
+SELECT sce.student_id, ce.course_id, COUNT(*)
+FROM StudentCourseElement sce
+JOIN CourseElement ce ON ce.course_element_id = sce.course_element_id
+GROUP BY sce.student_id, ce.course_id;
+
+-- Drift can be repaired at any time with: flask progress reconcile-counters
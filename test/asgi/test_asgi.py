@@ -0,0 +1,170 @@
+import asyncio
+import json
+import threading
+
+import pytest
+from sqlalchemy import event
+
+from asgi import create_asgi_app
+from async_database import async_db
+from cache import course_cache
+from database import db
+from models import Course, StudentCourse, UserXPTotal
+
+
+def run(asgi_app, requests):
+    """Send the (method, path, headers, body) requests concurrently and return the responses."""
+    async def send_request(method, path, headers=None, body=None):
+        path, _, query_string = path.partition("?")
+        payload = json.dumps(body).encode() if body is not None else b""
+        if body is not None:
+            headers = {**(headers or {}), "Content-Type": "application/json", "Content-Length": str(len(payload))}
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "root_path": "",
+            "query_string": query_string.encode(),
+            "headers": [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 50000)
+        }
+        messages = [{"type": "http.request", "body": payload, "more_body": False}]
+        response = {"body": b""}
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = {name.decode(): value.decode() for name, value in message["headers"]}
+            else:
+                response["body"] += message.get("body", b"")
+
+        await asgi_app(scope, receive, send)
+        response["json"] = json.loads(response["body"]) if response["body"] else None
+        return response
+
+    async def main():
+        try:
+            return await asyncio.gather(*(send_request(*request) for request in requests))
+        finally:
+            await async_db.dispose(asgi_app.flask_app)
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def asgi_app(file_app):
+    return create_asgi_app(file_app)
+
+
+@pytest.fixture
+def async_statements(asgi_app):
+    statements = []
+    engine = asgi_app.flask_app.extensions["async_db"].sync_engine
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count_statement)
+
+
+def test_course_is_read_through_the_async_engine(asgi_app, async_statements):
+    created = run(asgi_app, [("POST", "/course", {}, {
+        "courseTitle": "Python",
+        "courseDescription": "Intro",
+        "elements": [{"type": "Text", "text": "Hello"}, {"type": "Input", "label": "2+2", "answer": "4"}]
+    })])[0]
+    assert created["status"] == 201
+    course_id = created["json"]["course"]["id"]
+    assert async_statements == []
+
+    response, = run(asgi_app, [("GET", f"/course/{course_id}")])
+
+    assert response["status"] == 200
+    assert len(async_statements) == 2
+    course = response["json"]["course"]
+    assert [element["type"] for element in course["elements"]] == ["Text", "Input"]
+    assert response["json"] == asgi_app.flask_app.test_client().get(f"/course/{course_id}").get_json()
+
+    not_modified, = run(asgi_app, [("GET", f"/course/{course_id}", {"If-None-Match": response["headers"]["etag"]})])
+    assert not_modified["status"] == 304
+
+
+def test_course_cache_is_used_off_the_event_loop(asgi_app, monkeypatch):
+    created = run(asgi_app, [("POST", "/course", {}, {"courseTitle": "Python", "courseDescription": "Intro", "elements": []})])[0]
+    course_id = created["json"]["course"]["id"]
+    threads = []
+
+    def on_thread(method):
+        def wrapper(*args):
+            threads.append(threading.current_thread())
+            return method(*args)
+        return wrapper
+
+    monkeypatch.setattr(course_cache, "get", on_thread(course_cache.get))
+    monkeypatch.setattr(course_cache, "set", on_thread(course_cache.set))
+
+    miss, hit = run(asgi_app, [("GET", f"/course/{course_id}"), ("GET", f"/course/{course_id}")])
+
+    assert miss["status"] == hit["status"] == 200
+    assert len(threads) >= 3
+    assert threading.main_thread() not in threads
+
+
+def test_course_list_pages_and_falls_back_for_streams(asgi_app, async_statements):
+    db.session.add_all([Course(course_title=f"Course {index}", course_description="") for index in range(5)])
+    db.session.commit()
+
+    page, streamed = run(asgi_app, [("GET", "/course?limit=2"), ("GET", "/course?stream=true")])
+
+    assert [course["id"] for course in page["json"]["courses"]] == [1, 2]
+    assert page["json"]["nextCursor"] == 2
+    assert len(streamed["json"]["courses"]) == 5
+    assert len(async_statements) == 2
+
+
+def test_jeopardy_board_is_read_through_the_async_engine(asgi_app, async_statements, create_board):
+    client = asgi_app.flask_app.test_client()
+    jeopardy_id = create_board(client, rows=2, subjects=("Python", "SQL", "Git"))
+
+    response, missing = run(asgi_app, [("GET", f"/jeopardy/{jeopardy_id}"), ("GET", "/jeopardy/999")])
+
+    assert response["status"] == 200
+    assert len(async_statements) == 4
+    assert response["json"] == client.get(f"/jeopardy/{jeopardy_id}").get_json()
+    assert missing["status"] == 404
+
+
+def test_authenticated_reads(asgi_app, student):
+    db.session.add(Course(course_title="Python", course_description=""))
+    db.session.add(UserXPTotal(user_id=student.account_id, total_xp=42))
+    db.session.flush()
+    db.session.add(StudentCourse(student_id=student.account_id, course_id=1, completed=False))
+    db.session.commit()
+
+    total, enrolled, anonymous = run(asgi_app, [
+        ("GET", "/xp/total", student.headers),
+        ("GET", "/course/enrollment/enrolled", student.headers),
+        ("GET", "/xp/total")
+    ])
+
+    assert total["json"] == {"user_id": student.account_id, "total_xp": 42}
+    assert enrolled["json"]["courses"][0]["enrolled"] is True
+    assert anonymous["status"] == 401
+
+
+def test_concurrent_reads(asgi_app):
+    db.session.add(Course(course_title="Python", course_description=""))
+    db.session.commit()
+
+    responses = run(asgi_app, [("GET", "/course/1")] * 25 + [("GET", "/jeopardy")] * 25)
+
+    assert [response["status"] for response in responses] == [200] * 50
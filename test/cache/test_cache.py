@@ -0,0 +1,30 @@
+from cache import LRUCache, SQLiteCacheBackend, VersionedCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_shared_backend_invalidation_is_seen_by_other_workers(tmp_path):
+    path = str(tmp_path / "cache.db")
+    worker_a = VersionedCache("course")
+    worker_b = VersionedCache("course")
+    worker_a.shared = SQLiteCacheBackend(path)
+    worker_b.shared = SQLiteCacheBackend(path)
+
+    worker_a.set(1, {"id": 1, "courseTitle": "Old"})
+    assert worker_b.get(1) == {"id": 1, "courseTitle": "Old"}
+
+    worker_a.invalidate(1)
+
+    assert worker_b.get(1) is None
+    worker_b.set(1, {"id": 1, "courseTitle": "New"})
+    assert worker_a.get(1) == {"id": 1, "courseTitle": "New"}
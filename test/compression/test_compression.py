@@ -0,0 +1,73 @@
+import gzip
+import json
+
+import brotli
+
+from compression import compressed_cache
+from database import db
+from models import Course, CourseElement, TextElement
+
+
+def create_long_course(paragraphs=50):
+    course = Course(course_title="Python", course_description="Intro")
+    db.session.add(course)
+    db.session.flush()
+    for index in range(paragraphs):
+        element = TextElement(text_=f"Afsnit {index}. " + "Lorem ipsum dolor sit amet. " * 20)
+        db.session.add(element)
+        db.session.flush()
+        db.session.add(CourseElement(course_id=course.course_id, element_id=element.text_element_id, element_type="Text"))
+    db.session.commit()
+    return course.course_id
+
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get("/course", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_course_is_gzipped_and_validates_with_the_gzip_etag(client):
+    course_id = create_long_course()
+    plain = client.get(f"/course/{course_id}")
+
+    response = client.get(f"/course/{course_id}", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(response.data) < len(plain.data) / 5
+    assert json.loads(gzip.decompress(response.data)) == plain.get_json()
+    assert response.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+
+    not_modified = client.get(f"/course/{course_id}", headers={
+        "Accept-Encoding": "gzip",
+        "If-None-Match": response.headers["ETag"]
+    })
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == response.headers["ETag"]
+
+
+def test_brotli_is_preferred_and_cached_bodies_are_compressed_once(client):
+    course_id = create_long_course()
+    client.get(f"/course/{course_id}")
+    hits_before = compressed_cache.hits
+
+    first = client.get(f"/course/{course_id}", headers={"Accept-Encoding": "gzip, br"})
+    second = client.get(f"/course/{course_id}", headers={"Accept-Encoding": "gzip, br"})
+
+    assert first.headers["Content-Encoding"] == "br"
+    assert second.data == first.data
+    assert compressed_cache.hits - hits_before == 1
+    assert json.loads(brotli.decompress(second.data))["course"]["id"] == course_id
+
+
+def test_streamed_export_is_compressed_while_streaming(client):
+    db.session.add_all([Course(course_title=f"Course {index}", course_description="Intro") for index in range(1200)])
+    db.session.commit()
+
+    response = client.get("/course?stream=true", headers={"Accept-Encoding": "gzip"})
+
+    assert response.is_streamed
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert len(json.loads(gzip.decompress(response.data))["courses"]) == 1200
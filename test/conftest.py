@@ -0,0 +1,113 @@
+import os
+
+import pytest
+from sqlalchemy import event
+
+os.environ["FLASK_ENV"] = "testing"
+
+from app import create_app
+from database import db
+from models import Base
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+
+    with app.app_context():
+        Base.metadata.create_all(db.engine)
+        yield app
+        db.session.remove()
+        Base.metadata.drop_all(db.engine)
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """An app backed by a SQLite file, for tests that use several connections at once."""
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}"})
+
+    with app.app_context():
+        Base.metadata.create_all(db.engine)
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def create_board():
+    """Create a Jeopardy board through the API; returns create(client, rows, subjects) -> its id."""
+    def create(client, rows=2, subjects=("Python", "SQL")):
+        grid = [
+            [
+                {"value": (row + 1) * 100, "question": f"Q{row}{col}", "answer": f"A{row}{col}"}
+                for col in range(len(subjects))
+            ]
+            for row in range(rows)
+        ]
+        response = client.post("/jeopardy", json={"title": "Quiz", "subjects": list(subjects), "grid": grid})
+        assert response.status_code == 201
+        return response.get_json()["id"]
+
+    return create
+
+
+@pytest.fixture
+def query_counter(app):
+    """Count the SQL statements sent to the database while the fixture is alive."""
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count_statement)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", count_statement)
+
+
+@pytest.fixture
+def student(request):
+    """A student account and the Authorization header of its access token."""
+    request.getfixturevalue("file_app" if "file_app" in request.fixturenames else "app")
+    from flask_jwt_extended import create_access_token
+    from models import Account, Role
+
+    db.session.add(Role(id=1, role="student"))
+    account = Account(name="Test Student", email="student@example.com", password="not-a-hash", role_id=1)
+    db.session.add(account)
+    db.session.commit()
+
+    token = create_access_token(identity={
+        "id": account.account_id,
+        "email": account.email,
+        "name": account.name,
+        "role_id": account.role_id
+    })
+    account.headers = {"Authorization": f"Bearer {token}"}
+    return account
+
+
+@pytest.fixture
+def admin(request):
+    """An admin account and the Authorization header of its access token."""
+    request.getfixturevalue("file_app" if "file_app" in request.fixturenames else "app")
+    from flask_jwt_extended import create_access_token
+    from models import Account, Role
+
+    db.session.add(Role(id=2, role="admin"))
+    account = Account(name="Test Admin", email="admin@example.com", password="not-a-hash", role_id=2)
+    db.session.add(account)
+    db.session.commit()
+
+    token = create_access_token(identity={
+        "id": account.account_id,
+        "email": account.email,
+        "name": account.name,
+        "role_id": account.role_id
+    })
+    account.headers = {"Authorization": f"Bearer {token}"}
+    return account
@@ -0,0 +1,346 @@
+from database import db
+from models import Course, CourseElement, StudentCourse, StudentCourseElement, StudentCourseProgress
+from progress import progress_buffer
+
+
+def create_courses(count):
+    courses = [Course(course_title=f"Course {index}") for index in range(count)]
+    db.session.add_all(courses)
+    db.session.commit()
+    return [course.course_id for course in courses]
+
+
+def test_enrolled_courses_flags_enrollments(client, student, query_counter):
+    course_ids = create_courses(3)
+    db.session.add(StudentCourse(student_id=student.account_id, course_id=course_ids[1], completed=True))
+    db.session.commit()
+
+    query_counter.clear()
+    response = client.get("/course/enrollment/enrolled", headers=student.headers)
+
+    courses = response.get_json()["courses"]
+    assert [course["enrolled"] for course in courses] == [False, True, False]
+    assert courses[1]["completed"] is True
+    assert courses[1]["enrolledAt"] is not None
+    assert courses[0]["enrolledAt"] is None
+    assert len(query_counter) == 1
+
+
+def test_enrolled_courses_ignores_other_students(client, student):
+    course_ids = create_courses(1)
+    db.session.add(StudentCourse(student_id=student.account_id + 1, course_id=course_ids[0]))
+    db.session.commit()
+
+    courses = client.get("/course/enrollment/enrolled", headers=student.headers).get_json()["courses"]
+
+    assert courses == [{
+        "id": course_ids[0],
+        "courseTitle": "Course 0",
+        "courseDescription": None,
+        "enrolled": False,
+        "completed": False,
+        "enrolledAt": None
+    }]
+
+
+def test_enrolled_courses_pagination(client, student):
+    create_courses(3)
+
+    page = client.get("/course/enrollment/enrolled?limit=2", headers=student.headers).get_json()
+
+    assert len(page["courses"]) == 2
+    assert page["nextCursor"] == page["courses"][-1]["id"]
+
+
+def test_batch_enrollment_reports_per_item_results(client, student, query_counter):
+    course_ids = create_courses(3)
+    db.session.add(StudentCourse(student_id=student.account_id, course_id=course_ids[0]))
+    db.session.commit()
+
+    query_counter.clear()
+    response = client.post(
+        "/course/enrollment/batch",
+        json={"course_ids": course_ids + [999]},
+        headers=student.headers
+    )
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [result["status"] for result in body["results"]] == [
+        "already_enrolled", "enrolled", "enrolled", "course_not_found"
+    ]
+    assert body["summary"] == {"already_enrolled": 1, "enrolled": 2, "course_not_found": 1}
+    assert db.session.query(StudentCourse).count() == 3
+    assert len([statement for statement in query_counter if statement.startswith("INSERT")]) == 1
+
+
+def test_batch_enrollment_of_other_students_requires_admin(client, student):
+    course_ids = create_courses(1)
+
+    response = client.post(
+        "/course/enrollment/batch",
+        json={"items": [{"student_id": student.account_id + 1, "course_id": course_ids[0]}]},
+        headers=student.headers
+    )
+
+    assert response.status_code == 403
+
+
+def test_batch_enrollment_reports_unknown_students(client, admin, student):
+    course_id = create_courses(1)[0]
+
+    response = client.post(
+        "/course/enrollment/batch",
+        json={"items": [
+            {"student_id": student.account_id, "course_id": course_id},
+            {"student_id": 999, "course_id": course_id}
+        ]},
+        headers=admin.headers
+    )
+
+    assert response.status_code == 200
+    assert [result["status"] for result in response.get_json()["results"]] == ["enrolled", "student_not_found"]
+    assert db.session.query(StudentCourse).count() == 1
+
+
+def test_existing_pairs_queries_grow_with_the_pairs(app, query_counter):
+    from database import existing_pairs
+
+    course_ids = create_courses(2)
+    db.session.add(StudentCourse(student_id=7, course_id=course_ids[1]))
+    db.session.commit()
+    # 600 distinct students and courses: 2 x 2 queries when chunking each
+    # column on its own, 2 when chunking the pairs
+    pairs = [(student_id, 10_000 + student_id) for student_id in range(600)] + [(7, course_ids[1])]
+    query_counter.clear()
+
+    assert existing_pairs(StudentCourse.student_id, StudentCourse.course_id, pairs) == {(7, course_ids[1])}
+    assert len(query_counter) == 2
+
+
+def test_batch_unenrollment(client, student):
+    course_ids = create_courses(2)
+    db.session.add(StudentCourse(student_id=student.account_id, course_id=course_ids[0]))
+    db.session.commit()
+
+    response = client.delete("/course/enrollment/batch", json={"course_ids": course_ids}, headers=student.headers)
+
+    assert [result["status"] for result in response.get_json()["results"]] == ["unenrolled", "not_enrolled"]
+    assert db.session.query(StudentCourse).count() == 0
+
+
+def test_concurrent_enrollment_creates_one_row(file_app, student):
+    from concurrent.futures import ThreadPoolExecutor
+
+    course_id = create_courses(1)[0]
+    client = file_app.test_client()
+
+    def enroll(_):
+        return client.post(f"/course/enrollment/{course_id}", headers=student.headers).status_code
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        status_codes = list(executor.map(enroll, range(64)))
+
+    assert status_codes.count(201) == 1
+    assert status_codes.count(200) == 63
+    assert db.session.query(StudentCourse).count() == 1
+
+
+def create_elements(course_id, count):
+    elements = [CourseElement(course_id=course_id, element_id=index, element_type="Text") for index in range(count)]
+    db.session.add_all(elements)
+    db.session.commit()
+    return [element.course_element_id for element in elements]
+
+
+def test_progress_is_buffered_and_written_in_one_insert(client, student, query_counter):
+    enrolled_course, other_course = create_courses(2)
+    db.session.add(StudentCourse(student_id=student.account_id, course_id=enrolled_course))
+    db.session.commit()
+    enrolled_elements = create_elements(enrolled_course, 3)
+    other_elements = create_elements(other_course, 2)
+
+    for element_ids in ([enrolled_elements[0], enrolled_elements[1]], [enrolled_elements[1], enrolled_elements[2]], other_elements + [999]):
+        response = client.post("/course/enrollment/progress", json={"course_element_ids": element_ids}, headers=student.headers)
+        assert response.status_code == 202
+
+    assert db.session.query(StudentCourseElement).count() == 0
+    assert progress_buffer.pending() == 6
+
+    query_counter.clear()
+    assert progress_buffer.flush() == 3
+    assert len([statement for statement in query_counter if statement.startswith('INSERT INTO "StudentCourseElement"')]) == 1
+
+    query_counter.clear()
+    progress = client.get("/course/enrollment/progress", headers=student.headers).get_json()
+    assert progress == {"courses": [{"course_id": enrolled_course, "completed_elements": 3}]}
+    assert len(query_counter) == 1
+
+    elements = client.get(f"/course/enrollment/{enrolled_course}/progress", headers=student.headers).get_json()["elements"]
+    assert [element["course_element_id"] for element in elements] == enrolled_elements
+
+
+def test_progress_flushes_when_buffer_is_full(app, client, student):
+    course_id = create_courses(1)[0]
+    db.session.add(StudentCourse(student_id=student.account_id, course_id=course_id))
+    db.session.commit()
+    element_ids = create_elements(course_id, 4)
+    progress_buffer.flush_size = 4
+
+    client.post("/course/enrollment/progress", json={"course_element_ids": element_ids[:3]}, headers=student.headers)
+    assert db.session.query(StudentCourseElement).count() == 0
+
+    client.post("/course/enrollment/progress", json={"course_element_ids": element_ids[3:]}, headers=student.headers)
+    assert db.session.query(StudentCourseElement).count() == 4
+    assert progress_buffer.pending() == 0
+
+
+def test_progress_flush_thread_writes_on_a_timer(file_app, student):
+    import time
+
+    course_id = create_courses(1)[0]
+    db.session.add(StudentCourse(student_id=student.account_id, course_id=course_id))
+    db.session.commit()
+    element_ids = create_elements(course_id, 2)
+    progress_buffer.flush_seconds = 0.05
+    written = progress_buffer.written
+
+    response = file_app.test_client().post("/course/enrollment/progress", json={"course_element_ids": element_ids}, headers=student.headers)
+    assert response.status_code == 202
+
+    deadline = time.monotonic() + 5
+    while progress_buffer.written < written + 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    progress_buffer.flush_seconds = 0
+
+    db.session.expire_all()
+    assert db.session.query(StudentCourseElement).count() == 2
+
+
+def test_progress_is_refused_when_too_much_is_pending(client, student):
+    element_ids = create_elements(create_courses(1)[0], 3)
+    progress_buffer.max_pending = 2
+
+    # A batch that would take the buffer past the cap is refused as a whole
+    response = client.post("/course/enrollment/progress", json={"course_element_ids": element_ids}, headers=student.headers)
+    assert response.status_code == 503
+    assert progress_buffer.pending() == 0
+
+    response = client.post("/course/enrollment/progress", json={"course_element_ids": element_ids[:2]}, headers=student.headers)
+    assert response.status_code == 202
+
+    response = client.post("/course/enrollment/progress", json={"course_element_ids": element_ids[2:]}, headers=student.headers)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert progress_buffer.pending() == 2
+
+
+def test_progress_rejected_twice_is_written_one_by_one(student, monkeypatch):
+    import progress
+
+    course_id, element_ids = enroll_with_elements(student, 3)
+    db.session.add(StudentCourseElement(student_id=student.account_id, course_element_id=element_ids[0]))
+    db.session.commit()
+
+    # The existence check keeps missing the row, so every bulk insert conflicts
+    real_existing_pairs = progress.existing_pairs
+    monkeypatch.setattr(progress, "existing_pairs", lambda first, second, pairs: (
+        set() if first is StudentCourseElement.student_id else real_existing_pairs(first, second, pairs)
+    ))
+
+    progress_buffer.add(student.account_id, element_ids)
+    assert progress_buffer.flush() == 2
+    assert progress_buffer.pending() == 0
+    assert db.session.query(StudentCourseElement).count() == 3
+    assert db.session.get(StudentCourseProgress, (student.account_id, course_id)).completed_elements == 2
+
+
+def enroll_with_elements(student, count):
+    course_id = create_courses(1)[0]
+    db.session.add(StudentCourse(student_id=student.account_id, course_id=course_id))
+    db.session.commit()
+    return course_id, create_elements(course_id, count)
+
+
+def report_progress(client, student, element_ids):
+    client.post("/course/enrollment/progress", json={"course_element_ids": element_ids}, headers=student.headers)
+    progress_buffer.flush()
+
+
+def test_completion_status_comes_from_progress_counter(client, student, query_counter):
+    course_id, element_ids = enroll_with_elements(student, 4)
+
+    report_progress(client, student, element_ids[:2])
+    report_progress(client, student, element_ids[1:3])
+
+    counter = db.session.get(StudentCourseProgress, (student.account_id, course_id))
+    assert counter.completed_elements == 3
+
+    status = client.get(f"/course/enrollment/{course_id}/complete", headers=student.headers).get_json()
+    assert status == {"completed": False, "completedElements": 3, "totalElements": 4, "percentage": 75}
+
+    # The element count is cached, the status is one primary key lookup
+    query_counter.clear()
+    client.get(f"/course/enrollment/{course_id}/complete", headers=student.headers)
+    assert len(query_counter) == 1
+
+    report_progress(client, student, element_ids[3:])
+    status = client.get(f"/course/enrollment/{course_id}/complete", headers=student.headers).get_json()
+    assert status == {"completed": True, "completedElements": 4, "totalElements": 4, "percentage": 100}
+    db.session.expire_all()
+    assert db.session.query(StudentCourse).one().completed is True
+
+
+def test_course_can_only_be_completed_after_its_elements(client, student):
+    course_id, element_ids = enroll_with_elements(student, 2)
+    report_progress(client, student, element_ids[:1])
+
+    response = client.post(f"/course/enrollment/{course_id}/complete", headers=student.headers)
+    assert response.status_code == 409
+    assert response.get_json()["completedElements"] == 1
+    assert response.headers["Retry-After"] == "1"
+
+    # Still in the buffer, the completion writes it first
+    client.post("/course/enrollment/progress", json={"course_element_ids": element_ids[1:]}, headers=student.headers)
+    response = client.post(f"/course/enrollment/{course_id}/complete", headers=student.headers)
+    assert response.status_code == 200
+    db.session.expire_all()
+    assert db.session.query(StudentCourse).one().completed is True
+
+
+def test_completion_flushes_only_the_students_progress(client, student, monkeypatch):
+    import progress
+
+    course_id, element_ids = enroll_with_elements(student, 1)
+    progress_buffer.add(student.account_id + 1, element_ids)
+    client.post("/course/enrollment/progress", json={"course_element_ids": element_ids}, headers=student.headers)
+
+    assert client.post(f"/course/enrollment/{course_id}/complete", headers=student.headers).status_code == 200
+    assert progress_buffer.pending() == 1
+
+    # A failing flush falls back to the counter instead of failing the request
+    monkeypatch.setattr(progress, "save_element_progress", lambda entries: 1 / 0)
+    progress_buffer.add(student.account_id, element_ids)
+    assert client.post(f"/course/enrollment/{course_id}/complete", headers=student.headers).status_code == 200
+
+
+def test_reconcile_progress_counters_fixes_drift(app, client, student):
+    from progress import reconcile_progress_counters
+
+    course_id, element_ids = enroll_with_elements(student, 3)
+    other_course_id, other_element_ids = enroll_with_elements(student, 1)
+    empty_course_id = create_courses(1)[0]
+    report_progress(client, student, element_ids + other_element_ids)
+    db.session.query(StudentCourseElement).filter_by(course_element_id=element_ids[0]).delete()
+    db.session.query(StudentCourseProgress).filter_by(course_id=other_course_id).delete()
+    db.session.add(StudentCourseProgress(student_id=student.account_id, course_id=empty_course_id, completed_elements=2))
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["progress", "reconcile-counters"])
+
+    assert "1 inserted, 1 updated, 1 deleted" in result.output
+    db.session.expire_all()
+    assert db.session.get(StudentCourseProgress, (student.account_id, course_id)).completed_elements == 2
+    assert db.session.get(StudentCourseProgress, (student.account_id, other_course_id)).completed_elements == 1
+    assert db.session.get(StudentCourseProgress, (student.account_id, empty_course_id)) is None
+    assert reconcile_progress_counters() == (0, 0, 0)
@@ -0,0 +1,202 @@
+from database import db
+from models import Course, CourseElement, InputElement, TextElement
+
+
+def create_course(element_count):
+    course = Course(course_title="Python", course_description="Intro")
+    db.session.add(course)
+    db.session.flush()
+
+    for index in range(element_count):
+        if index % 2 == 0:
+            element = TextElement(text_=f"text {index}")
+            db.session.add(element)
+            db.session.flush()
+            element_id, element_type = element.text_element_id, "Text"
+        else:
+            element = InputElement(label=f"label {index}", answer=f"answer {index}")
+            db.session.add(element)
+            db.session.flush()
+            element_id, element_type = element.input_element_id, "Input"
+
+        db.session.add(CourseElement(course_id=course.course_id, element_id=element_id, element_type=element_type))
+
+    db.session.commit()
+    return course.course_id
+
+
+def test_get_course_returns_elements_in_order(client):
+    course_id = create_course(4)
+
+    response = client.get(f"/course/{course_id}")
+
+    assert response.status_code == 200
+    elements = response.get_json()["course"]["elements"]
+    assert [element["type"] for element in elements] == ["Text", "Input", "Text", "Input"]
+    assert elements[0]["text"] == "text 0"
+    assert elements[1]["label"] == "label 1"
+    assert elements[1]["answer"] == "answer 1"
+    assert [element["id"] for element in elements] == sorted(element["id"] for element in elements)
+
+
+def test_get_course_query_count_is_constant(client, query_counter):
+    small_course_id = create_course(2)
+    large_course_id = create_course(200)
+
+    query_counter.clear()
+    client.get(f"/course/{small_course_id}")
+    small_course_queries = len(query_counter)
+
+    query_counter.clear()
+    response = client.get(f"/course/{large_course_id}")
+    large_course_queries = len(query_counter)
+
+    assert len(response.get_json()["course"]["elements"]) == 200
+    assert large_course_queries == small_course_queries
+
+
+def test_get_course_not_found(client):
+    response = client.get("/course/999")
+
+    assert response.status_code == 404
+
+
+def test_create_course_inserts_elements_in_order(client):
+    elements = [
+        {"type": "Text", "text": "first"},
+        {"type": "Input", "label": "2 + 2", "answer": "4"},
+        {"type": "Text", "text": "last"}
+    ]
+
+    response = client.post("/course", json={"courseTitle": "Math", "courseDescription": "Basics", "elements": elements})
+
+    assert response.status_code == 201
+    course_id = response.get_json()["course"]["id"]
+    course = client.get(f"/course/{course_id}").get_json()["course"]
+    assert [element["type"] for element in course["elements"]] == ["Text", "Input", "Text"]
+    assert course["elements"][0]["text"] == "first"
+    assert course["elements"][1]["answer"] == "4"
+    assert course["elements"][2]["text"] == "last"
+
+
+def test_create_course_links_elements_in_one_batch(client, query_counter):
+    elements = [{"type": "Text", "text": f"text {index}"} for index in range(50)]
+    elements += [{"type": "Input", "label": f"label {index}", "answer": "x"} for index in range(50)]
+
+    response = client.post("/course", json={"courseTitle": "Big", "elements": elements})
+
+    assert response.status_code == 201
+    course_element_inserts = [statement for statement in query_counter if statement.startswith('INSERT INTO "CourseElement"')]
+    assert len(course_element_inserts) == 1
+
+
+def test_create_course_rejects_invalid_element_type(client):
+    response = client.post("/course", json={"courseTitle": "Bad", "elements": [{"type": "Video"}]})
+
+    assert response.status_code == 400
+    assert db.session.query(Course).count() == 0
+
+
+def test_get_course_is_served_from_cache(client, query_counter, admin):
+    course_id = create_course(3)
+    client.get(f"/course/{course_id}")
+
+    query_counter.clear()
+    response = client.get(f"/course/{course_id}")
+
+    assert response.status_code == 200
+    assert len(response.get_json()["course"]["elements"]) == 3
+    assert query_counter == []
+    assert client.get("/course/cache/stats", headers=admin.headers).get_json()["hits"] == 1
+
+
+def test_cache_stats_require_an_admin(client, student):
+    assert client.get("/course/cache/stats").status_code == 401
+    assert client.get("/course/cache/stats", headers=student.headers).status_code == 403
+
+
+def test_course_read_before_an_invalidation_is_not_cached(client):
+    from cache import course_cache
+    from routes.courses.course_route import cache_course, course_elements_query, course_summary_query
+
+    course_id = create_course(1)
+    version = course_cache.version(course_id)
+    course = db.session.execute(course_summary_query(course_id)).first()
+    rows = db.session.execute(course_elements_query(course_id)).all()
+
+    # An update commits and invalidates between the read and the cache write
+    course_cache.invalidate(course_id)
+    cache_course(course, rows, version)
+
+    assert course_cache.get(course_id) is None
+
+
+def test_delete_course_invalidates_cache(client):
+    course_id = create_course(1)
+    client.get(f"/course/{course_id}")
+
+    client.delete(f"/course/{course_id}")
+
+    assert client.get(f"/course/{course_id}").status_code == 404
+
+
+def test_get_course_returns_304_for_matching_etag(client, query_counter):
+    course_id = create_course(2)
+    etag = client.get(f"/course/{course_id}").headers["ETag"]
+
+    query_counter.clear()
+    response = client.get(f"/course/{course_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.data == b""
+    assert query_counter == []
+
+
+def test_get_courses_etag_changes_when_course_is_added(client):
+    create_course(0)
+    first = client.get("/course")
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert client.get("/course", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    create_course(0)
+
+    response = client.get("/course", headers={"If-None-Match": first.headers["ETag"]})
+    assert response.status_code == 200
+    assert len(response.get_json()["courses"]) == 2
+
+
+def test_get_courses_keyset_pagination(client):
+    for _ in range(5):
+        create_course(0)
+
+    first_page = client.get("/course?limit=2").get_json()
+    second_page = client.get(f"/course?limit=2&cursor={first_page['nextCursor']}").get_json()
+    last_page = client.get(f"/course?limit=2&cursor={second_page['nextCursor']}").get_json()
+
+    assert [course["id"] for course in first_page["courses"]] == [1, 2]
+    assert [course["id"] for course in second_page["courses"]] == [3, 4]
+    assert [course["id"] for course in last_page["courses"]] == [5]
+    assert last_page["nextCursor"] is None
+
+
+def test_get_courses_field_projection_and_title_filter(client):
+    db.session.add_all([Course(course_title="Python 101"), Course(course_title="SQL 101"), Course(course_title="Python 201")])
+    db.session.commit()
+
+    response = client.get("/course?fields=courseTitle&title=Python")
+
+    assert response.get_json()["courses"] == [
+        {"id": 1, "courseTitle": "Python 101"},
+        {"id": 3, "courseTitle": "Python 201"}
+    ]
+    assert client.get("/course?fields=secret").status_code == 400
+
+
+def test_get_courses_stream_export(client):
+    for _ in range(3):
+        create_course(0)
+
+    response = client.get("/course?stream=true&fields=id")
+
+    assert response.is_streamed
+    assert response.get_json() == {"courses": [{"id": 1}, {"id": 2}, {"id": 3}]}
@@ -0,0 +1,154 @@
+import threading
+
+import pytest
+from sqlalchemy import select
+
+from database import db
+from game_sessions import GameSession, event_stream, game_sessions, result_writer
+from models import JeopardySession, JeopardySessionTeam
+
+
+@pytest.fixture
+def client(file_app):
+    return file_app.test_client()
+
+
+@pytest.fixture
+def start_session(client, create_board):
+    def start(teams=("Red", "Blue")):
+        response = client.post("/jeopardy/session", json={"jeopardyId": create_board(client), "teams": list(teams)})
+        assert response.status_code == 201
+        data = response.get_json()
+        return data["sessionId"], {"X-Host-Token": data["hostToken"]}
+
+    return start
+
+
+def events(body):
+    return [
+        dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        for block in body.strip().split("\n\n") if not block.startswith(":")
+    ]
+
+
+def test_game_session_moves_scores_and_hides_answers(client, start_session):
+    session_id, host = start_session()
+
+    assert client.post(f"/jeopardy/session/{session_id}/open", json={"row": 1, "column": 0}).status_code == 403
+
+    opened = client.post(f"/jeopardy/session/{session_id}/open", json={"row": 1, "column": 0}, headers=host)
+    assert opened.status_code == 200
+    assert opened.get_json()["session"]["openCell"] == [1, 0]
+    assert client.post(f"/jeopardy/session/{session_id}/open", json={"row": 0, "column": 0}, headers=host).status_code == 409
+
+    client.post(f"/jeopardy/session/{session_id}/resolve", json={"team": 0, "correct": False}, headers=host)
+    state = client.get(f"/jeopardy/session/{session_id}").get_json()["session"]
+
+    assert state["teams"] == [{"team": "Red", "score": -200}, {"team": "Blue", "score": 0}]
+    assert state["turn"] == 1
+    assert state["grid"][1][0] == {"value": 200, "answered": True, "question": "Q10", "answer": "A10"}
+    assert state["grid"][0][0] == {"value": 100, "answered": False}
+    assert client.post(f"/jeopardy/session/{session_id}/open", json={"row": 1, "column": 0}, headers=host).status_code == 409
+
+
+def test_game_session_rejects_booleans_for_numbers(client, start_session):
+    session_id, host = start_session()
+
+    assert client.post("/jeopardy/session", json={"jeopardyId": True, "teams": ["Red"]}).status_code == 400
+    assert client.post(f"/jeopardy/session/{session_id}/open", json={"row": True, "column": 0}, headers=host).status_code == 400
+
+    client.post(f"/jeopardy/session/{session_id}/open", json={"row": 0, "column": 0}, headers=host)
+    assert client.post(f"/jeopardy/session/{session_id}/resolve", json={"team": False, "correct": True}, headers=host).status_code == 400
+
+
+def test_finished_game_is_streamed_and_saved(file_app, client, start_session):
+    session_id, host = start_session()
+    client.post(f"/jeopardy/session/{session_id}/open", json={"row": 0, "column": 1}, headers=host)
+    client.post(f"/jeopardy/session/{session_id}/resolve", json={"team": 1, "correct": True}, headers=host)
+    assert client.post(f"/jeopardy/session/{session_id}/finish", headers=host).status_code == 200
+
+    response = client.get(f"/jeopardy/session/{session_id}/events")
+    assert response.mimetype == "text/event-stream"
+    assert [event["event"] for event in events(response.get_data(as_text=True))] == ["snapshot"]
+
+    resumed = client.get(f"/jeopardy/session/{session_id}/events", headers={"Last-Event-ID": "1"})
+    assert [event["event"] for event in events(resumed.get_data(as_text=True))] == ["resolve", "finish"]
+
+    result_writer.join()
+    saved = db.session.execute(select(JeopardySession)).scalar_one()
+    assert saved.session_key == session_id
+    assert saved.answered_cells == 1
+    teams = db.session.execute(select(JeopardySessionTeam.team_name, JeopardySessionTeam.score)).all()
+    assert [tuple(team) for team in teams] == [("Red", 0), ("Blue", 100)]
+
+
+def test_client_behind_the_event_buffer_gets_a_snapshot():
+    grid = [[{"value": 100, "question": f"Q{col}", "answer": "A"} for col in range(4)]]
+    session = GameSession(1, ["A", "B", "C", "D"], grid, ["Red"], buffer_size=2)
+    for column in range(3):
+        session.open(0, column)
+        session.resolve(0, True)
+
+    assert session.wait_for_events(4, timeout=0) is not None
+    assert session.wait_for_events(3, timeout=0) is None
+
+    session.finish()
+    body = b"".join(event_stream(session, last_event_id=1, heartbeat=0)).decode()
+    assert [event["event"] for event in events(body)] == ["snapshot"]
+
+
+def test_500_clients_follow_one_game(file_app, client, start_session):
+    """
+    497 clients read event_stream directly, which leaves out HTTP and which
+    worker a request reaches; the other 3 stream GET /events through the test
+    client, so the route and the Response wrapping are covered as well.
+    """
+    session_id, host = start_session(teams=("Red", "Blue", "Green"))
+    session = game_sessions.get(session_id)
+
+    received = [None] * 500
+    ready = threading.Barrier(501)
+
+    def follow(index):
+        if index < 3:
+            response = file_app.test_client().get(f"/jeopardy/session/{session_id}/events", buffered=False)
+            stream = iter(response.response)
+        else:
+            stream = event_stream(session, heartbeat=1)
+        chunks = [next(stream)]
+        ready.wait()
+        chunks.extend(stream)
+        received[index] = b"".join(chunks).decode()
+
+    clients = [threading.Thread(target=follow, args=(index,)) for index in range(500)]
+    for thread in clients:
+        thread.start()
+    ready.wait()
+
+    for row in range(2):
+        for column in range(2):
+            client.post(f"/jeopardy/session/{session_id}/open", json={"row": row, "column": column}, headers=host)
+            client.post(f"/jeopardy/session/{session_id}/resolve", json={"team": column, "correct": True}, headers=host)
+    client.post(f"/jeopardy/session/{session_id}/finish", headers=host)
+
+    for thread in clients:
+        thread.join(timeout=30)
+
+    expected = ["snapshot"] + ["open", "resolve"] * 4 + ["finish"]
+    for body in received:
+        game = events(body)
+        assert [event["event"] for event in game] == expected
+        assert [int(event["id"]) for event in game] == list(range(10))
+    assert events(received[-1])[-1]["data"] == (
+        '{"scores":[{"team":"Red","score":300},{"team":"Blue","score":300},{"team":"Green","score":0}]}'
+    )
+
+
+def test_session_of_another_worker_is_a_conflict(client, start_session):
+    session_id, host = start_session()
+    _, token = session_id.split("-")
+
+    assert client.get(f"/jeopardy/session/{session_id[:-1]}x").status_code == 404
+    response = client.get(f"/jeopardy/session/00000000-{token}")
+    assert response.status_code == 409
+    assert response.get_json()["message"] == "Game session is held by another worker"
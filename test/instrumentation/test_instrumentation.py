@@ -0,0 +1,64 @@
+import logging
+
+from sqlalchemy import select
+
+from database import db
+from instrumentation import request_metrics
+from models import Course
+
+
+def test_request_timing_and_queries_are_recorded(client):
+    request_metrics.clear()
+    db.session.add_all([Course(course_title=f"Course {index}", course_description="") for index in range(3)])
+    db.session.commit()
+
+    response = client.get("/course")
+
+    # The version query and the list
+    assert 'desc="2 queries"' in response.headers["Server-Timing"]
+    assert "app;dur=" in response.headers["Server-Timing"]
+
+    client.get("/course/1")
+    client.get("/course/2")
+
+    stats = request_metrics.snapshot()
+    assert stats["GET /course"]["requests"] == 1
+    assert stats["GET /course"]["queries"] == 2
+    assert stats["GET /course/<int:course_id>"]["requests"] == 2
+    assert stats["GET /course/<int:course_id>"]["statuses"] == {200: 2}
+    assert request_metrics.in_flight == 0
+
+
+def test_repeated_statements_are_flagged_as_n_plus_one(app, client, caplog):
+    request_metrics.clear()
+    db.session.add(Course(course_title="Python", course_description=""))
+    db.session.commit()
+
+    def course_titles():
+        for _ in range(app.config["N_PLUS_ONE_THRESHOLD"] + 2):
+            db.session.execute(select(Course.course_title).where(Course.course_id == 1)).scalar()
+        return {"ok": True}
+
+    app.add_url_rule("/test/n-plus-one", view_func=course_titles)
+
+    with caplog.at_level(logging.WARNING):
+        client.get("/test/n-plus-one")
+
+    assert request_metrics.snapshot()["GET /test/n-plus-one"]["n_plus_one"] == 1
+    assert "Possible N+1 in GET /test/n-plus-one" in caplog.text
+
+
+def test_failed_statement_does_not_leave_its_start_time(app, client):
+    from sqlalchemy import text
+
+    def failing_query():
+        try:
+            db.session.execute(text("SELECT * FROM missing_table"))
+        except Exception:
+            db.session.rollback()
+        return {"pending": len(db.session.connection().info.get("query_start", []))}
+
+    app.add_url_rule("/test/failing-query", view_func=failing_query)
+
+    assert client.get("/test/failing-query").get_json() == {"pending": 0}
+
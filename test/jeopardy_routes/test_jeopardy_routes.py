@@ -0,0 +1,130 @@
+from sqlalchemy import event, text
+
+from database import db
+
+
+def test_get_jeopardy_returns_304_for_matching_etag(client, query_counter, create_board):
+    jeopardy_id = create_board(client)
+    etag = client.get(f"/jeopardy/{jeopardy_id}").headers["ETag"]
+
+    query_counter.clear()
+    response = client.get(f"/jeopardy/{jeopardy_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert len(query_counter) == 1
+
+
+def test_get_jeopardy_games_etag_changes_after_delete(client, create_board):
+    jeopardy_id = create_board(client)
+    etag = client.get("/jeopardy").headers["ETag"]
+
+    client.delete(f"/jeopardy/{jeopardy_id}")
+
+    assert client.get("/jeopardy", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_get_jeopardy_builds_ordered_grid_in_three_queries(client, query_counter, create_board):
+    jeopardy_id = create_board(client, rows=3, subjects=("Python", "SQL", "Git"))
+
+    query_counter.clear()
+    jeopardy = client.get(f"/jeopardy/{jeopardy_id}").get_json()["jeopardy"]
+
+    assert len(query_counter) == 3
+    assert jeopardy["subjects"] == ["Python", "SQL", "Git"]
+    assert [[cell["question"] for cell in row] for row in jeopardy["grid"]] == [
+        ["Q00", "Q01", "Q02"],
+        ["Q10", "Q11", "Q12"],
+        ["Q20", "Q21", "Q22"]
+    ]
+
+
+def test_get_jeopardy_handles_empty_and_sparse_boards(client, create_board):
+    empty_id = create_board(client, rows=0)
+    empty = client.get(f"/jeopardy/{empty_id}")
+    assert empty.status_code == 200
+    assert empty.get_json()["jeopardy"]["grid"] == []
+
+    sparse_id = create_board(client, rows=2)
+    db.session.execute(
+        text("DELETE FROM JeopardyCells WHERE RowNumber = 0 AND ColumnNumber = 1 AND jeopardy_cell_jeopardy_id = :id"),
+        {"id": sparse_id}
+    )
+
+    grid = client.get(f"/jeopardy/{sparse_id}").get_json()["jeopardy"]["grid"]
+    assert grid[0][1] is None
+    assert [cell["question"] for cell in grid[1]] == ["Q10", "Q11"]
+
+
+def board(title, rows=2, subjects=("Python", "SQL")):
+    return {
+        "title": title,
+        "subjects": list(subjects),
+        "grid": [
+            [{"value": 100, "question": f"{title} Q{row}{col}", "answer": "A"} for col in range(len(subjects))]
+            for row in range(rows)
+        ]
+    }
+
+
+def test_create_jeopardy_rejects_grid_that_does_not_match_subjects(client):
+    data = board("Quiz")
+    data["grid"][1].pop()
+
+    response = client.post("/jeopardy", json=data)
+
+    assert response.status_code == 400
+    assert "grid row 1 must have 2 cells" in response.get_json()["message"]
+    assert client.get("/jeopardy").get_json()["jeopardy_games"] == []
+
+
+def test_create_jeopardy_rejects_boolean_cell_value(client):
+    data = board("Quiz")
+    data["grid"][0][0]["value"] = True
+
+    response = client.post("/jeopardy", json=data)
+
+    assert response.status_code == 400
+    assert "grid cell (0, 0) needs an integer value" in response.get_json()["message"]
+
+
+def test_create_jeopardy_inserts_cells_in_one_statement(client, query_counter):
+    response = client.post("/jeopardy", json=board("Quiz", rows=5, subjects=("A", "B", "C", "D", "E")))
+
+    assert response.status_code == 201
+    cell_inserts = [statement for statement in query_counter if statement.startswith("INSERT INTO \"JeopardyCells\"")]
+    assert len(cell_inserts) == 1
+
+    jeopardy = client.get(f"/jeopardy/{response.get_json()['id']}").get_json()["jeopardy"]
+    assert len(jeopardy["grid"]) == 5
+    assert jeopardy["grid"][4][4]["question"] == "Quiz Q44"
+
+
+def test_import_jeopardy_commits_boards_in_chunks(app, client):
+    app.config["JEOPARDY_IMPORT_CHUNK_SIZE"] = 2
+    commits = []
+
+    def count_commit(session):
+        commits.append(session)
+
+    event.listen(db.session, "after_commit", count_commit)
+    response = client.post("/jeopardy/import", json={"boards": [board(f"Quiz {index}") for index in range(5)]})
+    event.remove(db.session, "after_commit", count_commit)
+
+    assert response.status_code == 201
+    ids = response.get_json()["ids"]
+    assert len(ids) == 5
+    assert len(commits) == 3
+    assert [game["title"] for game in client.get("/jeopardy").get_json()["jeopardy_games"]] == [
+        f"Quiz {index}" for index in range(5)
+    ]
+    assert client.get(f"/jeopardy/{ids[3]}").get_json()["jeopardy"]["grid"][1][0]["question"] == "Quiz 3 Q10"
+
+
+def test_import_jeopardy_validates_every_board_before_writing(client):
+    boards = [board("Good"), {"title": "Bad", "subjects": ["Python"], "grid": [[{"value": "100"}]]}]
+
+    response = client.post("/jeopardy/import", json={"boards": boards})
+
+    assert response.status_code == 400
+    assert response.get_json()["message"].startswith("Board 1:")
+    assert client.get("/jeopardy").get_json()["jeopardy_games"] == []
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy.exc import OperationalError
+
+from database import db
+from metrics import generate_metrics
+from models import Course
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def samples(text):
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+def test_ping_checks_the_database(client, monkeypatch):
+    response = client.get("/ping")
+    assert response.status_code == 200
+    assert response.get_json() == {"message": "pong", "database": "ok"}
+
+    def unavailable(*args, **kwargs):
+        raise OperationalError("SELECT 1", {}, Exception("connection refused"))
+
+    monkeypatch.setattr(db.session, "execute", unavailable)
+    response = client.get("/ping")
+    assert response.status_code == 503
+
+
+def test_metrics_report_requests_pool_caches_and_hashing(client):
+    db.session.add(Course(course_title="Python", course_description=""))
+    db.session.commit()
+
+    before = samples(client.get("/metrics").get_data(as_text=True))
+    client.get("/course/1")
+    client.get("/course/1")
+    response = client.get("/metrics")
+
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    after = samples(response.get_data(as_text=True))
+
+    key = ("http_requests_total", (("method", "GET"), ("route", "/course/<int:course_id>"), ("status", "200")))
+    assert after[key] - before.get(key, 0) == 2
+    assert after[("http_requests_in_flight", ())] == 1
+    assert ("db_pool_checkout_timeouts", ()) in after
+    assert after[("cache_requests", (("cache", "course"), ("result", "hit")))] >= 1
+    assert ("argon2_queue_depth", ()) in after
+
+
+def test_metrics_require_the_token_or_a_local_scraper(app, client):
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.5"}).status_code == 403
+
+    app.config["METRICS_TOKEN"] = "scrape-secret"
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+
+
+def test_worker_gauges_are_not_refreshed_on_every_request(client, monkeypatch):
+    import metrics
+
+    client.get("/ping")
+    refreshed = []
+    monkeypatch.setattr(metrics, "pool_status", lambda: refreshed.append(1) or {"timeouts": 0})
+    for _ in range(5):
+        client.get("/ping")
+
+    assert refreshed == []
+
+
+def test_metrics_add_up_across_worker_processes(tmp_path):
+    # Each process stands in for a gunicorn worker writing to the shared directory
+    worker = (
+        "from metrics import http_requests\n"
+        "http_requests.labels('GET', '/course', 200).inc(3)\n"
+    )
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "FLASK_ENV": "testing"}
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], cwd=ROOT, env=env, check=True)
+
+    totals = samples(generate_metrics(str(tmp_path)).decode("utf-8"))
+    assert totals[("http_requests_total", (("method", "GET"), ("route", "/course"), ("status", "200")))] == 6
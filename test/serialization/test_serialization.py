@@ -0,0 +1,41 @@
+import datetime
+import re
+
+from database import db
+from models import Course, Jeopardy
+from serialization import dumps, stdlib_dumps
+
+API_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+
+
+def test_stdlib_fallback_writes_the_same_document():
+    data = {
+        "id": 1,
+        "title": "Kursus æøå",
+        "created": datetime.datetime(2024, 1, 31, 12, 30, 5, 123456),
+        "nested": [{"at": datetime.date(2024, 1, 31)}, None, 1.5, True]
+    }
+
+    assert dumps(data) == stdlib_dumps(data)
+    assert b'"created":"2024-01-31 12:30:05"' in dumps(data)
+
+
+def test_datetimes_keep_the_api_format(client):
+    db.session.add(Course(course_title="Python", course_description="Intro"))
+    db.session.add(Jeopardy(jeopardy_title="Board", jeopardy_description="Board"))
+    db.session.commit()
+
+    course = client.get("/course").get_json()["courses"][0]
+    streamed = client.get("/course?stream=true").get_json()["courses"][0]
+    game = client.get("/jeopardy").get_json()["jeopardy_games"][0]
+
+    assert API_DATETIME.match(course["created"])
+    assert streamed == course
+    assert API_DATETIME.match(game["created"])
+
+
+def test_user_routes_use_the_same_encoder(client):
+    response = client.post("/register", json={"fullName": "Jane Doe", "email": "jane@example.com", "password": "Secret123"})
+
+    assert response.status_code == 201
+    assert response.data == b'{"message":"User created successfully"}'
@@ -1,3 +1,6 @@
+import threading
+import time
+
 import pytest
 from unittest.mock import patch, MagicMock
 from flask import Flask
@@ -28,3 +31,186 @@ def test_user_login_invalid_credentials():
             response = UserRoutes.user_login()
             assert response[1] == 401
             assert response[0].json == {"error": "Invalid credentials"}
+
+
+def register_and_login(client, password="Secret123"):
+    client.post("/register", json={"fullName": "Jane Doe", "email": "jane@example.com", "password": password})
+    return client.post("/login", json={"email": "jane@example.com", "password": password})
+
+
+def test_register_and_login(client):
+    response = register_and_login(client)
+
+    assert response.status_code == 200
+    assert "access_token" in response.get_json()
+    assert client.post("/login", json={"email": "jane@example.com", "password": "wrong"}).status_code == 401
+
+
+def test_login_reads_the_account_with_one_column_only_query(client, query_counter):
+    client.post("/register", json={"fullName": "Jane Doe", "email": "jane@example.com", "password": "Secret123"})
+    query_counter.clear()
+
+    response = client.post("/login", json={"email": "jane@example.com", "password": "Secret123"})
+
+    assert response.status_code == 200
+    assert len(query_counter) == 1
+    assert "created_at" not in query_counter[0].lower()
+
+
+def test_login_upgrades_outdated_password_hash(client):
+    from argon2 import PasswordHasher
+    from database import db
+    from models import Account
+
+    old_hash = PasswordHasher(time_cost=2, memory_cost=16, parallelism=1).hash("Secret123")
+    db.session.add(Account(name="Jane Doe", email="jane@example.com", password=old_hash, role_id=1))
+    db.session.commit()
+
+    response = client.post("/login", json={"email": "jane@example.com", "password": "Secret123"})
+
+    assert response.status_code == 200
+    new_hash = db.session.query(Account.password).filter_by(email="jane@example.com").scalar()
+    assert new_hash != old_hash
+    assert "t=1" in new_hash
+
+
+def test_login_succeeds_when_the_hash_upgrade_cannot_be_written(client, monkeypatch):
+    from argon2 import PasswordHasher
+    from sqlalchemy.exc import OperationalError
+    from database import db
+    from models import Account
+
+    old_hash = PasswordHasher(time_cost=2, memory_cost=16, parallelism=1).hash("Secret123")
+    db.session.add(Account(name="Jane Doe", email="jane@example.com", password=old_hash, role_id=1))
+    db.session.commit()
+
+    def read_only(*args, **kwargs):
+        raise OperationalError("COMMIT", {}, Exception("database is read-only"))
+
+    monkeypatch.setattr(db.session, "commit", read_only)
+    response = client.post("/login", json={"email": "jane@example.com", "password": "Secret123"})
+    monkeypatch.undo()
+
+    assert response.status_code == 200
+    assert "access_token" in response.get_json()
+    assert db.session.query(Account.password).filter_by(email="jane@example.com").scalar() == old_hash
+
+
+def test_login_returns_503_when_hashing_queue_is_full(client):
+    from hashing import password_hasher
+
+    register_and_login(client)
+    password_hasher._slots = threading.BoundedSemaphore(1)
+    password_hasher._slots.acquire()
+
+    response = client.post("/login", json={"email": "jane@example.com", "password": "Secret123"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_hashing_pool_runs_in_worker_processes():
+    from hashing import PasswordHashingPool
+
+    pool = PasswordHashingPool()
+    app.config.update(HASH_WORKERS=1, ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=8, ARGON2_PARALLELISM=1)
+    pool.init_app(app)
+    try:
+        password_hash = pool.hash("Secret123")
+        assert pool.verify(password_hash, "Secret123")
+        assert not pool.verify(password_hash, "wrong")
+        assert not pool.verify("not-a-hash", "Secret123")
+    finally:
+        pool.shutdown()
+
+
+def test_hashing_job_keeps_its_slot_until_it_finishes():
+    from hashing import HashingBusy, PasswordHashingPool
+
+    pool = PasswordHashingPool()
+    app.config.update(HASH_WORKERS=1, HASH_QUEUE_DEPTH=1, ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=8, ARGON2_PARALLELISM=1)
+    pool.init_app(app)
+    pool.timeout = 0
+    try:
+        with pytest.raises(HashingBusy):
+            pool.hash("Secret123")
+        # The job still runs in the pool and holds the only slot
+        assert pool.pending() == 1
+        with pytest.raises(HashingBusy):
+            pool.hash("Secret123")
+
+        deadline = time.monotonic() + 10
+        while pool.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        pool.timeout = 10
+        assert pool.verify(pool.hash("Secret123"), "Secret123")
+    finally:
+        pool.shutdown()
+
+
+def test_broken_hashing_pool_is_replaced():
+    from hashing import HashingBusy, PasswordHashingPool
+
+    pool = PasswordHashingPool()
+    app.config.update(HASH_WORKERS=1, HASH_QUEUE_DEPTH=8, ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=8, ARGON2_PARALLELISM=1)
+    pool.init_app(app)
+    try:
+        pool.hash("Secret123")
+        for process in list(pool._executor._processes.values()):
+            process.kill()
+            process.join()
+
+        with pytest.raises(HashingBusy):
+            pool.hash("Secret123")
+        assert pool.verify(pool.hash("Secret123"), "Secret123")
+        assert pool.pending() == 0
+    finally:
+        pool.shutdown()
+
+
+def test_hashing_queue_depth_zero_means_no_limit():
+    from hashing import PasswordHashingPool
+
+    pool = PasswordHashingPool()
+    app.config.update(HASH_WORKERS=0, HASH_QUEUE_DEPTH=0, ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=8, ARGON2_PARALLELISM=1)
+    pool.init_app(app)
+
+    assert pool.verify(pool.hash("Secret123"), "Secret123")
+
+
+def test_current_user_is_served_from_token_claims(client, student, query_counter):
+    student_id = student.account_id
+    query_counter.clear()
+
+    response = client.get("/users/current", headers=student.headers)
+
+    assert response.get_json() == {"id": student_id, "fullName": "Test Student", "email": "student@example.com", "role": 1}
+    assert query_counter == []
+
+
+def test_current_user_fresh_reads_the_database(client, student, query_counter):
+    from database import db
+
+    student.name = "Renamed Student"
+    db.session.commit()
+    query_counter.clear()
+
+    response = client.get("/users/current?fresh=1", headers=student.headers)
+
+    assert response.get_json()["fullName"] == "Renamed Student"
+    assert len(query_counter) == 1
+
+
+def test_current_user_without_name_claim_uses_cache(client, student, query_counter):
+    from flask_jwt_extended import create_access_token
+
+    token = create_access_token(identity={"id": student.account_id, "email": student.email, "role_id": 1})
+    headers = {"Authorization": f"Bearer {token}"}
+    query_counter.clear()
+
+    first = client.get("/users/current", headers=headers)
+    second = client.get("/users/current", headers=headers)
+
+    assert first.get_json() == second.get_json()
+    assert first.get_json()["fullName"] == "Test Student"
+    assert len(query_counter) == 1
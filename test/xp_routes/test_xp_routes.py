@@ -0,0 +1,145 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from database import db
+from models import Course, UserXP
+
+
+def create_course():
+    course = Course(course_title="Python")
+    db.session.add(course)
+    db.session.commit()
+    return course.course_id
+
+
+def test_add_xp(client, student):
+    course_id = create_course()
+
+    first = client.post("/xp", json={"course_id": course_id, "xp_earned": 50}, headers=student.headers)
+    second = client.post("/xp", json={"course_id": course_id, "xp_earned": 50}, headers=student.headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 400
+    assert client.post("/xp", json={"course_id": 999, "xp_earned": 50}, headers=student.headers).status_code == 404
+
+
+def test_concurrent_add_xp_creates_one_row(file_app, student):
+    course_id = create_course()
+    client = file_app.test_client()
+
+    def add_xp(_):
+        return client.post("/xp", json={"course_id": course_id, "xp_earned": 50}, headers=student.headers).status_code
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        status_codes = list(executor.map(add_xp, range(64)))
+
+    assert status_codes.count(201) == 1
+    assert status_codes.count(400) == 63
+    assert db.session.query(UserXP).count() == 1
+
+
+def test_total_xp_is_maintained_on_write(client, student, query_counter):
+    student_id = student.account_id
+    first_course, second_course = create_course(), create_course()
+    client.post("/xp", json={"course_id": first_course, "xp_earned": 50}, headers=student.headers)
+    client.post("/xp", json={"course_id": second_course, "xp_earned": 25}, headers=student.headers)
+
+    query_counter.clear()
+    response = client.get("/xp/total", headers=student.headers)
+
+    assert len(query_counter) == 1
+    assert response.get_json() == {"user_id": student_id, "total_xp": 75}
+    assert client.get(f"/xp/{student_id}/total", headers=student.headers).get_json()["total_xp"] == 75
+
+
+def test_reconcile_xp_totals_fixes_drift(app, student):
+    from models import UserXPTotal
+    from routes.user.user_xp_route import reconcile_xp_totals
+
+    course_id = create_course()
+    db.session.add_all([
+        UserXP(user_id=student.account_id, course_id=course_id, xp_earned=40),
+        UserXP(user_id=2, course_id=course_id, xp_earned=10),
+        UserXPTotal(user_id=student.account_id, total_xp=5),
+        UserXPTotal(user_id=3, total_xp=99)
+    ])
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["xp", "reconcile-totals"])
+
+    assert "1 inserted, 1 updated, 1 deleted" in result.output
+    totals = dict(db.session.query(UserXPTotal.user_id, UserXPTotal.total_xp).all())
+    assert totals == {student.account_id: 40, 2: 10}
+    assert reconcile_xp_totals() == (0, 0, 0)
+
+
+def test_leaderboard_ranks_users(client, student):
+    from models import Account, UserXPTotal
+
+    student_id = student.account_id
+    db.session.add_all([
+        Account(account_id=50, name="Ada", email="ada@example.com", password="x", role_id=1),
+        Account(account_id=51, name="Bob", email="bob@example.com", password="x", role_id=1),
+        UserXPTotal(user_id=50, total_xp=300),
+        UserXPTotal(user_id=51, total_xp=100)
+    ])
+    db.session.commit()
+    course_id = create_course()
+    client.post("/xp", json={"course_id": course_id, "xp_earned": 200}, headers=student.headers)
+
+    body = client.get("/xp/leaderboard?limit=2&radius=1", headers=student.headers).get_json()
+
+    assert [(entry["rank"], entry["name"]) for entry in body["entries"]] == [(1, "Ada"), (2, "Test Student")]
+    assert body["me"] == {"rank": 2, "user_id": student_id, "total_xp": 200}
+    assert [entry["user_id"] for entry in body["around_me"]] == [50, student_id, 51]
+    assert body["total_users"] == 3
+
+
+def test_course_leaderboard_is_updated_on_add_xp(client, student):
+    course_id = create_course()
+    db.session.add(UserXP(user_id=77, course_id=course_id, xp_earned=10))
+    db.session.commit()
+    assert client.get(f"/xp/leaderboard/{course_id}", headers=student.headers).get_json()["me"] is None
+
+    client.post("/xp", json={"course_id": course_id, "xp_earned": 20}, headers=student.headers)
+
+    body = client.get(f"/xp/leaderboard/{course_id}", headers=student.headers).get_json()
+    assert body["me"]["rank"] == 1
+    assert [entry["user_id"] for entry in body["entries"]] == [student.account_id, 77]
+
+
+def test_stale_leaderboard_is_served_while_it_is_rebuilt(app):
+    import threading
+    from leaderboard import LeaderboardIndex
+
+    index = LeaderboardIndex(refresh_seconds=0)
+    board = index.get(None, lambda: [(1, 10)])
+    loading = threading.Event()
+    release = threading.Event()
+
+    def slow_loader():
+        loading.set()
+        release.wait(5)
+        return [(1, 10), (2, 30)]
+
+    assert index.get(None, slow_loader) is board
+    loading.wait(5)
+    index.record(3, 5, 20)
+    release.set()
+    index.join()
+
+    index.refresh_seconds = 60
+    rebuilt = index.get(None, slow_loader)
+    assert rebuilt is not board
+    assert [(entry["user_id"], entry["total_xp"]) for entry in rebuilt.top(3)] == [(2, 30), (3, 20), (1, 10)]
+
+
+def test_leaderboard_index_keeps_at_most_max_boards_courses(app):
+    from leaderboard import LeaderboardIndex
+
+    index = LeaderboardIndex(max_boards=2)
+    index.get(None, lambda: [])
+    for course_id in (1, 2, 3):
+        index.get(course_id, lambda: [])
+    index.get(2, lambda: [(9, 1)])
+
+    assert list(index._boards) == [None, 3, 2]